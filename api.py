@@ -0,0 +1,333 @@
+import argparse
+import asyncio
+import json
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+
+from base_datos import TAMANO_POOL, conectar_db, ejecutar_en_todos, ejecutar_transaccion, ruta_equipo, rutas_almacen
+from bots import jugar_bots
+from metricas import medir
+from motor import ROLES
+from notificaciones import obtener_vigilante
+from parametros import obtener_parametros, precargar_parametros
+from partida import equipo_completo, obtener_semana_actual, registrar_en_transaccion, semana_actual
+
+# ========================
+# CONFIGURACIÓN
+# ========================
+# Servicio JSON sin Streamlit para jugar desde teléfonos, scripts o bots
+# externos: `python api.py`. Un solo bucle asyncio atiende todas las
+# conexiones (keep-alive) y SQLite trabaja en hilos aparte: las lecturas en
+# tantos hilos como conexiones tiene el pool y las escrituras en uno solo, así
+# las transacciones del proceso no compiten por el bloqueo de escritura.
+#
+#   GET  /salud
+#   GET  /equipos/<team_id>                          estado de los cuatro roles
+#   GET  /equipos/<team_id>/semana?desde=N&espera=S  semana en curso (espera hasta S s a que deje de ser N)
+#   POST /decisiones                                 una decisión o {"decisiones": [...]} en una transacción
+#
+# Cada decisión es {"team_id", "clave", "rol", "pedido", "envio"} y opcionalmente
+# "semana": si ya se cerró, no se registra (un reintento no cambia la historia).
+HOST = "127.0.0.1"
+PUERTO = 8502
+MAX_CUERPO = 1 << 20        # bytes
+MAX_DECISIONES = 1000       # por pedido
+ESPERA_MAX = 30             # segundos de espera larga por la semana
+INTERVALO_ESPERA = 0.25     # cada cuánto se mira al vigilante mientras se espera
+TIEMPO_INACTIVO = 60        # segundos antes de cerrar una conexión sin pedidos
+
+
+class ErrorAPI(Exception):
+    def __init__(self, estado, mensaje):
+        super().__init__(mensaje)
+        self.estado = estado
+
+
+# ========================
+# OPERACIONES (HILOS DE SQLITE)
+# ========================
+@medir
+def estado_equipo(team_id):
+    with conectar_db(team_id=team_id) as conn:
+        fila = conn.execute("SELECT team_name FROM teams WHERE team_id = ?", (team_id,)).fetchone()
+        if fila is None:
+            raise ErrorAPI(HTTPStatus.NOT_FOUND, f"Equipo no encontrado: {team_id}")
+        semana = semana_actual(conn, team_id)
+        parametros = obtener_parametros(team_id, conn, recargar=semana == 1)
+        filas = conn.execute("""
+            SELECT role, stock, backorder, incoming_order, incoming_shipment, decided
+            FROM rounds
+            WHERE team_id = ? AND week = ?
+        """, (team_id, semana)).fetchall()
+
+    roles = {rol: {"stock": parametros.initial_stock, "backorder": 0, "pedido_recibido": 0,
+                   "envio_recibido": 0, "decidido": False} for rol in ROLES}
+    for rol, stock, backorder, pedido, envio, decidido in filas:
+        roles[rol] = {"stock": stock, "backorder": backorder, "pedido_recibido": pedido,
+                      "envio_recibido": envio, "decidido": bool(decidido)}
+    return {
+        "team_id": team_id, "equipo": fila[0], "semana": semana,
+        "semanas_total": parametros.weeks_total, "terminado": semana > parametros.weeks_total,
+        "roles": roles,
+    }
+
+
+def _leer_decision(item):
+    if not isinstance(item, dict):
+        raise ErrorAPI(HTTPStatus.BAD_REQUEST, "Cada decisión debe ser un objeto JSON")
+    team_id, clave, rol = item.get("team_id"), item.get("clave"), item.get("rol")
+    if not isinstance(team_id, str) or not isinstance(clave, str):
+        raise ErrorAPI(HTTPStatus.BAD_REQUEST, "Faltan team_id o clave")
+    if rol not in ROLES:
+        raise ErrorAPI(HTTPStatus.BAD_REQUEST, f"Rol inválido: {rol}")
+    # "semana": null equivale a omitirla (la semana en curso del equipo)
+    semana = item.get("semana")
+    valores = [item.get("pedido"), item.get("envio"), 1 if semana is None else semana]
+    if any(not isinstance(v, int) or isinstance(v, bool) or v < 0 for v in valores):
+        raise ErrorAPI(HTTPStatus.BAD_REQUEST, "pedido, envio y semana deben ser enteros no negativos")
+    return team_id, clave, rol, semana, item["pedido"], item["envio"]
+
+
+def _registrar_lote(conn, decisiones):
+    """Registra decisiones de equipos de un mismo archivo; si una es inválida no queda ninguna.
+
+    Devuelve (resultados, semana en curso de cada equipo, equipos con bots).
+    """
+    semanas = {}
+    con_bots = set()
+    resultados = []
+    for posicion, (team_id, clave, rol, semana, pedido, envio) in decisiones:
+        if team_id not in semanas:
+            fila = conn.execute("SELECT team_password FROM teams WHERE team_id = ?", (team_id,)).fetchone()
+            if fila is None:
+                raise ErrorAPI(HTTPStatus.NOT_FOUND, f"Equipo no encontrado: {team_id}")
+            if fila[0] != clave:
+                raise ErrorAPI(HTTPStatus.FORBIDDEN, f"Clave incorrecta para el equipo {team_id}")
+            if not equipo_completo(conn, team_id):
+                raise ErrorAPI(HTTPStatus.CONFLICT, f"El equipo {team_id} todavía no tiene los 4 roles")
+            semanas[team_id] = semana_actual(conn, team_id)
+            if conn.execute("SELECT 1 FROM bots WHERE team_id = ? LIMIT 1", (team_id,)).fetchone():
+                con_bots.add(team_id)
+
+        actual = semanas[team_id]
+        semana = actual if semana is None else semana
+        resultado = {"team_id": team_id, "rol": rol, "semana": semana, "aceptada": False, "semana_cerrada": False}
+        resultados.append((posicion, resultado))
+        if semana != actual:
+            continue  # Semana ya cerrada (o futura): no se registra
+        parametros = obtener_parametros(team_id, conn, recargar=actual == 1)
+        if actual > parametros.weeks_total:
+            raise ErrorAPI(HTTPStatus.CONFLICT, f"El juego del equipo {team_id} ya terminó")
+
+        # Mismo estado que juego.py muestra al alumno
+        estado = conn.execute("""
+            SELECT stock, backorder, incoming_order, incoming_shipment
+            FROM rounds
+            WHERE team_id = ? AND week = ? AND role = ?
+        """, (team_id, semana, rol)).fetchone() or (parametros.initial_stock, 0, 0, 0)
+        resultado["aceptada"] = True
+        resultado["semana_cerrada"] = registrar_en_transaccion(conn, team_id, rol, semana, *estado, pedido, envio)
+        if resultado["semana_cerrada"]:
+            semanas[team_id] = actual + 1
+    return resultados, semanas, con_bots
+
+
+def _registrar_en_todos(conexiones, por_archivo):
+    resultados, semanas, con_bots = [], {}, set()
+    for ruta, lote in por_archivo.items():
+        parte = _registrar_lote(conexiones[ruta], lote)
+        resultados += parte[0]
+        semanas.update(parte[1])
+        con_bots |= parte[2]
+    return resultados, semanas, con_bots
+
+
+@medir
+def registrar_decisiones(decisiones):
+    """Registra el lote en una transacción (una por archivo del almacén) y hace jugar a los bots."""
+    por_archivo = {}
+    for posicion, decision in enumerate(decisiones):
+        por_archivo.setdefault(ruta_equipo(decision[0]), []).append((posicion, decision))
+    if len(por_archivo) == 1:
+        (ruta, lote), = por_archivo.items()
+        resultados, semanas, con_bots = ejecutar_transaccion(_registrar_lote, lote, ruta=ruta)
+    else:
+        resultados, semanas, con_bots = ejecutar_en_todos(_registrar_en_todos, por_archivo)
+    resultados = [resultado for _, resultado in sorted(resultados, key=lambda par: par[0])]
+
+    # Los bots deciden en cuanto les toca, igual que después de un alumno en juego.py
+    for team_id in con_bots & {r["team_id"] for r in resultados if r["aceptada"]}:
+        if jugar_bots(team_id):
+            semanas[team_id] = obtener_semana_actual(team_id)
+    return {"decisiones": resultados, "semanas": semanas}
+
+
+# ========================
+# SERVIDOR HTTP
+# ========================
+class ServidorAPI:
+    def __init__(self):
+        self.lecturas = ThreadPoolExecutor(TAMANO_POOL, thread_name_prefix="api-lectura")
+        self.escrituras = ThreadPoolExecutor(1, thread_name_prefix="api-escritura")
+        # Semanas que este proceso ya vio avanzar: se responden antes de que las
+        # note el vigilante, que sondea la base cada segundo
+        self._semanas = {}
+        self._avances = {}
+
+    async def _en(self, hilos, funcion, *args):
+        return await asyncio.get_running_loop().run_in_executor(hilos, funcion, *args)
+
+    def _avisar(self, semanas):
+        for team_id, semana in semanas.items():
+            self._semanas[team_id] = max(semana, self._semanas.get(team_id, 1))
+            evento = self._avances.pop(team_id, None)
+            if evento is not None:
+                evento.set()
+
+    async def semana_equipo(self, team_id, desde=None, espera=0.0):
+        loop = asyncio.get_running_loop()
+        vigilante = obtener_vigilante(team_id=team_id)
+        limite = loop.time() + min(espera, ESPERA_MAX)
+        while True:
+            semana = max(vigilante.semana(team_id), self._semanas.get(team_id, 1))
+            restante = limite - loop.time()
+            if desde is None or semana != desde or restante <= 0:
+                break
+            evento = self._avances.setdefault(team_id, asyncio.Event())
+            try:
+                await asyncio.wait_for(evento.wait(), min(restante, INTERVALO_ESPERA))
+            except TimeoutError:
+                pass
+        parametros = await self._en(self.lecturas, obtener_parametros, team_id)
+        return {"team_id": team_id, "semana": semana, "terminado": semana > parametros.weeks_total}
+
+    async def despachar(self, metodo, destino, cuerpo):
+        url = urlsplit(destino)
+        partes = [p for p in url.path.split("/") if p]
+        consulta = {clave: valores[-1] for clave, valores in parse_qs(url.query).items()}
+
+        if metodo == "GET" and partes == ["salud"]:
+            return {"ok": True}
+        if metodo == "GET" and len(partes) == 2 and partes[0] == "equipos":
+            return await self._en(self.lecturas, estado_equipo, partes[1])
+        if metodo == "GET" and len(partes) == 3 and partes[0] == "equipos" and partes[2] == "semana":
+            try:
+                desde = int(consulta["desde"]) if "desde" in consulta else None
+                espera = float(consulta.get("espera", 0))
+            except ValueError:
+                raise ErrorAPI(HTTPStatus.BAD_REQUEST, "desde y espera deben ser números")
+            return await self.semana_equipo(partes[1], desde, espera)
+        if metodo == "POST" and partes == ["decisiones"]:
+            try:
+                datos = json.loads(cuerpo)
+            except (ValueError, UnicodeDecodeError):
+                raise ErrorAPI(HTTPStatus.BAD_REQUEST, "El cuerpo no es JSON válido")
+            items = datos.get("decisiones", [datos]) if isinstance(datos, dict) else None
+            if not isinstance(items, list) or not items:
+                raise ErrorAPI(HTTPStatus.BAD_REQUEST, "Se espera una decisión o {\"decisiones\": [...]}")
+            if len(items) > MAX_DECISIONES:
+                raise ErrorAPI(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, f"Máximo {MAX_DECISIONES} decisiones por pedido")
+            respuesta = await self._en(self.escrituras, registrar_decisiones, [_leer_decision(i) for i in items])
+            self._avisar(respuesta["semanas"])
+            return respuesta
+        if partes and partes[0] in ("salud", "equipos", "decisiones"):
+            raise ErrorAPI(HTTPStatus.METHOD_NOT_ALLOWED, f"Método no permitido: {metodo}")
+        raise ErrorAPI(HTTPStatus.NOT_FOUND, f"Ruta desconocida: {url.path}")
+
+    async def _responder(self, metodo, destino, cuerpo):
+        try:
+            return HTTPStatus.OK, await self.despachar(metodo, destino, cuerpo)
+        except ErrorAPI as error:
+            return error.estado, {"error": str(error)}
+        except Exception:
+            traceback.print_exc()
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "Error interno"}
+
+    async def atender(self, lector, escritor):
+        """Una conexión HTTP/1.1: atiende pedidos en orden mientras siga abierta."""
+        try:
+            while True:
+                try:
+                    cabecera = await asyncio.wait_for(lector.readuntil(b"\r\n\r\n"), TIEMPO_INACTIVO)
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, TimeoutError, ConnectionError):
+                    return
+                linea, *lineas = cabecera.decode("latin-1").rstrip("\r\n").split("\r\n")
+                cabeceras = {}
+                for texto in lineas:
+                    nombre, _, valor = texto.partition(":")
+                    cabeceras[nombre.strip().lower()] = valor.strip()
+                try:
+                    metodo, destino, version = linea.split(" ")
+                    largo = int(cabeceras.get("content-length", 0))
+                except ValueError:
+                    self._escribir(escritor, HTTPStatus.BAD_REQUEST, {"error": "Pedido HTTP mal formado"}, False)
+                    return
+                if largo > MAX_CUERPO:
+                    self._escribir(escritor, HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {"error": "Cuerpo demasiado grande"},
+                                   False)
+                    return
+                cuerpo = await lector.readexactly(largo) if largo else b""
+
+                conexion = cabeceras.get("connection", "").lower()
+                mantener = conexion == "keep-alive" if version == "HTTP/1.0" else conexion != "close"
+                estado, datos = await self._responder(metodo, destino, cuerpo)
+                self._escribir(escritor, estado, datos, mantener)
+                await escritor.drain()
+                if not mantener:
+                    return
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            escritor.close()
+
+    @staticmethod
+    def _escribir(escritor, estado, datos, mantener):
+        cuerpo = json.dumps(datos, ensure_ascii=False).encode()
+        escritor.write(
+            f"HTTP/1.1 {estado.value} {estado.phrase}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(cuerpo)}\r\n"
+            f"Connection: {'keep-alive' if mantener else 'close'}\r\n\r\n".encode() + cuerpo
+        )
+
+
+async def servir(host=HOST, puerto=PUERTO, listo=None):
+    """Atiende hasta que se cancele la tarea; `listo(servidor)` se llama al empezar a escuchar."""
+    api = ServidorAPI()
+    # Esquema, vigilantes y parámetros listos antes del primer pedido
+    for ruta in rutas_almacen():
+        obtener_vigilante(ruta)
+    precargar_parametros()
+    servidor = await asyncio.start_server(api.atender, host, puerto, backlog=1024)
+    if listo:
+        listo(servidor)
+    try:
+        async with servidor:
+            await servidor.serve_forever()
+    finally:
+        api.lecturas.shutdown(wait=False)
+        api.escrituras.shutdown(wait=True)
+
+
+# ========================
+# CLI
+# ========================
+def main():
+    parser = argparse.ArgumentParser(description="API JSON para jugar sin Streamlit")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--puerto", type=int, default=PUERTO)
+    args = parser.parse_args()
+
+    def listo(servidor):
+        print(f"✅ API escuchando en http://{args.host}:{args.puerto}")
+
+    try:
+        asyncio.run(servir(args.host, args.puerto, listo))
+    except KeyboardInterrupt:
+        print("API detenida.")
+
+
+if __name__ == "__main__":
+    main()
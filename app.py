@@ -1,19 +1,14 @@
 import streamlit as st
-import sqlite3
 from datetime import datetime
 import uuid
 
+from base_datos import conectar_db, leer_en_todos
+
 # ====================
 # CONFIGURACIÓN
 # ====================
 CLAVE_PROFESOR = "F@brizzio01"
 
-# ====================
-# CONEXIÓN BASE DE DATOS
-# ====================
-def conectar_db():
-    return sqlite3.connect("beer_game.db")
-
 # ====================
 # TÍTULO PRINCIPAL
 # ====================
@@ -46,39 +41,54 @@ if mostrar_seccion_crear_equipo:
         submitted_equipo = st.button("Crear equipo")
 
         if submitted_equipo and nombre_equipo and clave_equipo:
-            conn = conectar_db()
-            cursor = conn.cursor()
-
-            # Intentamos agregar columna team_password si no existe
-            try:
-                cursor.execute("ALTER TABLE teams ADD COLUMN team_password TEXT")
-                conn.commit()
-            except:
-                pass  # Ya existe
-
             team_id = str(uuid.uuid4())
-            fecha_creacion = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            with conectar_db(team_id=team_id) as conn:
+                cursor = conn.cursor()
+
+                fecha_creacion = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
-            cursor.execute("""
-                INSERT INTO teams (team_id, team_name, creation_date, team_password)
-                VALUES (?, ?, ?, ?)
-            """, (team_id, nombre_equipo, fecha_creacion, clave_equipo))
+                cursor.execute("""
+                    INSERT INTO teams (team_id, team_name, creation_date, team_password)
+                    VALUES (?, ?, ?, ?)
+                """, (team_id, nombre_equipo, fecha_creacion, clave_equipo))
 
-            conn.commit()
-            conn.close()
             st.success(f"✅ Equipo '{nombre_equipo}' creado con éxito. Comparte la clave con tus alumnos.")
 
+    # Solo el profesor importa planteles: pandas no se carga para los alumnos
+    from importacion import COLUMNAS_CSV, leer_csv, importar_roster
+
+    with st.expander("📥 Importar equipos y jugadores desde CSV (solo profesor)"):
+        st.caption(f"Una fila por jugador con las columnas: {', '.join(COLUMNAS_CSV)}. "
+                   "Los equipos que no existen se crean con su clave_equipo.")
+        archivo_csv = st.file_uploader("Archivo CSV", type="csv")
+        crear_equipos = st.checkbox("Crear los equipos que no existen", value=True)
+        col_simular, col_importar = st.columns(2)
+        simular = col_simular.button("🔍 Validar (sin importar)")
+        importar = col_importar.button("📥 Importar")
+
+        if archivo_csv and (simular or importar):
+            archivo_csv.seek(0)
+            resultado = importar_roster(leer_csv(archivo_csv), crear_equipos, simular=simular)
+            if resultado.errores:
+                st.error(f"❌ {len(resultado.errores)} errores: no se importó nada.")
+                st.markdown("\n".join(f"- {error}" for error in resultado.errores))
+            else:
+                accion = "Se importaron" if resultado.importado else "Se importarían"
+                st.success(f"✅ {accion} {len(resultado.jugadores)} jugadores y "
+                           f"{len(resultado.equipos_nuevos)} equipos nuevos.")
+                st.dataframe(resultado.jugadores[["equipo", "nombre", "correo", "rol"]], hide_index=True)
+
 # ====================
 # SECCIÓN 2: UNIRSE COMO JUGADOR (Alumno)
 # ====================
 with st.expander("🧑‍🎓 Unirse a un equipo como jugador", expanded=(rol_usuario == "Alumno")):
     st.subheader("2️⃣ Unirse a un equipo existente")
 
-    conn = conectar_db()
-    cursor = conn.cursor()
-    cursor.execute("SELECT team_id, team_name FROM teams")
-    equipos = cursor.fetchall()
-    conn.close()
+    # Equipos de todos los archivos del almacén (uno solo salvo si está fragmentado)
+    def leer_equipos(conn):
+        return conn.execute("SELECT team_id, team_name FROM teams").fetchall()
+
+    equipos = [e for parte in leer_en_todos(leer_equipos) for e in parte]
 
     if equipos:
         equipo_seleccionado = st.selectbox("Selecciona tu equipo", [e[1] for e in equipos])
@@ -92,21 +102,34 @@ with st.expander("🧑‍🎓 Unirse a un equipo como jugador", expanded=(rol_us
         if boton_unirse:
             team_id = [e[0] for e in equipos if e[1] == equipo_seleccionado][0]
 
-            conn = conectar_db()
-            cursor = conn.cursor()
-            cursor.execute("SELECT team_password FROM teams WHERE team_id = ?", (team_id,))
-            clave_real = cursor.fetchone()[0]
-
-            if clave_ingresada == clave_real:
-                player_id = str(uuid.uuid4())
-                cursor.execute("""
-                    INSERT INTO players (player_id, team_id, name, role, email)
-                    VALUES (?, ?, ?, ?, ?)
-                """, (player_id, team_id, nombre_jugador, rol, correo_jugador))
-                conn.commit()
-                conn.close()
-                st.success("✅ ¡Te has unido al equipo correctamente!")
-            else:
-                st.error("❌ Clave incorrecta. Por favor, consulta con tu profesor.")
+            unido = False
+            with conectar_db(team_id=team_id) as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT team_password FROM teams WHERE team_id = ?", (team_id,))
+                clave_real = cursor.fetchone()[0]
+
+                if clave_ingresada == clave_real:
+                    # Un rol con alumno o bot ya está ocupado (como en importacion._validar);
+                    # un solo INSERT, así dos alumnos a la vez no toman el mismo rol
+                    player_id = str(uuid.uuid4())
+                    cursor.execute("""
+                        INSERT INTO players (player_id, team_id, name, role, email)
+                        SELECT ?, ?, ?, ?, ?
+                        WHERE NOT EXISTS (SELECT 1 FROM players WHERE team_id = ? AND role = ?)
+                          AND NOT EXISTS (SELECT 1 FROM bots WHERE team_id = ? AND role = ?)
+                    """, (player_id, team_id, nombre_jugador, rol, correo_jugador, team_id, rol, team_id, rol))
+                    unido = cursor.rowcount == 1
+                    if unido:
+                        st.success("✅ ¡Te has unido al equipo correctamente!")
+                    else:
+                        st.error(f"❌ El rol {rol} ya está ocupado en este equipo. Elige otro rol.")
+                else:
+                    st.error("❌ Clave incorrecta. Por favor, consulta con tu profesor.")
+
+            if unido:
+                # El índice de jugadores de juego.py se rearma con el nuevo integrante
+                from partida import invalidar_plantel
+
+                invalidar_plantel()
     else:
         st.warning("Aún no hay equipos registrados. El profesor debe crearlos primero.")
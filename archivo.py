@@ -0,0 +1,301 @@
+import argparse
+import os
+import re
+import sqlite3
+import time
+import uuid
+from datetime import datetime
+
+from base_datos import RUTA_DB, conectar_db, ejecutar_transaccion, leer_en_todos, rutas_almacen
+from motor import SEMANAS_JUEGO
+from parametros import invalidar_parametros
+from partida import invalidar_plantel
+
+# ========================
+# CONFIGURACIÓN
+# ========================
+# Archivo histórico por semestre en Parquet comprimido, particionado al estilo
+# Hive: <RUTA_ARCHIVO>/<tabla>/semestre=<semestre>/<lote>.parquet. Las filas
+# van ordenadas por equipo, así los filtros por team_id saltan grupos de filas
+# enteros y no hace falta cargar el semestre completo en memoria.
+RUTA_ARCHIVO = os.environ.get("BEER_GAME_ARCHIVO") or os.path.join(
+    os.path.dirname(os.path.abspath(RUTA_DB)), "archivo"
+)
+COMPRESION = "zstd"
+FILAS_POR_GRUPO = 65536
+
+# Tablas por equipo que se archivan, con el orden de sus filas
+TABLAS = {
+    "teams": "team_id",
+    "players": "team_id, role",
+    "bots": "team_id, role",
+    "game_parameters": "team_id",
+    "demands": "team_id, week",
+    "rounds": "team_id, week, role",
+    "decision_events": "team_id, event_id",
+    "team_role_stats": "team_id, role",
+}
+# Columnas que no salen de la base: las claves de los equipos quedarían en
+# texto plano en los Parquet
+EXCLUIDAS = {"teams": {"team_password"}}
+# Derivadas de las anteriores: se borran sin archivar
+DERIVADAS = ["snapshots", "team_progress"]
+# "resumen" guarda leer_resumen() de los equipos archivados: los KPIs
+# históricos se leen sin reprocesar rounds
+RESUMEN = "resumen"
+
+TIPOS_SQLITE = {"INTEGER": "int64", "REAL": "float64", "BLOB": "binary"}
+
+
+def semestre_actual():
+    hoy = datetime.now()
+    return f"{hoy.year}-{1 if hoy.month <= 7 else 2}"
+
+
+def _validar_semestre(semestre):
+    # El nombre forma parte de la ruta de los archivos
+    if not re.fullmatch(r"[A-Za-z0-9_-]+", semestre):
+        raise ValueError("El semestre solo puede tener letras, números, '-' y '_'")
+
+
+# ========================
+# ESCRITURA
+# ========================
+def _ruta(tabla, semestre, lote):
+    return os.path.join(RUTA_ARCHIVO, tabla, f"semestre={semestre}", f"{lote}.parquet")
+
+
+def _esquema(conn, tabla):
+    import pyarrow as pa
+
+    return pa.schema([
+        (nombre, getattr(pa, TIPOS_SQLITE.get(tipo.upper(), "string"))())
+        for _, nombre, tipo, *_ in conn.execute(f"PRAGMA table_info({tabla})")
+        if nombre not in EXCLUIDAS.get(tabla, ())
+    ])
+
+
+def _escribir_tabla(conn, tabla, orden, ruta):
+    """Copia las filas de los equipos en _archivar a `ruta` por bloques; devuelve cuántas."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    esquema = _esquema(conn, tabla)
+    cursor = conn.execute(f"""
+        SELECT {", ".join(esquema.names)} FROM {tabla}
+        WHERE team_id IN (SELECT team_id FROM temp._archivar)
+        ORDER BY {orden}
+    """)
+    total = 0
+    escritor = None
+    try:
+        while filas := cursor.fetchmany(FILAS_POR_GRUPO):
+            if escritor is None:
+                os.makedirs(os.path.dirname(ruta), exist_ok=True)
+                escritor = pq.ParquetWriter(ruta, esquema, compression=COMPRESION)
+            columnas = list(zip(*filas))
+            escritor.write_table(pa.table(
+                [pa.array(columna, type=campo.type) for columna, campo in zip(columnas, esquema)],
+                schema=esquema,
+            ))
+            total += len(filas)
+    finally:
+        if escritor is not None:
+            escritor.close()
+    return total
+
+
+def _escribir_resumen(conn, equipos, ruta):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    from estadisticas import leer_resumen
+
+    # Dentro de la transacción del archivado
+    resumen = leer_resumen(conn=conn)
+    resumen = resumen[resumen["team_id"].isin(equipos)].sort_values(["team_id", "role"])
+    if resumen.empty:
+        return 0
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    pq.write_table(pa.Table.from_pandas(resumen, preserve_index=False), ruta, compression=COMPRESION)
+    return len(resumen)
+
+
+def _equipos_a_archivar(conn, todos):
+    if todos:
+        return [fila[0] for fila in conn.execute("SELECT team_id FROM teams")]
+    # Terminado: la semana en curso ya pasó la última semana de juego
+    return [fila[0] for fila in conn.execute("""
+        SELECT p.team_id
+        FROM team_progress p
+        LEFT JOIN game_parameters g ON g.team_id = p.team_id
+        WHERE p.week > COALESCE(g.weeks_total, ?)
+    """, (SEMANAS_JUEGO,))]
+
+
+def _archivar(conn, semestre, lote, todos):
+    equipos = _equipos_a_archivar(conn, todos)
+    if not equipos:
+        return 0, 0
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS _archivar (team_id TEXT PRIMARY KEY)")
+    conn.execute("DELETE FROM temp._archivar")
+    conn.executemany("INSERT INTO temp._archivar VALUES (?)", [(e,) for e in equipos])
+
+    # Se escribe a .tmp y se renombra antes de confirmar; si la transacción
+    # falla, archivar() borra los archivos del lote
+    filas_por_tabla = {
+        tabla: _escribir_tabla(conn, tabla, orden, _ruta(tabla, semestre, lote) + ".tmp")
+        for tabla, orden in TABLAS.items()
+    }
+    filas_por_tabla[RESUMEN] = _escribir_resumen(conn, equipos, _ruta(RESUMEN, semestre, lote) + ".tmp")
+    for tabla, filas in filas_por_tabla.items():
+        if filas:
+            os.replace(_ruta(tabla, semestre, lote) + ".tmp", _ruta(tabla, semestre, lote))
+
+    # Hijas primero, teams al final
+    for tabla in ["rounds", "decision_events", "team_role_stats", "bots", "players",
+                  "demands", "game_parameters"] + DERIVADAS + ["teams"]:
+        conn.execute(f"DELETE FROM {tabla} WHERE team_id IN (SELECT team_id FROM temp._archivar)")
+    conn.execute("DROP TABLE temp._archivar")
+
+    filas = sum(f for t, f in filas_por_tabla.items() if t != RESUMEN)
+    conn.execute("""
+        INSERT INTO archive_batches (batch_id, semester, archived_at, teams, rows) VALUES (?, ?, ?, ?, ?)
+    """, (lote, semestre, datetime.now().strftime("%Y-%m-%d %H:%M:%S"), len(equipos), filas))
+    return len(equipos), filas
+
+
+def _borrar_lote(lote):
+    for tabla in list(TABLAS) + [RESUMEN]:
+        directorio = os.path.join(RUTA_ARCHIVO, tabla)
+        if not os.path.isdir(directorio):
+            continue
+        for particion in os.listdir(directorio):
+            for nombre in (f"{lote}.parquet", f"{lote}.parquet.tmp"):
+                ruta = os.path.join(directorio, particion, nombre)
+                if os.path.exists(ruta):
+                    os.remove(ruta)
+            if not os.listdir(os.path.join(directorio, particion)):
+                os.rmdir(os.path.join(directorio, particion))
+
+
+def compactar(ruta=None):
+    """VACUUM y checkpoint del WAL para devolver al disco lo archivado."""
+    try:
+        with conectar_db(ruta) as conn:
+            conn.execute("VACUUM")
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return True
+    except sqlite3.OperationalError:
+        return False  # Base ocupada: se compacta en el próximo archivado
+
+
+def archivar(semestre, todos=False, compactar_base=True):
+    """Mueve al archivo del semestre los juegos terminados (o todos los equipos).
+
+    El lote solo cuenta como archivado si la transacción que borra las filas
+    vivas confirma: no se pierde ni se duplica nada. Con almacén fragmentado
+    cada archivo forma su propio lote. Devuelve (equipos, filas).
+    """
+    _validar_semestre(semestre)
+    equipos = filas = 0
+    for ruta in rutas_almacen():
+        lote = uuid.uuid4().hex
+        try:
+            equipos_ruta, filas_ruta = ejecutar_transaccion(_archivar, semestre, lote, todos, ruta=ruta)
+        except Exception:
+            _borrar_lote(lote)
+            raise
+        if equipos_ruta and compactar_base:
+            compactar(ruta)
+        equipos += equipos_ruta
+        filas += filas_ruta
+    invalidar_parametros()
+    invalidar_plantel()
+    return equipos, filas
+
+
+# ========================
+# LECTURA
+# ========================
+def _lotes(conn):
+    return conn.execute("SELECT batch_id, semester, archived_at, teams, rows FROM archive_batches").fetchall()
+
+
+def lotes_archivados():
+    """Lotes de todos los archivos del almacén, del más antiguo al más reciente."""
+    return sorted((lote for parte in leer_en_todos(_lotes) for lote in parte), key=lambda lote: lote[2])
+
+
+def semestres_archivados():
+    """Semestres archivados, el más reciente primero."""
+    ultimos = {semestre: fecha for _, semestre, fecha, _, _ in lotes_archivados()}
+    return sorted(ultimos, key=ultimos.get, reverse=True)
+
+
+def _archivos(tabla, semestre):
+    rutas = [_ruta(tabla, s, lote) for lote, s, *_ in lotes_archivados() if semestre in (None, s)]
+    return [ruta for ruta in rutas if os.path.exists(ruta)]
+
+
+def leer_archivo(tabla, semestre=None, team_id=None, columnas=None):
+    """DataFrame con las filas archivadas de `tabla` (con columna `semestre`).
+
+    El filtro por equipo se aplica al leer: solo se descomprimen los grupos de
+    filas que pueden contenerlo.
+    """
+    import pandas as pd
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    archivos = _archivos(tabla, semestre)
+    if not archivos:
+        return pd.DataFrame(columns=columnas or [])
+    datos = ds.dataset(
+        archivos, format="parquet", partition_base_dir=os.path.join(RUTA_ARCHIVO, tabla),
+        partitioning=ds.partitioning(pa.schema([("semestre", pa.string())]), flavor="hive"),
+    )
+    filtro = ds.field("team_id") == team_id if team_id else None
+    return datos.to_table(columns=columnas, filter=filtro).to_pandas()
+
+
+def equipos_archivados(semestre):
+    equipos = leer_archivo("teams", semestre, columnas=["team_id", "team_name"])
+    return list(equipos.sort_values("team_name").itertuples(index=False, name=None))
+
+
+# ========================
+# CLI
+# ========================
+def _tamano_mb():
+    return sum(os.path.getsize(r) for ruta in rutas_almacen() for r in (ruta, f"{ruta}-wal")
+               if os.path.exists(r)) / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archiva los juegos terminados en Parquet y compacta la base")
+    parser.add_argument("semestre", nargs="?", default=semestre_actual())
+    parser.add_argument("--todos", action="store_true",
+                        help="Archiva también los juegos sin terminar (cierre de semestre)")
+    parser.add_argument("--sin-compactar", action="store_true", help="No ejecuta VACUUM al terminar")
+    parser.add_argument("--listar", action="store_true", help="Muestra los lotes archivados")
+    args = parser.parse_args()
+
+    if args.listar:
+        for _, semestre, fecha, equipos, filas in lotes_archivados():
+            print(f"{semestre}: {equipos} equipos, {filas:,} filas ({fecha})")
+        return
+
+    antes = _tamano_mb()
+    inicio = time.perf_counter()
+    equipos, filas = archivar(args.semestre, args.todos, not args.sin_compactar)
+    if not equipos:
+        print("⚠️ No hay juegos terminados para archivar.")
+        return
+    print(f"✅ {equipos} equipos ({filas:,} filas) archivados en {RUTA_ARCHIVO} "
+          f"(semestre {args.semestre}) en {time.perf_counter() - inicio:.2f} s")
+    print(f"Base viva: {antes:.2f} MB -> {_tamano_mb():.2f} MB")
+
+
+if __name__ == "__main__":
+    main()
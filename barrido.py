@@ -0,0 +1,172 @@
+import argparse
+import itertools
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from motor import ROLES, DEMANDA_CLIENTE, simular, kpis_trayectoria
+from politicas import POLITICAS, crear_decisor
+
+# ========================
+# GRILLA
+# ========================
+# Parámetros por defecto de la grilla (producto cartesiano por política)
+GRILLA = {
+    "pasar_pedido": {},
+    "nivel_base": {"nivel_base": [20, 40, 60]},
+    "anclaje_ajuste": {
+        "nivel_base": [20, 40],
+        "alfa": [0.2, 0.5],
+        "beta": [0.0, 0.5, 1.0],
+        "theta": [0.3],
+    },
+}
+PARAMETROS = ["nivel_base", "alfa", "beta", "theta"]
+
+# Por defecto la fábrica produce lo que pide (regla de los juegos con
+# parámetros): con una producción fija la demanda del escalón no se puede
+# cubrir y el pedido de la fábrica no influye. --produccion fija un tope.
+PRODUCCION = None
+
+# Bloques en vuelo por proceso: uno calculándose y otro en cola
+TAREAS_POR_PROCESO = 2
+
+
+# ========================
+# ESCENARIOS DE DEMANDA
+# ========================
+def generar_demanda(escenario, semillas, semanas):
+    if escenario == "constante":
+        return np.full((len(semillas), semanas), DEMANDA_CLIENTE, dtype=np.int64)
+    if escenario == "escalon":
+        # Clásico de Sterman: la demanda se duplica en la semana 5
+        demanda = np.full((len(semillas), semanas), DEMANDA_CLIENTE, dtype=np.int64)
+        demanda[:, 4:] *= 2
+        return demanda
+    if escenario == "aleatoria":
+        return np.stack([np.random.default_rng(s).poisson(DEMANDA_CLIENTE, semanas) for s in semillas])
+    raise ValueError(f"Escenario desconocido: {escenario}")
+
+
+ESCENARIOS = ["constante", "escalon", "aleatoria"]
+
+
+# ========================
+# EJECUCIÓN
+# ========================
+def evaluar_bloque(politica, parametros, escenario, semillas, semanas, retraso,
+                   holding_cost, backorder_cost, produccion=PRODUCCION):
+    """Simula un bloque de juegos (una semilla por juego) y devuelve columnas.
+
+    Con `produccion=None` la fábrica produce lo que pide, como en los juegos
+    con parámetros; un número fija su producción semanal.
+    """
+    n = len(semillas)
+    demanda = generar_demanda(escenario, semillas, semanas)
+    historia = simular(n, semanas, crear_decisor(politica, n, **parametros),
+                       demanda=demanda, produccion=produccion, retraso=retraso)
+    kpis = kpis_trayectoria(historia, holding_cost, backorder_cost)
+
+    std_demanda = demanda.std(axis=1, ddof=1)
+    std_fabrica = kpis["std_pedidos"][:, -1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        bullwhip = np.where(std_demanda > 0, std_fabrica / std_demanda, np.nan)
+
+    columnas = {
+        "politica": [politica] * n,
+        "escenario": [escenario] * n,
+        "semilla": np.asarray(semillas, dtype=np.int32),
+    }
+    for nombre in PARAMETROS:
+        columnas[nombre] = np.full(n, parametros.get(nombre, np.nan), dtype=np.float32)
+    columnas["costo_total"] = kpis["costo_total"].sum(axis=1).astype(np.float32)
+    columnas["costo_inventario"] = kpis["costo_inventario"].sum(axis=1).astype(np.float32)
+    columnas["costo_faltantes"] = kpis["costo_faltantes"].sum(axis=1).astype(np.float32)
+    columnas["nivel_servicio"] = kpis["nivel_servicio"].mean(axis=1).astype(np.float32)
+    for i, rol in enumerate(ROLES):
+        columnas[f"std_{rol}"] = kpis["std_pedidos"][:, i].astype(np.float32)
+    columnas["bullwhip"] = bullwhip.astype(np.float32)
+    return columnas
+
+
+def construir_tareas(politicas, escenarios, n_semillas, tam_bloque):
+    for politica in politicas:
+        grilla = GRILLA[politica]
+        for valores in itertools.product(*grilla.values()):
+            parametros = dict(zip(grilla.keys(), valores))
+            for escenario in escenarios:
+                for inicio in range(0, n_semillas, tam_bloque):
+                    semillas = range(inicio, min(inicio + tam_bloque, n_semillas))
+                    yield politica, parametros, escenario, list(semillas)
+
+
+def ejecutar_barrido(salida, politicas=tuple(POLITICAS), escenarios=tuple(ESCENARIOS),
+                     n_semillas=1000, semanas=36, retraso=2, holding_cost=1, backorder_cost=2,
+                     procesos=None, tam_bloque=2000, produccion=PRODUCCION):
+    """Reparte la grilla en un pool de procesos y escribe un Parquet por lotes.
+
+    Solo hay TAREAS_POR_PROCESO bloques por proceso en vuelo: cada resultado se
+    escribe y se suelta, así la memoria no crece con la cantidad de juegos.
+    Devuelve el número de juegos simulados.
+    """
+    procesos = procesos or os.cpu_count()
+    tareas = construir_tareas(politicas, escenarios, n_semillas, tam_bloque)
+    total = 0
+    writer = None
+    try:
+        with ProcessPoolExecutor(max_workers=procesos) as pool:
+            pendientes = set()
+            while True:
+                for politica, parametros, escenario, semillas in itertools.islice(
+                        tareas, procesos * TAREAS_POR_PROCESO - len(pendientes)):
+                    pendientes.add(pool.submit(evaluar_bloque, politica, parametros, escenario, semillas,
+                                               semanas, retraso, holding_cost, backorder_cost, produccion))
+                if not pendientes:
+                    break
+                terminados, pendientes = wait(pendientes, return_when=FIRST_COMPLETED)
+                for futuro in terminados:
+                    lote = pa.table(futuro.result())
+                    if writer is None:
+                        writer = pq.ParquetWriter(salida, lote.schema, compression="zstd")
+                    writer.write_table(lote)
+                    total += lote.num_rows
+    finally:
+        if writer is not None:
+            writer.close()
+    return total
+
+
+# ========================
+# CLI
+# ========================
+def main():
+    parser = argparse.ArgumentParser(description="Barrido Monte Carlo de políticas del Beer Game")
+    parser.add_argument("--salida", default="barrido.parquet", help="Archivo Parquet de resultados")
+    parser.add_argument("--politicas", nargs="+", default=list(POLITICAS), choices=list(POLITICAS))
+    parser.add_argument("--escenarios", nargs="+", default=ESCENARIOS, choices=ESCENARIOS)
+    parser.add_argument("--semillas", type=int, default=1000, help="Juegos por combinación de la grilla")
+    parser.add_argument("--semanas", type=int, default=36)
+    parser.add_argument("--retraso", type=int, default=2, help="Semanas de tránsito de los envíos")
+    parser.add_argument("--holding-cost", type=float, default=1)
+    parser.add_argument("--backorder-cost", type=float, default=2)
+    parser.add_argument("--procesos", type=int, default=None, help="Por defecto, todos los núcleos")
+    parser.add_argument("--bloque", type=int, default=2000, help="Juegos por tarea del pool")
+    parser.add_argument("--produccion", type=int, default=PRODUCCION,
+                        help="Producción semanal fija de la fábrica; por defecto produce lo que pide")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    total = ejecutar_barrido(
+        args.salida, args.politicas, args.escenarios, args.semillas, args.semanas,
+        args.retraso, args.holding_cost, args.backorder_cost, args.procesos, args.bloque, args.produccion,
+    )
+    duracion = time.perf_counter() - inicio
+    print(f"✅ {total} juegos simulados en {duracion:.2f} s ({total / duracion:,.0f} juegos/s) -> {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
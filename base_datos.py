@@ -0,0 +1,579 @@
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, ExitStack
+from functools import lru_cache
+
+# ========================
+# CONFIGURACIÓN
+# ========================
+RUTA_DB = os.environ.get("BEER_GAME_DB", "beer_game.db")
+ALMACEN = os.environ.get("BEER_GAME_ALMACEN", "archivo")  # archivo | memoria | fragmentado
+FRAGMENTOS = int(os.environ.get("BEER_GAME_FRAGMENTOS", "4"))
+TAMANO_POOL = 8
+BUSY_TIMEOUT_MS = 5000
+REINTENTOS_BLOQUEO = 5
+
+
+# ========================
+# POOL DE CONEXIONES
+# ========================
+def abrir_conexion(ruta):
+    conn = sqlite3.connect(ruta, timeout=BUSY_TIMEOUT_MS / 1000, check_same_thread=False,
+                           uri=ruta.startswith("file:"))
+    # WAL: los lectores (dashboards) no bloquean al escritor (jugadores) ni viceversa
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+    return conn
+
+
+class PoolConexiones:
+    """Conexiones reutilizables a un archivo SQLite, compartidas por todo el proceso.
+
+    Cada conexión la usa un solo hilo a la vez: se toma del pool y se devuelve
+    al terminar. Como máximo hay `tamano` conexiones abiertas.
+    """
+
+    def __init__(self, ruta, tamano=TAMANO_POOL):
+        self.ruta = ruta
+        self._libres = queue.LifoQueue()
+        self._cupos = threading.BoundedSemaphore(tamano)
+
+    def tomar(self):
+        self._cupos.acquire()
+        try:
+            return self._libres.get_nowait()
+        except queue.Empty:
+            try:
+                return abrir_conexion(self.ruta)
+            except Exception:
+                self._cupos.release()
+                raise
+
+    def devolver(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+        self._libres.put(conn)
+        self._cupos.release()
+
+
+@lru_cache(maxsize=None)
+def obtener_pool(ruta):
+    pool = PoolConexiones(ruta)
+    # La primera conexión del proceso crea o actualiza el esquema si hace falta
+    conn = pool.tomar()
+    try:
+        migrar(conn, crear=True)
+    finally:
+        pool.devolver(conn)
+    return pool
+
+
+# ========================
+# ALMACENES
+# ========================
+# Dónde vive cada equipo. Todas las tablas de un equipo están en el mismo
+# archivo, así sus transacciones nunca cruzan archivos. Las tablas que no son
+# de un equipo (metrics, archive_batches) van en el archivo principal.
+class AlmacenArchivo:
+    """Un solo archivo SQLite para todos los equipos."""
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+
+    def rutas(self):
+        return [self.ruta]
+
+    def ruta_equipo(self, team_id):
+        return self.ruta
+
+
+class AlmacenMemoria(AlmacenArchivo):
+    """Base en memoria compartida por las conexiones del proceso, para pruebas.
+
+    Vive mientras el pool la tenga abierta. SQLite bloquea por tabla en caché
+    compartida, así que no sirve para escrituras concurrentes.
+    """
+
+    def __init__(self):
+        super().__init__(f"file:beer_game_{uuid.uuid4().hex}?mode=memory&cache=shared")
+
+
+class AlmacenFragmentado:
+    """N archivos (`beer_game.0.db`, ...); cada equipo va al crc32(team_id) % N.
+
+    SQLite admite un escritor por archivo: equipos en fragmentos distintos
+    escriben en paralelo.
+    """
+
+    def __init__(self, ruta, fragmentos):
+        raiz, extension = os.path.splitext(ruta)
+        self._rutas = [f"{raiz}.{i}{extension or '.db'}" for i in range(fragmentos)]
+
+    def rutas(self):
+        return list(self._rutas)
+
+    def ruta_equipo(self, team_id):
+        return self._rutas[zlib.crc32(team_id.encode()) % len(self._rutas)]
+
+
+@lru_cache(maxsize=None)
+def _almacen(tipo, ruta, fragmentos):
+    if tipo == "archivo":
+        return AlmacenArchivo(ruta)
+    if tipo == "memoria":
+        return AlmacenMemoria()
+    if tipo == "fragmentado":
+        return AlmacenFragmentado(ruta, fragmentos)
+    raise ValueError(f"Almacén desconocido: {tipo} (archivo, memoria o fragmentado)")
+
+
+def obtener_almacen():
+    # Se resuelve en cada llamada: la prueba de carga cambia RUTA_DB y ALMACEN
+    return _almacen(ALMACEN, RUTA_DB, FRAGMENTOS)
+
+
+def rutas_almacen():
+    return obtener_almacen().rutas()
+
+
+def ruta_equipo(team_id):
+    return obtener_almacen().ruta_equipo(team_id)
+
+
+def _resolver(ruta, team_id):
+    if ruta:
+        return ruta
+    if team_id:
+        return ruta_equipo(team_id)
+    return rutas_almacen()[0]
+
+
+@contextmanager
+def conectar_db(ruta=None, team_id=None):
+    """Presta una conexión del pool; confirma al salir o revierte si hay error.
+
+    Con `team_id` la conexión es al archivo del equipo; sin ruta ni equipo, al
+    archivo principal.
+    """
+    pool = obtener_pool(_resolver(ruta, team_id))
+    conn = pool.tomar()
+    try:
+        yield conn
+        if conn.in_transaction:
+            conn.commit()
+    finally:
+        pool.devolver(conn)
+
+
+# Reintentos por bloqueo en este proceso (lo lee la prueba de carga)
+_reintentos_bloqueo = 0
+_contador_lock = threading.Lock()
+
+
+def reintentos_por_bloqueo():
+    return _reintentos_bloqueo
+
+
+def _contar_reintento():
+    global _reintentos_bloqueo
+    with _contador_lock:
+        _reintentos_bloqueo += 1
+
+
+def _comenzar(conn, intento, reintentos):
+    """BEGIN IMMEDIATE; False si hay que reintentar porque la base sigue bloqueada."""
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        return True
+    except sqlite3.OperationalError as error:
+        if "locked" not in str(error) or intento == reintentos:
+            raise
+        _contar_reintento()
+        time.sleep(0.05 * 2 ** intento)
+        return False
+
+
+def ejecutar_transaccion(funcion, *args, ruta=None, team_id=None, reintentos=REINTENTOS_BLOQUEO):
+    """Ejecuta `funcion(conn, *args)` dentro de BEGIN IMMEDIATE y confirma.
+
+    Se toma el bloqueo de escritura desde el inicio, así lo que la función lee
+    sigue siendo válido cuando escribe. Si la base sigue bloqueada después de
+    busy_timeout se reintenta con espera creciente, por lo que `funcion` debe
+    ser idempotente. Con `team_id` se bloquea solo el archivo del equipo.
+    """
+    for intento in range(reintentos + 1):
+        with conectar_db(ruta, team_id) as conn:
+            if _comenzar(conn, intento, reintentos):
+                return funcion(conn, *args)
+
+
+def ejecutar_en_todos(funcion, *args, reintentos=REINTENTOS_BLOQUEO):
+    """Como ejecutar_transaccion, pero con `funcion(conexiones, *args)` sobre todos los archivos.
+
+    `conexiones` es {ruta: conn}. Los bloqueos se toman siempre en el mismo
+    orden (no hay interbloqueos) y se confirma archivo por archivo. Es para
+    operaciones del profesor que cruzan equipos, como importar un plantel.
+    """
+    for intento in range(reintentos + 1):
+        with ExitStack() as pila:
+            conexiones = {ruta: pila.enter_context(conectar_db(ruta)) for ruta in rutas_almacen()}
+            if all(_comenzar(conn, intento, reintentos) for conn in conexiones.values()):
+                return funcion(conexiones, *args)
+            for conn in conexiones.values():
+                if conn.in_transaction:
+                    conn.rollback()
+
+
+def leer_en_todos(funcion, *args):
+    """Lista con `funcion(conn, *args)` de cada archivo, leídos en paralelo."""
+    rutas = rutas_almacen()
+
+    def leer(ruta):
+        with conectar_db(ruta) as conn:
+            return funcion(conn, *args)
+
+    if len(rutas) == 1:
+        return [leer(rutas[0])]
+    with ThreadPoolExecutor(max_workers=len(rutas)) as hilos:
+        return list(hilos.map(leer, rutas))
+
+
+def repartir(origen):
+    """Copia un archivo único (ya migrado) a los archivos del almacén actual.
+
+    Cada fila de una tabla con team_id va al archivo de su equipo; las demás
+    tablas, al archivo principal. Devuelve las filas copiadas por archivo.
+    """
+    obtener_pool(origen)  # el origen queda en la última versión del esquema
+    rutas = rutas_almacen()
+    copiadas = {}
+    for ruta in rutas:
+        with conectar_db(ruta) as conn:
+            conn.create_function("ruta_equipo", 1, ruta_equipo, deterministic=True)
+            conn.execute("ATTACH DATABASE ? AS origen", (origen,))
+            try:
+                tablas = [fila[0] for fila in conn.execute("""
+                    SELECT name FROM origen.sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'
+                """)]
+                copiadas[ruta] = 0
+                for tabla in tablas:
+                    columnas = [fila[1] for fila in conn.execute(f"PRAGMA main.table_info({tabla})")]
+                    if "team_id" in columnas:
+                        filtro = "WHERE ruta_equipo(team_id) = ?"
+                        params = (ruta,)
+                    elif ruta == rutas[0]:
+                        filtro, params = "", ()
+                    else:
+                        continue
+                    lista = ", ".join(columnas)
+                    copiadas[ruta] += conn.execute(f"""
+                        INSERT OR IGNORE INTO main.{tabla} ({lista}) SELECT {lista} FROM origen.{tabla} {filtro}
+                    """, params).rowcount
+                conn.commit()
+            finally:
+                if conn.in_transaction:
+                    conn.rollback()
+                conn.execute("DETACH DATABASE origen")
+    return copiadas
+
+
+# ========================
+# MIGRACIONES DE ESQUEMA
+# ========================
+# Cada migración lleva el esquema de la versión N-1 a la N (PRAGMA user_version).
+# Solo se agregan al final: nunca se editan las ya publicadas.
+def _migracion_1(conn):
+    columnas = {fila[1] for fila in conn.execute("PRAGMA table_info(teams)")}
+    if "team_password" not in columnas:
+        conn.execute("ALTER TABLE teams ADD COLUMN team_password TEXT")
+
+    # Antes había dos filas por rol y semana (la del avance y la de la decisión);
+    # la última ya contiene el mismo estado más la decisión.
+    conn.execute("""
+        DELETE FROM rounds
+        WHERE round_id NOT IN (
+            SELECT MAX(round_id) FROM rounds GROUP BY team_id, week, role
+        )
+    """)
+    conn.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS ux_rounds_team_week_role
+        ON rounds (team_id, week, role)
+    """)
+    # Cubre obtener_estado_actual sin leer la tabla
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS ix_rounds_team_role_week
+        ON rounds (team_id, role, week, stock, backorder, incoming_order, incoming_shipment)
+    """)
+
+
+def _migracion_2(conn):
+    # Distingue las filas creadas por el avance de semana de las ya decididas
+    conn.execute("ALTER TABLE rounds ADD COLUMN decided INTEGER NOT NULL DEFAULT 0")
+    conn.execute("""
+        UPDATE rounds SET decided = 1
+        WHERE placed_order != 0 OR sent_shipment != 0
+           OR week < (SELECT MAX(r.week) FROM rounds r WHERE r.team_id = rounds.team_id)
+    """)
+
+
+def _migracion_3(conn):
+    # Acumulados por equipo y rol de las semanas cerradas (ver estadisticas.py)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS team_role_stats (
+            team_id TEXT,
+            role TEXT,
+            weeks INTEGER NOT NULL,
+            last_week INTEGER NOT NULL,
+            stock_sum INTEGER NOT NULL,
+            backorder_sum INTEGER NOT NULL,
+            holding_cost REAL NOT NULL,
+            backorder_cost REAL NOT NULL,
+            incoming_orders INTEGER NOT NULL,
+            served_orders INTEGER NOT NULL,
+            order_mean REAL NOT NULL,
+            order_m2 REAL NOT NULL,
+            PRIMARY KEY (team_id, role),
+            FOREIGN KEY (team_id) REFERENCES teams(team_id)
+        )
+    """)
+    # Costos del equipo en game_parameters; sin fila, los del juego clásico
+    # (motor.COSTO_INVENTARIO = 1 y motor.COSTO_FALTANTE = 2), como en
+    # estadisticas.calcular_desde_rounds
+    conn.execute("""
+        UPDATE rounds SET total_cost =
+            stock * COALESCE((SELECT g.holding_cost FROM game_parameters g WHERE g.team_id = rounds.team_id), 1)
+            + backorder * COALESCE((SELECT g.backorder_cost FROM game_parameters g WHERE g.team_id = rounds.team_id), 2)
+        WHERE week < (SELECT MAX(r.week) FROM rounds r WHERE r.team_id = rounds.team_id)
+    """)
+    conn.execute("""
+        INSERT INTO team_role_stats
+        SELECT r.team_id, r.role, COUNT(*), MAX(r.week),
+               SUM(r.stock), SUM(r.backorder),
+               SUM(r.stock * COALESCE(g.holding_cost, 1)), SUM(r.backorder * COALESCE(g.backorder_cost, 2)),
+               SUM(r.incoming_order), SUM(MAX(r.incoming_order - r.backorder, 0)),
+               AVG(r.placed_order),
+               SUM(r.placed_order * r.placed_order) - 1.0 * SUM(r.placed_order) * SUM(r.placed_order) / COUNT(*)
+        FROM rounds r
+        JOIN (SELECT team_id, MAX(week) AS ultima FROM rounds GROUP BY team_id) u
+          ON u.team_id = r.team_id AND r.week < u.ultima
+        LEFT JOIN game_parameters g ON g.team_id = r.team_id
+        GROUP BY r.team_id, r.role
+    """)
+
+
+def _migracion_4(conn):
+    # Semana en curso por equipo: una fila que el vigilante de notificaciones relee
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS team_progress (
+            team_id TEXT PRIMARY KEY,
+            week INTEGER NOT NULL,
+            FOREIGN KEY (team_id) REFERENCES teams(team_id)
+        )
+    """)
+    conn.execute("""
+        INSERT OR REPLACE INTO team_progress (team_id, week)
+        SELECT team_id, MAX(week) FROM rounds GROUP BY team_id
+    """)
+
+
+def _migracion_5(conn):
+    # Bots que juegan los roles sin alumno, con la memoria de su política
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS bots (
+            team_id TEXT,
+            role TEXT,
+            policy TEXT NOT NULL,
+            parameters TEXT NOT NULL DEFAULT '{}',
+            forecast REAL NOT NULL DEFAULT 15,
+            supply_line INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (team_id, role),
+            FOREIGN KEY (team_id) REFERENCES teams(team_id)
+        )
+    """)
+
+
+def _migracion_6(conn):
+    # Envíos y pedidos en tránsito de cada equipo: anillos int64 de largo
+    # lead_time (4 roles) y delay_time (3 roles), guardados como bytes
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS pipelines (
+            team_id TEXT PRIMARY KEY,
+            shipments BLOB NOT NULL,
+            orders BLOB NOT NULL,
+            FOREIGN KEY (team_id) REFERENCES teams(team_id)
+        )
+    """)
+
+
+def _migracion_7(conn):
+    # Registro de decisiones solo de agregado: rounds pasa a ser una proyección
+    # que se puede reconstruir reproduciendo los eventos
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS decision_events (
+            event_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            team_id TEXT NOT NULL,
+            week INTEGER NOT NULL,
+            role TEXT NOT NULL,
+            placed_order INTEGER NOT NULL,
+            sent_shipment INTEGER NOT NULL,
+            recorded_at TEXT,
+            FOREIGN KEY (team_id) REFERENCES teams(team_id)
+        )
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS ix_decision_events_team_week
+        ON decision_events (team_id, week, role, event_id)
+    """)
+    conn.execute("""
+        INSERT INTO decision_events (team_id, week, role, placed_order, sent_shipment)
+        SELECT team_id, week, role, placed_order, sent_shipment
+        FROM rounds
+        WHERE decided = 1
+        ORDER BY team_id, week, role
+    """)
+    # Estado al inicio de ciertas semanas: 4 x 4 int64 (stock, backorder,
+    # pedido y envío recibidos) más los anillos en tránsito
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS snapshots (
+            team_id TEXT,
+            week INTEGER,
+            state BLOB NOT NULL,
+            shipments BLOB NOT NULL,
+            orders BLOB NOT NULL,
+            PRIMARY KEY (team_id, week),
+            FOREIGN KEY (team_id) REFERENCES teams(team_id)
+        )
+    """)
+
+
+def _migracion_8(conn):
+    # Métricas de latencia acumuladas por proceso (ver metricas.py); `buckets`
+    # es la lista JSON de conteos por cubeta de LIMITES_MS más +Inf
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS metrics (
+            process TEXT,
+            operation TEXT,
+            recorded_at TEXT,
+            count INTEGER NOT NULL,
+            errors INTEGER NOT NULL,
+            sum_ms REAL NOT NULL,
+            buckets TEXT NOT NULL,
+            PRIMARY KEY (process, operation)
+        )
+    """)
+
+
+def _migracion_9(conn):
+    # Lotes archivados (ver archivo.py): solo los archivos Parquet de un lote
+    # registrado aquí forman parte del archivo histórico
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS archive_batches (
+            batch_id TEXT PRIMARY KEY,
+            semester TEXT NOT NULL,
+            archived_at TEXT NOT NULL,
+            teams INTEGER NOT NULL,
+            rows INTEGER NOT NULL
+        )
+    """)
+
+
+def _migracion_10(conn):
+    # Los envíos y pedidos en tránsito salen del último snapshot más los eventos
+    # posteriores (eventos.estado_en_semana): pipelines ya no se lee ni escribe
+    conn.execute("DROP TABLE IF EXISTS pipelines")
+
+
+MIGRACIONES = [
+    _migracion_1, _migracion_2, _migracion_3, _migracion_4,
+    _migracion_5, _migracion_6, _migracion_7, _migracion_8,
+    _migracion_9, _migracion_10,
+]
+
+
+def _crear_tablas_base(conn):
+    # Esquema original, anterior a las migraciones
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS teams (
+            team_id TEXT PRIMARY KEY,
+            team_name TEXT,
+            creation_date TEXT
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS players (
+            player_id TEXT PRIMARY KEY,
+            team_id TEXT,
+            name TEXT,
+            role TEXT,
+            email TEXT,
+            FOREIGN KEY (team_id) REFERENCES teams(team_id)
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS game_parameters (
+            team_id TEXT PRIMARY KEY,
+            initial_stock INTEGER,
+            lead_time INTEGER,
+            delay_time INTEGER,
+            holding_cost REAL,
+            backorder_cost REAL,
+            weeks_total INTEGER,
+            FOREIGN KEY (team_id) REFERENCES teams(team_id)
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS rounds (
+            round_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            team_id TEXT,
+            week INTEGER,
+            role TEXT,
+            stock INTEGER,
+            backorder INTEGER,
+            incoming_order INTEGER,
+            incoming_shipment INTEGER,
+            placed_order INTEGER,
+            sent_shipment INTEGER,
+            total_cost REAL,
+            FOREIGN KEY (team_id) REFERENCES teams(team_id)
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS demands (
+            team_id TEXT,
+            week INTEGER,
+            demand INTEGER,
+            PRIMARY KEY (team_id, week),
+            FOREIGN KEY (team_id) REFERENCES teams(team_id)
+        )
+    """)
+
+
+def migrar(conn, crear=False):
+    """Aplica las migraciones pendientes en una sola transacción.
+
+    Con `crear`, un archivo vacío recibe primero las tablas base.
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        existe = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'rounds'"
+        ).fetchone()
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if not existe and crear:
+            _crear_tablas_base(conn)
+            existe = True
+        if existe:
+            for numero, migracion in enumerate(MIGRACIONES[version:], start=version + 1):
+                migracion(conn)
+                conn.execute(f"PRAGMA user_version = {numero}")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
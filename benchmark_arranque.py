@@ -0,0 +1,112 @@
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+# ========================
+# BENCHMARK DE ARRANQUE
+# ========================
+# Mide, cada página en un proceso nuevo: el primer render (incluye importar sus
+# dependencias), un rerun ya en caliente y qué módulos pesados quedaron
+# cargados. También mide cuánto tarda el servidor multipágina en responder.
+# Usa una copia de la base para no tocar la real.
+PAGINAS = ["principal.py", "app.py", "juego.py", "resultados.py", "modo_profesor.py", "monitoreo.py"]
+MODULOS_PESADOS = ["pandas", "matplotlib", "pyarrow", "xlsxwriter"]
+
+
+def medir_pagina(pagina):
+    """Se ejecuta en un proceso nuevo; devuelve los tiempos en ms."""
+    inicio = time.perf_counter()
+    from streamlit.testing.v1 import AppTest
+    streamlit_ms = (time.perf_counter() - inicio) * 1000
+
+    app = AppTest.from_file(pagina, default_timeout=120)
+    inicio = time.perf_counter()
+    app.run()
+    primer_render_ms = (time.perf_counter() - inicio) * 1000
+    inicio = time.perf_counter()
+    app.run()
+    rerun_ms = (time.perf_counter() - inicio) * 1000
+    return {
+        "pagina": pagina,
+        "streamlit_ms": streamlit_ms,
+        "primer_render_ms": primer_render_ms,
+        "rerun_ms": rerun_ms,
+        "pesados": [m for m in MODULOS_PESADOS if m in sys.modules],
+        "errores": [str(e.value) for e in app.exception],
+    }
+
+
+def _puerto_libre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def medir_servidor(entrada, entorno, espera_max=120):
+    """Segundos desde lanzar `streamlit run` hasta que /_stcore/health responde."""
+    puerto = _puerto_libre()
+    inicio = time.perf_counter()
+    proceso = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", entrada, "--server.headless", "true",
+         "--server.port", str(puerto), "--browser.gatherUsageStats", "false"],
+        env=entorno, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - inicio < espera_max:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{puerto}/_stcore/health", timeout=1) as respuesta:
+                    if respuesta.status == 200:
+                        return (time.perf_counter() - inicio) * 1000
+            except OSError:
+                time.sleep(0.05)
+        return None
+    finally:
+        proceso.terminate()
+        proceso.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mide el arranque en frío y el primer render de cada página")
+    parser.add_argument("--origen", default=os.environ.get("BEER_GAME_DB", "beer_game.db"))
+    parser.add_argument("--paginas", nargs="+", default=PAGINAS)
+    parser.add_argument("--sin-servidor", action="store_true", help="No medir el arranque del servidor")
+    parser.add_argument("--medir-pagina", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.medir_pagina:
+        print(json.dumps(medir_pagina(args.medir_pagina)))
+        return
+
+    from prueba_carga import copiar_base
+
+    directorio = os.path.dirname(os.path.abspath(__file__))
+    with tempfile.TemporaryDirectory(prefix="beer_game_arranque_") as temporal:
+        copia = os.path.join(temporal, "arranque.db")
+        copiar_base(args.origen, copia)
+        entorno = {**os.environ, "BEER_GAME_DB": copia}
+
+        print(f"{'Página':<18}{'streamlit':>11}{'1er render':>12}{'rerun':>9}  Módulos pesados")
+        for pagina in args.paginas:
+            salida = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--medir-pagina", pagina],
+                env=entorno, cwd=directorio, capture_output=True, text=True, check=True,
+            )
+            r = json.loads(salida.stdout.strip().splitlines()[-1])
+            print(f"{pagina:<18}{r['streamlit_ms']:>9.0f}ms{r['primer_render_ms']:>10.0f}ms{r['rerun_ms']:>7.0f}ms  "
+                  f"{', '.join(r['pesados']) or '-'}")
+            for error in r["errores"]:
+                print(f"  ❌ {error}")
+
+        if not args.sin_servidor:
+            ms = medir_servidor(os.path.join(directorio, "principal.py"), entorno)
+            print(f"Servidor multipágina listo en {ms:.0f} ms" if ms else "⚠️ El servidor no respondió a tiempo")
+
+
+if __name__ == "__main__":
+    main()
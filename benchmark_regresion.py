@@ -0,0 +1,533 @@
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import zipfile
+
+# ========================
+# BENCHMARK DE REGRESIÓN
+# ========================
+# Arma bases sintéticas de 10, 100 y 1000 equipos con 52 semanas jugadas,
+# registradas con partida.registrar_en_transaccion como en el juego, y mide las rutas
+# críticas: avance de semana, estado del jugador, resultados de un equipo,
+# resumen del profesor y exportación a Excel. Cada tamaño corre en un proceso
+# nuevo, así las cachés del proceso (parámetros, plantel, óptimos) empiezan
+# vacías. Antes de medir se verifica que lo incremental coincide con
+# recalcularlo desde cero, y que el motor, el avance en vivo y los KPIs dan lo
+# mismo que copias del código original (ver REFERENCIA). Los tiempos se
+# comparan con la línea base guardada en un JSON y la ejecución falla si
+# alguno empeora más que la tolerancia.
+TAMANOS = [10, 100, 1000]
+SEMANAS = 52
+SEMANAS_EXTRA = 8    # weeks_total = SEMANAS + SEMANAS_EXTRA: quedan semanas para medir el avance
+MUESTRA = 50         # Equipos por medición en las operaciones de un equipo
+REPETICIONES = 5
+REPETICIONES_EXPORTACION = 3
+TOLERANCIA = 20      # % de empeoramiento permitido respecto de la línea base
+RUTA_BASE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_base.json")
+OPERACIONES = ["avance_semana", "estado_jugador", "resultados_equipo", "resumen_profesor", "exportar_excel"]
+
+
+# ========================
+# BASE SINTÉTICA
+# ========================
+def _estado_semana(conn, team_id, semana):
+    return {rol: tuple(fila) for rol, *fila in conn.execute("""
+        SELECT role, stock, backorder, incoming_order, incoming_shipment
+        FROM rounds
+        WHERE team_id = ? AND week = ?
+    """, (team_id, semana))}
+
+
+def _jugar_semanas(conn, team_id, semanas, azar):
+    """Juega `semanas` semanas del equipo con decisiones al azar, como prueba_carga.jugar."""
+    from motor import ROLES, STOCK_INICIAL
+    from partida import registrar_en_transaccion, semana_actual
+
+    semana = semana_actual(conn, team_id)
+    for semana in range(semana, semana + semanas):
+        filas = _estado_semana(conn, team_id, semana)
+        for rol in ROLES:
+            stock, backorder, pedido_recibido, envio_recibido = filas.get(rol, (STOCK_INICIAL, 0, 0, 0))
+            registrar_en_transaccion(conn, team_id, rol, semana, stock, backorder, pedido_recibido, envio_recibido,
+                                     azar.randint(0, 30), min(stock, backorder + pedido_recibido))
+
+
+def construir_base(n_equipos, semilla):
+    """Crea `n_equipos` en el almacén configurado y juega SEMANAS semanas de cada uno."""
+    from base_datos import ejecutar_transaccion
+    from motor import COSTO_FALTANTE, COSTO_INVENTARIO, DEMANDA_CLIENTE, STOCK_INICIAL
+    from parametros import guardar_parametros
+    from prueba_carga import crear_equipos
+
+    equipos = crear_equipos(n_equipos, prefijo="Sintético")
+    semanas_total = SEMANAS + SEMANAS_EXTRA
+    # Escalón clásico: la demanda se duplica en la semana 5
+    demanda = [DEMANDA_CLIENTE] * 4 + [2 * DEMANDA_CLIENTE] * (semanas_total - 4)
+    for team_id in equipos:
+        guardar_parametros(team_id, STOCK_INICIAL, 2, 2, COSTO_INVENTARIO, COSTO_FALTANTE, semanas_total, demanda)
+    for i, team_id in enumerate(equipos):
+        ejecutar_transaccion(_jugar_semanas, team_id, SEMANAS, random.Random(f"{semilla}-{i}"), team_id=team_id)
+    return equipos
+
+
+# ========================
+# REFERENCIA: CÓDIGO ANTERIOR
+# ========================
+# Copias del juego original sin SQLite ni Streamlit: el bucle por rol de
+# juego.procesar_avance_semana y los KPIs de resultados.py y modo_profesor.py.
+# Solo conocen las reglas clásicas (sin retrasos, demanda y producción
+# constantes, costos 1 y 2). La verificación compara contra ellas el motor, el
+# avance en vivo y los indicadores.
+DEMANDA_ORIGINAL = 15
+PRODUCCION_ORIGINAL = 20
+CASOS_MOTOR = 2000
+EQUIPOS_CLASICOS = 3   # Equipos con reglas clásicas jugados en vivo y descartados
+
+
+def _avance_original(decisiones):
+    """{rol: (pedido, envío, stock, backorder)} -> {rol: (stock, backorder, pedido recibido, envío recibido)}."""
+    roles = ["Retailer", "Distributor", "Wholesaler", "Factory"]
+    nuevas = {}
+    for i, rol in enumerate(roles):
+        envio_recibido = 0
+        if i < len(roles) - 1:
+            proveedor = roles[i + 1]
+            envio_recibido = decisiones[proveedor][1]
+        else:
+            envio_recibido = PRODUCCION_ORIGINAL  # Producción constante de fábrica
+
+        pedido_recibido = 0
+        if i > 0:
+            cliente = roles[i - 1]
+            pedido_recibido = decisiones[cliente][0]
+        else:
+            pedido_recibido = DEMANDA_ORIGINAL  # Demanda del cliente final
+
+        stock_anterior = decisiones[rol][2]
+        backorder_anterior = decisiones[rol][3]
+        nuevo_stock = stock_anterior + envio_recibido - decisiones[rol][1]
+        nuevo_backorder = max(0, backorder_anterior + pedido_recibido - (stock_anterior + envio_recibido))
+        nuevas[rol] = (max(0, nuevo_stock), nuevo_backorder, pedido_recibido, envio_recibido)
+    return nuevas
+
+
+def _kpis_originales(df, holding_cost=1, backorder_cost=2):
+    """calcular_kpis de resultados.py: KPIs de un rol desde sus filas de rounds."""
+    df["inventory_cost"] = df["stock"] * holding_cost
+    df["backorder_cost"] = df["backorder"] * backorder_cost
+    df["total_cost"] = df["inventory_cost"] + df["backorder_cost"]
+
+    pedidos = df["incoming_order"].sum()
+    pedidos_atendidos = (df["incoming_order"] - df["backorder"]).clip(lower=0).sum()
+    nivel_servicio = (pedidos_atendidos / pedidos * 100) if pedidos > 0 else 100
+
+    return {
+        "Costo Total": round(df["total_cost"].sum(), 2),
+        "Costo Inventario": round(df["inventory_cost"].sum(), 2),
+        "Costo Faltantes": round(df["backorder_cost"].sum(), 2),
+        "Stock Promedio": round(df["stock"].mean(), 2),
+        "Backorder Promedio": round(df["backorder"].mean(), 2),
+        "Nivel de Servicio (%)": round(nivel_servicio, 2)
+    }
+
+
+def _kpis_equipo_originales(df):
+    """calcular_kpis_equipo de modo_profesor.py: costo y servicio desde las filas del equipo."""
+    holding_cost, backorder_cost = 1, 2
+    df["inventory_cost"] = df["stock"] * holding_cost
+    df["backorder_cost"] = df["backorder"] * backorder_cost
+    df["total_cost"] = df["inventory_cost"] + df["backorder_cost"]
+
+    pedidos = df["incoming_order"].sum()
+    atendidos = (df["incoming_order"] - df["backorder"]).clip(lower=0).sum()
+    nivel_servicio = (atendidos / pedidos * 100) if pedidos > 0 else 100
+
+    return {
+        "Costo Total": round(df["total_cost"].sum(), 2),
+        "Nivel Servicio (%)": round(nivel_servicio, 2)
+    }
+
+
+# ========================
+# VERIFICACIÓN
+# ========================
+def verificar_motor(casos, semilla):
+    """Avanza `casos` estados al azar con motor.avanzar_semana y con el bucle original; cuenta diferencias."""
+    import numpy as np
+
+    from motor import ROLES, avanzar_semana
+
+    azar = np.random.default_rng(semilla)
+    # Envíos por encima del stock incluidos: ambos lo recortan a 0
+    stock, backorder, pedidos, envios = (azar.integers(0, 40, (casos, len(ROLES))) for _ in range(4))
+    resultado = avanzar_semana(stock, backorder, pedidos, envios, DEMANDA_ORIGINAL, PRODUCCION_ORIGINAL)
+    obtenido = np.stack([resultado.stock, resultado.backorder,
+                         resultado.pedido_recibido, resultado.envio_recibido], axis=2)
+    diferencias = 0
+    for k in range(casos):
+        esperado = _avance_original({
+            rol: (int(pedidos[k, i]), int(envios[k, i]), int(stock[k, i]), int(backorder[k, i]))
+            for i, rol in enumerate(ROLES)
+        })
+        diferencias += sum(tuple(obtenido[k, i]) != esperado[rol] for i, rol in enumerate(ROLES))
+    return diferencias
+
+
+def _verificar_archivo(conn):
+    """Recalcula desde cero en una transacción que se descarta; devuelve las diferencias."""
+    from estadisticas import reconstruir_estadisticas
+    from eventos import reconstruir_equipo
+
+    estadisticas = len(reconstruir_estadisticas(conn))
+    # rounds reproducido desde decision_events con motor.avanzar_semana
+    equipos = [fila[0] for fila in conn.execute("SELECT team_id FROM teams")]
+    filas = sum(reconstruir_equipo(conn, team_id) for team_id in equipos)
+    conn.rollback()
+    return estadisticas, filas
+
+
+def _leer_rounds(conn):
+    import pandas as pd
+
+    return pd.read_sql_query("""
+        SELECT team_id, role, stock, backorder, incoming_order, placed_order FROM rounds
+    """, conn)
+
+
+def _resumen_desde_rounds():
+    """Lo mismo que estadisticas.leer_resumen, agregando todo `rounds` con pandas."""
+    import pandas as pd
+
+    from base_datos import leer_en_todos
+    from motor import COSTO_FALTANTE, COSTO_INVENTARIO
+
+    df = pd.concat(leer_en_todos(_leer_rounds), ignore_index=True)
+    df["atendidos"] = (df["incoming_order"] - df["backorder"]).clip(lower=0)
+    resumen = df.groupby(["team_id", "role"]).agg(
+        semanas=("stock", "count"), stock=("stock", "sum"), backorder=("backorder", "sum"),
+        pedidos=("incoming_order", "sum"), atendidos=("atendidos", "sum"), std_pedidos=("placed_order", "std"),
+    )
+    resumen["costo_inventario"] = resumen["stock"] * COSTO_INVENTARIO
+    resumen["costo_faltantes"] = resumen["backorder"] * COSTO_FALTANTE
+    return resumen
+
+
+def _verificar_avance_clasico(conn, team_id, semanas, azar):
+    """Juega un equipo sin parámetros por la ruta en vivo y compara cada avance con el bucle original.
+
+    La transacción se descarta: el equipo no queda en la base.
+    """
+    from parametros import invalidar_parametros
+
+    _jugar_semanas(conn, team_id, semanas, azar)
+    filas = {}
+    for semana, rol, *valores in conn.execute("""
+        SELECT week, role, placed_order, sent_shipment, stock, backorder, incoming_order, incoming_shipment
+        FROM rounds WHERE team_id = ?
+    """, (team_id,)):
+        filas.setdefault(semana, {})[rol] = tuple(valores)
+    conn.rollback()
+    invalidar_parametros(team_id)
+
+    diferencias = 0
+    for semana in range(1, semanas + 1):
+        esperado = _avance_original({rol: valores[:4] for rol, valores in filas[semana].items()})
+        siguiente = filas.get(semana + 1, {})
+        diferencias += sum(siguiente.get(rol, (None,) * 6)[2:] != esperado[rol] for rol in esperado)
+    return diferencias
+
+
+def _leer_filas_originales(team_id):
+    """Las consultas del código original: por rol (resultados.py) y por equipo (modo_profesor.py)."""
+    import pandas as pd
+
+    from base_datos import conectar_db
+    from motor import ROLES
+
+    with conectar_db(team_id=team_id) as conn:
+        por_rol = {rol: pd.read_sql_query("""
+            SELECT week, stock, backorder, incoming_order, incoming_shipment,
+                   placed_order, sent_shipment
+            FROM rounds
+            WHERE team_id = ? AND role = ?
+            ORDER BY week
+        """, conn, params=(team_id, rol)) for rol in ROLES}
+        equipo = pd.read_sql_query("""
+            SELECT week, role, stock, backorder, incoming_order, placed_order
+            FROM rounds
+            WHERE team_id = ?
+        """, conn, params=(team_id,))
+    return por_rol, equipo
+
+
+def verificar_indicadores(equipos, resumen, kpis):
+    """Compara datos, KPIs por rol, STD y KPIs del profesor con los cálculos originales.
+
+    Devuelve (diferencias en datos por rol, en KPIs por rol, en KPIs por equipo).
+    """
+    import numpy as np
+
+    from indicadores import calcular_kpis, obtener_datos_equipo
+
+    resumen = resumen.set_index(["team_id", "role"])
+    kpis = kpis.set_index("team_id")
+    datos = por_rol = por_equipo = 0
+    for team_id in equipos:
+        filas_rol, filas_equipo = _leer_filas_originales(team_id)
+        df_equipo = obtener_datos_equipo(team_id)
+        for rol, df in filas_rol.items():
+            nuevo = df_equipo[df_equipo["role"] == rol].drop(columns="role").reset_index(drop=True)
+            datos += int((nuevo[df.columns].to_numpy() != df.to_numpy()).sum()) if nuevo.shape == df.shape else 1
+            esperado = _kpis_originales(df)
+            esperado["std_pedidos"] = df["placed_order"].std()
+            obtenido = calcular_kpis(resumen.loc[(team_id, rol)])
+            obtenido["std_pedidos"] = resumen.loc[(team_id, rol), "std_pedidos"]
+            por_rol += sum(not np.isclose(obtenido[k], v, equal_nan=True) for k, v in esperado.items())
+        esperado = _kpis_equipo_originales(filas_equipo)
+        por_equipo += sum(not np.isclose(kpis.loc[team_id, k], v) for k, v in esperado.items())
+    return datos, por_rol, por_equipo
+
+
+def verificar(equipos, directorio):
+    """Cuenta diferencias entre las rutas optimizadas y su cálculo de referencia."""
+    import numpy as np
+
+    from base_datos import ejecutar_transaccion, rutas_almacen
+    from estadisticas import leer_resumen, std_pedidos
+    from exportacion import exportar_historial_excel
+    from indicadores import calcular_kpis_equipos
+
+    partes = [ejecutar_transaccion(_verificar_archivo, ruta=ruta) for ruta in rutas_almacen()]
+
+    # Resumen incremental (team_role_stats + semana en curso) contra agregar rounds
+    resumen = leer_resumen()
+    resumen["std_pedidos"] = std_pedidos(resumen)
+    esperado = _resumen_desde_rounds()
+    obtenido = resumen.set_index(["team_id", "role"]).reindex(esperado.index)
+    resumen_distinto = sum(
+        int((~np.isclose(obtenido[c].astype(float), esperado[c].astype(float), equal_nan=True)).sum())
+        for c in esperado.columns
+    )
+
+    # Avance en vivo (partida._avanzar) de equipos con reglas clásicas contra el bucle original
+    avance = sum(
+        ejecutar_transaccion(_verificar_avance_clasico, team_id, SEMANAS, random.Random(team_id), team_id=team_id)
+        for team_id in (f"clasico-{i}" for i in range(EQUIPOS_CLASICOS))
+    )
+
+    # Datos y KPIs contra las consultas y la aritmética originales
+    kpis, _ = calcular_kpis_equipos(resumen)
+    datos, kpis_rol, kpis_equipo = verificar_indicadores(equipos, resumen, kpis)
+
+    # Excel: la hoja de resumen más una por equipo
+    ruta = os.path.join(directorio, "verificacion.xlsx")
+    exportar_historial_excel(ruta, kpis)
+    with zipfile.ZipFile(ruta) as libro:
+        hojas = sum(nombre.startswith("xl/worksheets/sheet") for nombre in libro.namelist())
+
+    return {
+        "motor": verificar_motor(CASOS_MOTOR, len(equipos)),
+        "avance_en_vivo": avance,
+        "datos_por_rol": datos,
+        "kpis_por_rol": kpis_rol,
+        "kpis_por_equipo": kpis_equipo,
+        "estadisticas": sum(e for e, _ in partes),
+        "rounds": sum(f for _, f in partes),
+        "resumen": resumen_distinto,
+        "hojas_excel": abs(hojas - (len(equipos) + 1)),
+    }
+
+
+# ========================
+# MEDICIONES
+# ========================
+def cronometrar(funcion, repeticiones, unidades=1, calentar=True):
+    """Mejor tiempo (ms por unidad) de `repeticiones` corridas, tras una de calentamiento."""
+    if calentar:
+        funcion()
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return min(tiempos) * 1000 / unidades
+
+
+def medir_tamano(n_equipos, repeticiones, semilla, directorio):
+    """Se ejecuta en un proceso nuevo con el almacén apuntando a `directorio`."""
+    from estadisticas import leer_resumen, std_pedidos
+    from exportacion import exportar_historial_excel
+    from indicadores import calcular_kpis, calcular_kpis_equipos, obtener_datos_equipo
+    from motor import ROLES
+    from partida import obtener_estado_actual, obtener_semana_actual, registrar_decision
+
+    inicio = time.perf_counter()
+    equipos = construir_base(n_equipos, semilla)
+    construccion = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    diferencias = verificar(equipos, directorio)
+    verificacion = time.perf_counter() - inicio
+
+    muestra = random.Random(semilla).sample(equipos, min(MUESTRA, len(equipos)))
+
+    def estado_jugador():
+        # Lo que lee juego.py al validar al jugador y al recargar tras avanzar
+        for team_id in muestra:
+            for rol in ROLES:
+                obtener_semana_actual(team_id)
+                obtener_estado_actual(team_id, rol)
+
+    def resultados_equipo():
+        # resultados.cargar_resultados_equipo sin la caché de Streamlit
+        for team_id in muestra:
+            obtener_datos_equipo(team_id)
+            resumen = leer_resumen(team_id).set_index("role")
+            resumen["std_pedidos"] = std_pedidos(resumen)
+            for rol in resumen.index:
+                calcular_kpis(resumen.loc[rol])
+
+    def resumen_profesor():
+        return calcular_kpis_equipos(leer_resumen())
+
+    ruta_excel = os.path.join(directorio, "historial.xlsx")
+    kpis, _ = resumen_profesor()
+
+    def avance_semana():
+        # Cuatro decisiones por equipo; la última cierra la semana
+        for team_id in muestra:
+            semana = obtener_semana_actual(team_id)
+            for rol in ROLES:
+                _, stock, backorder, pedido_recibido, envio_recibido = obtener_estado_actual(team_id, rol)
+                registrar_decision(team_id, rol, semana, stock, backorder, pedido_recibido, envio_recibido,
+                                   4, min(stock, backorder + pedido_recibido))
+
+    # El avance va al final: cambia la semana de la muestra
+    tiempos = {
+        "estado_jugador": cronometrar(estado_jugador, repeticiones, len(muestra) * len(ROLES)),
+        "resultados_equipo": cronometrar(resultados_equipo, repeticiones, len(muestra)),
+        "resumen_profesor": cronometrar(resumen_profesor, repeticiones),
+        # La verificación ya exportó una vez; con 1000 equipos cada corrida lleva segundos
+        "exportar_excel": cronometrar(lambda: exportar_historial_excel(ruta_excel, kpis),
+                                      min(repeticiones, REPETICIONES_EXPORTACION), calentar=False),
+        "avance_semana": cronometrar(avance_semana, min(repeticiones, SEMANAS_EXTRA - 1), len(muestra)),
+    }
+    return {
+        "tamano": n_equipos,
+        "construccion_s": construccion,
+        "verificacion_s": verificacion,
+        "diferencias": diferencias,
+        "tiempos_ms": tiempos,
+    }
+
+
+# ========================
+# LÍNEA BASE
+# ========================
+def leer_base(ruta):
+    if not os.path.exists(ruta):
+        return {}
+    with open(ruta, encoding="utf-8") as archivo:
+        return json.load(archivo)
+
+
+def guardar_base(ruta, base, resultados):
+    for r in resultados:
+        base[str(r["tamano"])] = r["tiempos_ms"]
+    with open(ruta, "w", encoding="utf-8") as archivo:
+        json.dump(base, archivo, indent=2, sort_keys=True)
+
+
+def comparar(resultados, base, tolerancia):
+    """Filas (tamaño, operación, ms, ms base, % de cambio, empeoró) para la tabla."""
+    filas = []
+    for r in resultados:
+        referencia = base.get(str(r["tamano"]), {})
+        for operacion in OPERACIONES:
+            ms = r["tiempos_ms"][operacion]
+            ms_base = referencia.get(operacion)
+            cambio = None if not ms_base else (ms / ms_base - 1) * 100
+            filas.append((r["tamano"], operacion, ms, ms_base, cambio, cambio is not None and cambio > tolerancia))
+    return filas
+
+
+# ========================
+# CLI
+# ========================
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de regresión sobre bases sintéticas")
+    parser.add_argument("--tamanos", type=int, nargs="+", default=TAMANOS, help="Cantidades de equipos")
+    parser.add_argument("--repeticiones", type=int, default=REPETICIONES)
+    parser.add_argument("--tolerancia", type=float, default=TOLERANCIA,
+                        help="Falla si una operación es más de este %% más lenta que la línea base")
+    parser.add_argument("--base", default=RUTA_BASE, help="Archivo JSON con la línea base")
+    parser.add_argument("--guardar-base", action="store_true", help="Guarda estos tiempos como línea base")
+    parser.add_argument("--fragmentos", type=int, default=0,
+                        help="Reparte los equipos en N archivos SQLite (0: un solo archivo)")
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--medir-tamano", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--directorio", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.medir_tamano:
+        print(json.dumps(medir_tamano(args.medir_tamano, args.repeticiones, args.semilla, args.directorio)))
+        return
+
+    directorio = os.path.dirname(os.path.abspath(__file__))
+    resultados = []
+    for tamano in args.tamanos:
+        with tempfile.TemporaryDirectory(prefix="beer_game_benchmark_") as temporal:
+            entorno = {
+                **os.environ,
+                "BEER_GAME_DB": os.path.join(temporal, "benchmark.db"),
+                "BEER_GAME_ALMACEN": "fragmentado" if args.fragmentos else "archivo",
+                "BEER_GAME_FRAGMENTOS": str(args.fragmentos or 1),
+                "BEER_GAME_ARCHIVO": os.path.join(temporal, "archivo"),
+                "BEER_GAME_METRICAS": "0",
+            }
+            salida = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--medir-tamano", str(tamano),
+                 "--repeticiones", str(args.repeticiones), "--semilla", str(args.semilla), "--directorio", temporal],
+                env=entorno, cwd=directorio, capture_output=True, text=True,
+            )
+        if salida.returncode != 0:
+            print(f"❌ Falló la medición con {tamano} equipos:\n{salida.stderr}")
+            sys.exit(1)
+        r = json.loads(salida.stdout.strip().splitlines()[-1])
+        resultados.append(r)
+        print(f"{tamano} equipos: base armada en {r['construccion_s']:.1f} s, verificada en {r['verificacion_s']:.1f} s")
+
+    errores = [f"{r['tamano']} equipos: {n} diferencias en {nombre}"
+               for r in resultados for nombre, n in r["diferencias"].items() if n]
+    base = leer_base(args.base)
+    filas = comparar(resultados, base, args.tolerancia)
+
+    print(f"\n{'Equipos':>8}  {'Operación':<18}{'ms':>10}{'base':>10}{'cambio':>9}")
+    for tamano, operacion, ms, ms_base, cambio, empeoro in filas:
+        texto_base = f"{ms_base:10.2f}" if ms_base else f"{'-':>10}"
+        texto_cambio = f"{cambio:+8.1f}%" if cambio is not None else f"{'-':>9}"
+        print(f"{tamano:>8}  {operacion:<18}{ms:10.2f}{texto_base}{texto_cambio}{'  ⚠️' if empeoro else ''}")
+
+    for error in errores:
+        print(f"❌ {error}")
+    regresiones = [fila for fila in filas if fila[5]]
+    if args.guardar_base:
+        guardar_base(args.base, base, resultados)
+        print(f"💾 Línea base guardada en {args.base}")
+    elif regresiones:
+        print(f"❌ {len(regresiones)} operaciones más de {args.tolerancia:g}% más lentas que la línea base")
+    elif not base:
+        print(f"⚠️ No hay línea base en {args.base}; use --guardar-base para crearla")
+    if errores or (regresiones and not args.guardar_base):
+        sys.exit(1)
+    if not errores:
+        print("✅ Las rutas optimizadas coinciden con el recálculo desde cero")
+
+
+if __name__ == "__main__":
+    main()
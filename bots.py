@@ -0,0 +1,146 @@
+import argparse
+import json
+import time
+import uuid
+from datetime import datetime
+
+from base_datos import conectar_db, ejecutar_transaccion
+from metricas import medir
+from motor import ROLES, ResultadoSemana
+from parametros import obtener_parametros
+from partida import invalidar_plantel, registrar_en_transaccion, semana_actual
+from politicas import POLITICAS, PARAMETROS_POR_DEFECTO, Memoria
+
+# ========================
+# DECISIÓN DE UN BOT
+# ========================
+def decidir_bot(politica, parametros, semana, estado, memoria):
+    """Decide pedido y envío de un rol; `estado` es (stock, backorder, pedido, envío recibidos).
+
+    Solo aritmética sobre escalares: no toca la base de datos.
+    """
+    estado = ResultadoSemana(*estado, None)
+    pedido, envio, memoria = POLITICAS[politica](semana - 1, estado, memoria, **parametros)
+    return int(pedido), int(envio), Memoria(float(memoria.pronostico), int(memoria.pendiente))
+
+
+def _jugar_bot(conn, team_id, role, semana):
+    # Misma transacción y mismo registro que un alumno (partida.registrar_en_transaccion)
+    politica, parametros, pronostico, pendiente = conn.execute("""
+        SELECT policy, parameters, forecast, supply_line FROM bots WHERE team_id = ? AND role = ?
+    """, (team_id, role)).fetchone()
+    fila = conn.execute("""
+        SELECT stock, backorder, incoming_order, incoming_shipment, decided
+        FROM rounds
+        WHERE team_id = ? AND week = ? AND role = ?
+    """, (team_id, semana, role)).fetchone()
+    if fila and fila[4]:
+        return False  # Ya decidió esta semana (reintento)
+    if fila:
+        estado = fila[:4]
+    else:
+        estado = (obtener_parametros(team_id, conn, recargar=True).initial_stock, 0, 0, 0)
+
+    pedido, envio, memoria = decidir_bot(politica, json.loads(parametros), semana, estado,
+                                         Memoria(pronostico, pendiente))
+    semana_cerrada = registrar_en_transaccion(conn, team_id, role, semana, *estado, pedido, envio)
+    if semana_cerrada is None:
+        return False  # La semana ya estaba cerrada: la memoria no avanza
+    conn.execute("""
+        UPDATE bots SET forecast = ?, supply_line = ? WHERE team_id = ? AND role = ?
+    """, (memoria.pronostico, memoria.pendiente, team_id, role))
+    return semana_cerrada
+
+
+def _bots_pendientes(conn, team_id, semana):
+    return [fila[0] for fila in conn.execute("""
+        SELECT b.role
+        FROM bots b
+        LEFT JOIN rounds r ON r.team_id = b.team_id AND r.role = b.role AND r.week = ?
+        WHERE b.team_id = ? AND COALESCE(r.decided, 0) = 0
+    """, (semana, team_id))]
+
+
+# ========================
+# OPERACIONES
+# ========================
+def asignar_bots(team_id, politica, parametros=None):
+    """Asigna un bot a cada rol del equipo que no tiene alumno ni bot. Devuelve los roles."""
+    parametros = PARAMETROS_POR_DEFECTO[politica] if parametros is None else parametros
+    with conectar_db(team_id=team_id) as conn:
+        ocupados = {fila[0] for fila in conn.execute("""
+            SELECT role FROM players WHERE team_id = ?
+            UNION
+            SELECT role FROM bots WHERE team_id = ?
+        """, (team_id, team_id))}
+        libres = [rol for rol in ROLES if rol not in ocupados]
+        conn.executemany("""
+            INSERT INTO bots (team_id, role, policy, parameters) VALUES (?, ?, ?, ?)
+        """, [(team_id, rol, politica, json.dumps(parametros)) for rol in libres])
+    invalidar_plantel()
+    return libres
+
+
+@medir
+def jugar_bots(team_id, semanas_max=None):
+    """Hace jugar a los bots del equipo mientras no haya que esperar a un alumno.
+
+    Un equipo solo de bots juega así la partida completa (weeks_total del
+    equipo salvo que se indique `semanas_max`). Devuelve el número de
+    decisiones tomadas.
+    """
+    decisiones = 0
+    while True:
+        with conectar_db(team_id=team_id) as conn:
+            semana = semana_actual(conn, team_id)
+            pendientes = _bots_pendientes(conn, team_id, semana)
+            if semanas_max is None:
+                semanas_max = obtener_parametros(team_id, conn, recargar=semana == 1).weeks_total
+        if semana > semanas_max or not pendientes:
+            return decisiones
+
+        semana_cerrada = False
+        for rol in pendientes:
+            semana_cerrada = ejecutar_transaccion(_jugar_bot, team_id, rol, semana, team_id=team_id) or semana_cerrada
+            decisiones += 1
+        if not semana_cerrada:
+            return decisiones
+
+
+def crear_equipo_bots(nombre, politica, parametros=None):
+    team_id = str(uuid.uuid4())
+    fecha_creacion = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    with conectar_db(team_id=team_id) as conn:
+        conn.execute("""
+            INSERT INTO teams (team_id, team_name, creation_date) VALUES (?, ?, ?)
+        """, (team_id, nombre, fecha_creacion))
+    asignar_bots(team_id, politica, parametros)
+    return team_id
+
+
+# ========================
+# CLI: ENSAYO CON EQUIPOS DE BOTS
+# ========================
+def main():
+    parser = argparse.ArgumentParser(description="Crea equipos de bots y juega sus partidas completas")
+    parser.add_argument("--equipos", type=int, default=10)
+    parser.add_argument("--politica", default="anclaje_ajuste", choices=list(POLITICAS))
+    parser.add_argument("--parametros", type=json.loads, default=None,
+                        help='JSON, por ejemplo \'{"nivel_base": 40}\'')
+    parser.add_argument("--semanas", type=int, default=None,
+                        help="Por defecto, weeks_total de cada equipo")
+    parser.add_argument("--prefijo", default="Bots")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    decisiones = 0
+    for i in range(1, args.equipos + 1):
+        team_id = crear_equipo_bots(f"{args.prefijo} {i}", args.politica, args.parametros)
+        decisiones += jugar_bots(team_id, args.semanas)
+    duracion = time.perf_counter() - inicio
+    print(f"✅ {args.equipos} equipos, {decisiones} decisiones en {duracion:.2f} s "
+          f"({decisiones / duracion:,.0f} decisiones/s)")
+
+
+if __name__ == "__main__":
+    main()
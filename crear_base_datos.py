@@ -1,68 +1,24 @@
-import sqlite3
+import argparse
 
-conexion = sqlite3.connect("beer_game.db")
-cursor = conexion.cursor()
+from base_datos import obtener_pool, repartir, rutas_almacen
 
-cursor.execute("""
-CREATE TABLE IF NOT EXISTS teams (
-    team_id TEXT PRIMARY KEY,
-    team_name TEXT,
-    creation_date TEXT
-)
-""")
 
-cursor.execute("""
-CREATE TABLE IF NOT EXISTS players (
-    player_id TEXT PRIMARY KEY,
-    team_id TEXT,
-    name TEXT,
-    role TEXT,
-    email TEXT,
-    FOREIGN KEY (team_id) REFERENCES teams(team_id)
-)
-""")
+def main():
+    parser = argparse.ArgumentParser(description="Crea o actualiza la base de datos del juego")
+    parser.add_argument("--desde", default=None,
+                        help="Archivo único cuyos equipos se copian al almacén (p. ej. al pasar a fragmentado)")
+    args = parser.parse_args()
 
-cursor.execute("""
-CREATE TABLE IF NOT EXISTS game_parameters (
-    team_id TEXT PRIMARY KEY,
-    initial_stock INTEGER,
-    lead_time INTEGER,
-    delay_time INTEGER,
-    holding_cost REAL,
-    backorder_cost REAL,
-    weeks_total INTEGER,
-    FOREIGN KEY (team_id) REFERENCES teams(team_id)
-)
-""")
+    # Tablas base, índices, restricciones y columnas agregadas después del
+    # esquema original, en cada archivo del almacén (uno solo, o uno por fragmento)
+    for ruta in rutas_almacen():
+        obtener_pool(ruta)
+    print("✅ Base de datos creada correctamente.")
 
-cursor.execute("""
-CREATE TABLE IF NOT EXISTS rounds (
-    round_id INTEGER PRIMARY KEY AUTOINCREMENT,
-    team_id TEXT,
-    week INTEGER,
-    role TEXT,
-    stock INTEGER,
-    backorder INTEGER,
-    incoming_order INTEGER,
-    incoming_shipment INTEGER,
-    placed_order INTEGER,
-    sent_shipment INTEGER,
-    total_cost REAL,
-    FOREIGN KEY (team_id) REFERENCES teams(team_id)
-)
-""")
+    if args.desde:
+        for ruta, filas in repartir(args.desde).items():
+            print(f"✅ {ruta}: {filas:,} filas copiadas")
 
-cursor.execute("""
-CREATE TABLE IF NOT EXISTS demands (
-    team_id TEXT,
-    week INTEGER,
-    demand INTEGER,
-    PRIMARY KEY (team_id, week),
-    FOREIGN KEY (team_id) REFERENCES teams(team_id)
-)
-""")
 
-conexion.commit()
-conexion.close()
-
-print("✅ Base de datos creada correctamente.")
+if __name__ == "__main__":
+    main()
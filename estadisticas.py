@@ -0,0 +1,227 @@
+import argparse
+
+import numpy as np
+
+from base_datos import conectar_db, ejecutar_transaccion, leer_en_todos, rutas_almacen
+from metricas import medir
+from motor import COSTO_INVENTARIO, COSTO_FALTANTE
+
+# ========================
+# TABLA team_role_stats
+# ========================
+# Acumulados por equipo y rol de las semanas ya cerradas. Se actualizan al
+# avanzar de semana, así los dashboards leen O(equipos x roles) filas en vez
+# de recorrer todo `rounds`. La semana en curso se suma al leer.
+# pandas se importa dentro de las funciones de lectura: el avance de semana
+# (páginas de juego) no lo necesita.
+COLUMNAS_SUMA = ["stock_sum", "backorder_sum", "holding_cost", "backorder_cost", "incoming_orders", "served_orders"]
+
+def actualizar_estadisticas(conn, team_id, semana, filas,
+                            holding_cost=COSTO_INVENTARIO, backorder_cost=COSTO_FALTANTE):
+    """Suma la semana cerrada a team_role_stats y fija rounds.total_cost.
+
+    `filas` son tuplas (role, stock, backorder, incoming_order, placed_order).
+    Es idempotente: una semana ya sumada (<= last_week) no se vuelve a sumar.
+    """
+    conn.executemany("""
+        INSERT INTO team_role_stats (
+            team_id, role, weeks, last_week,
+            stock_sum, backorder_sum, holding_cost, backorder_cost,
+            incoming_orders, served_orders, order_mean, order_m2
+        ) VALUES (?, ?, 1, ?, ?, ?, ?, ?, ?, ?, ?, 0)
+        ON CONFLICT (team_id, role) DO UPDATE SET
+            weeks = weeks + 1,
+            last_week = excluded.last_week,
+            stock_sum = stock_sum + excluded.stock_sum,
+            backorder_sum = backorder_sum + excluded.backorder_sum,
+            holding_cost = holding_cost + excluded.holding_cost,
+            backorder_cost = backorder_cost + excluded.backorder_cost,
+            incoming_orders = incoming_orders + excluded.incoming_orders,
+            served_orders = served_orders + excluded.served_orders,
+            -- Welford: todas las expresiones ven los valores anteriores
+            order_mean = order_mean + (excluded.order_mean - order_mean) / (weeks + 1),
+            order_m2 = order_m2 + (excluded.order_mean - order_mean)
+                * (excluded.order_mean - order_mean) * weeks / (weeks + 1)
+        WHERE excluded.last_week > team_role_stats.last_week
+    """, [
+        (team_id, rol, semana,
+         stock, backorder, stock * holding_cost, backorder * backorder_cost,
+         pedido, max(pedido - backorder, 0), float(colocado))
+        for rol, stock, backorder, pedido, colocado in filas
+    ])
+    conn.execute("""
+        UPDATE rounds SET total_cost = stock * ? + backorder * ?
+        WHERE team_id = ? AND week = ?
+    """, (holding_cost, backorder_cost, team_id, semana))
+
+
+@medir
+def leer_resumen(team_id=None, conn=None):
+    """Acumulados por equipo y rol incluyendo la semana en curso.
+
+    Devuelve un DataFrame con team_id, team_name, role, semanas, stock,
+    backorder, costo_inventario, costo_faltantes, pedidos, atendidos,
+    media_pedidos y m2_pedidos (suma de cuadrados de desvíos de Welford).
+    Sin `team_id` se leen todos los archivos del almacén en paralelo. Con
+    `conn` se lee solo ese archivo, dentro de la transacción de quien llama.
+    """
+    if conn is not None:
+        partes = [_leer_partes(conn, team_id)]
+    elif team_id:
+        with conectar_db(team_id=team_id) as conn:
+            partes = [_leer_partes(conn, team_id)]
+    else:
+        partes = leer_en_todos(_leer_partes)
+    return _combinar(_concatenar([c for c, _ in partes]), _concatenar([e for _, e in partes]))
+
+
+def _concatenar(tablas):
+    import pandas as pd
+
+    return tablas[0] if len(tablas) == 1 else pd.concat(tablas, ignore_index=True)
+
+
+def _leer_partes(conn, team_id=None):
+    import pandas as pd
+
+    filtro = "WHERE t.team_id = ?" if team_id else ""
+    params = (team_id,) if team_id else ()
+    cerradas = pd.read_sql_query(f"""
+        SELECT s.*, t.team_name
+        FROM team_role_stats s
+        JOIN teams t ON t.team_id = s.team_id
+        {filtro}
+    """, conn, params=params)
+    # Una búsqueda por índice por equipo: la semana siguiente a la última cerrada
+    en_curso = pd.read_sql_query(f"""
+        SELECT t.team_id, t.team_name, r.role, r.stock, r.backorder, r.incoming_order, r.placed_order,
+               COALESCE(g.holding_cost, ?) AS costo_unitario_inventario,
+               COALESCE(g.backorder_cost, ?) AS costo_unitario_faltante
+        FROM teams t
+        JOIN rounds r ON r.team_id = t.team_id AND r.week = COALESCE(
+            (SELECT MAX(s.last_week) FROM team_role_stats s WHERE s.team_id = t.team_id), 0
+        ) + 1
+        LEFT JOIN game_parameters g ON g.team_id = t.team_id
+        {filtro}
+    """, conn, params=(COSTO_INVENTARIO, COSTO_FALTANTE) + params)
+    return cerradas, en_curso
+
+
+def _combinar(cerradas, en_curso):
+    import pandas as pd
+
+    df = cerradas.merge(en_curso, on=["team_id", "team_name", "role"], how="outer")
+    df = df.fillna({c: 0 for c in ["weeks", "order_mean", "order_m2"] + COLUMNAS_SUMA})
+    abierta = df["stock"].notna()
+    x = df["placed_order"].fillna(0)
+    stock = df["stock"].fillna(0)
+    backorder = df["backorder"].fillna(0)
+    pedido = df["incoming_order"].fillna(0)
+
+    semanas = df["weeks"] + abierta
+    delta = (x - df["order_mean"]).where(abierta, 0)
+    media = df["order_mean"] + delta / semanas.where(semanas > 0, 1)
+
+    return pd.DataFrame({
+        "team_id": df["team_id"],
+        "team_name": df["team_name"],
+        "role": df["role"],
+        "semanas": semanas.astype(int),
+        "stock": df["stock_sum"] + stock,
+        "backorder": df["backorder_sum"] + backorder,
+        "costo_inventario": df["holding_cost"] + stock * df["costo_unitario_inventario"].fillna(0),
+        "costo_faltantes": df["backorder_cost"] + backorder * df["costo_unitario_faltante"].fillna(0),
+        "pedidos": df["incoming_orders"] + pedido,
+        "atendidos": df["served_orders"] + (pedido - backorder).clip(lower=0),
+        "media_pedidos": media,
+        "m2_pedidos": df["order_m2"] + delta * (x - media),
+    })
+
+
+def std_pedidos(resumen):
+    # Desviación estándar muestral, como pandas .std()
+    n = resumen["semanas"]
+    return np.sqrt(resumen["m2_pedidos"].clip(lower=0) / (n - 1)).where(n > 1)
+
+
+# ========================
+# RECONSTRUCCIÓN
+# ========================
+def calcular_desde_rounds(conn):
+    """Recalcula team_role_stats desde cero a partir de las semanas cerradas."""
+    import pandas as pd
+
+    df = pd.read_sql_query("""
+        SELECT r.team_id, r.role, r.week, r.stock, r.backorder, r.incoming_order, r.placed_order,
+               r.stock * COALESCE(g.holding_cost, ?) AS holding_cost,
+               r.backorder * COALESCE(g.backorder_cost, ?) AS backorder_cost
+        FROM rounds r
+        JOIN (SELECT team_id, MAX(week) AS ultima FROM rounds GROUP BY team_id) u
+          ON u.team_id = r.team_id AND r.week < u.ultima
+        LEFT JOIN game_parameters g ON g.team_id = r.team_id
+    """, conn, params=(COSTO_INVENTARIO, COSTO_FALTANTE))
+    df["served_orders"] = (df["incoming_order"] - df["backorder"]).clip(lower=0)
+    grupos = df.groupby(["team_id", "role"])
+    stats = grupos.agg(
+        weeks=("week", "count"),
+        last_week=("week", "max"),
+        stock_sum=("stock", "sum"),
+        backorder_sum=("backorder", "sum"),
+        holding_cost=("holding_cost", "sum"),
+        backorder_cost=("backorder_cost", "sum"),
+        incoming_orders=("incoming_order", "sum"),
+        served_orders=("served_orders", "sum"),
+        order_mean=("placed_order", "mean"),
+    )
+    stats["order_m2"] = grupos["placed_order"].var(ddof=0) * stats["weeks"]
+    return stats.reset_index()
+
+
+def reconstruir_estadisticas(conn):
+    """Reemplaza team_role_stats por el recálculo y devuelve las diferencias halladas."""
+    import pandas as pd
+
+    nuevas = calcular_desde_rounds(conn)
+    actuales = pd.read_sql_query("SELECT * FROM team_role_stats", conn)
+    comparacion = nuevas.merge(actuales, on=["team_id", "role"], how="outer",
+                               suffixes=("", "_incremental"), indicator=True)
+    columnas = [c for c in nuevas.columns if c not in ("team_id", "role")]
+    distintas = comparacion["_merge"] != "both"
+    for c in columnas:
+        # Con tablas vacías pandas deja las columnas como object
+        distintas |= ~np.isclose(comparacion[c].astype(float), comparacion[f"{c}_incremental"].astype(float),
+                                 equal_nan=True)
+
+    conn.execute("DELETE FROM team_role_stats")
+    conn.executemany(f"""
+        INSERT INTO team_role_stats ({", ".join(nuevas.columns)})
+        VALUES ({", ".join("?" * len(nuevas.columns))})
+    """, nuevas.astype(object).itertuples(index=False))
+    return comparacion.loc[distintas, ["team_id", "role"] + columnas + [f"{c}_incremental" for c in columnas]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconstruye team_role_stats desde rounds")
+    parser.add_argument("--solo-verificar", action="store_true",
+                        help="Compara con los valores incrementales sin reemplazar la tabla")
+    args = parser.parse_args()
+
+    def tarea(conn):
+        diferencias = reconstruir_estadisticas(conn)
+        if args.solo_verificar:
+            conn.rollback()
+        return diferencias
+
+    # Cada archivo del almacén tiene sus propios equipos y su team_role_stats
+    diferencias = _concatenar([ejecutar_transaccion(tarea, ruta=ruta) for ruta in rutas_almacen()])
+    if diferencias.empty:
+        print("✅ team_role_stats coincide con el recálculo desde rounds.")
+    else:
+        print(f"⚠️ {len(diferencias)} filas difieren de los valores incrementales:")
+        print(diferencias.to_string(index=False))
+    if not args.solo_verificar:
+        print("🔄 team_role_stats reconstruida.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,302 @@
+import argparse
+from datetime import datetime
+
+import numpy as np
+
+from base_datos import conectar_db, ejecutar_transaccion, rutas_almacen
+from estadisticas import reconstruir_estadisticas
+from metricas import medir
+from motor import (
+    ROLES, ResultadoSemana, Trayectoria,
+    avanzar_semana, pipeline_vacio, pipeline_pedidos_vacio
+)
+from parametros import obtener_parametros
+
+# ========================
+# REGISTRO DE DECISIONES
+# ========================
+# decision_events guarda cada decisión aceptada y nunca se modifica; cuenta la
+# última de cada semana y rol. Todo lo demás (rounds, snapshots, team_role_stats)
+# se deriva reproduciendo los eventos con motor.avanzar_semana. El estado de
+# cualquier semana, incluida la en curso, es el snapshot anterior más los
+# eventos posteriores (estado_en_semana).
+SNAPSHOT_CADA = 4  # semanas entre snapshots: el estado actual se reproduce en < 4 pasos
+
+
+def registrar_evento(conn, team_id, semana, role, pedido, envio):
+    conn.execute("""
+        INSERT INTO decision_events (team_id, week, role, placed_order, sent_shipment, recorded_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, (team_id, semana, role, pedido, envio, datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+
+
+def toca_snapshot(semana):
+    return semana > 1 and (semana - 1) % SNAPSHOT_CADA == 0
+
+
+def guardar_snapshot(conn, team_id, semana, estado):
+    """Guarda `estado` (ResultadoSemana de 1 equipo) como el inicio de `semana`."""
+    matriz = np.stack([estado.stock, estado.backorder, estado.pedido_recibido, estado.envio_recibido])
+    conn.execute("""
+        INSERT OR REPLACE INTO snapshots (team_id, week, state, shipments, orders) VALUES (?, ?, ?, ?, ?)
+    """, (team_id, semana, matriz.astype(np.int64).tobytes(),
+          _bytes(estado.pipeline), _bytes(estado.pipeline_pedidos)))
+
+
+def _bytes(pipeline):
+    return b"" if pipeline is None else pipeline.astype(np.int64).tobytes()
+
+
+# ========================
+# REPRODUCCIÓN
+# ========================
+def estado_inicial(parametros):
+    ceros = np.zeros((1, len(ROLES)), dtype=np.int64)
+    return ResultadoSemana(
+        np.full((1, len(ROLES)), parametros.initial_stock, dtype=np.int64),
+        ceros, ceros.copy(), ceros.copy(),
+        pipeline_vacio(1, parametros.lead_time),
+        pipeline_pedidos_vacio(1, parametros.delay_time),
+    )
+
+
+def _leer_snapshot(conn, team_id, semana, parametros):
+    """Último snapshot en o antes de `semana`: (semana, estado) o (1, estado inicial)."""
+    fila = conn.execute("""
+        SELECT week, state, shipments, orders
+        FROM snapshots
+        WHERE team_id = ? AND week <= ?
+        ORDER BY week DESC LIMIT 1
+    """, (team_id, semana)).fetchone()
+    if fila is None:
+        return 1, estado_inicial(parametros)
+    semana_snapshot, matriz, envios, pedidos = fila
+    stock, backorder, pedido_recibido, envio_recibido = np.frombuffer(matriz, dtype=np.int64).reshape(4, 1, len(ROLES))
+    return semana_snapshot, ResultadoSemana(
+        stock.copy(), backorder.copy(), pedido_recibido.copy(), envio_recibido.copy(),
+        np.frombuffer(envios, dtype=np.int64).reshape(1, len(ROLES), parametros.lead_time).copy(),
+        np.frombuffer(pedidos, dtype=np.int64).reshape(1, len(ROLES) - 1, parametros.delay_time).copy(),
+    )
+
+
+def _decisiones(conn, team_id, desde, hasta=None):
+    """Arreglos (W, 4) de pedidos y envíos de las semanas cerradas desde `desde`.
+
+    Una semana está cerrada si los 4 roles tienen evento; se corta en la
+    primera que no lo está (la semana en curso).
+    """
+    filas = conn.execute("""
+        SELECT e.week, e.role, e.placed_order, e.sent_shipment
+        FROM decision_events e
+        JOIN (
+            SELECT MAX(event_id) AS event_id
+            FROM decision_events
+            WHERE team_id = ? AND week >= ? AND week < ?
+            GROUP BY week, role
+        ) u ON u.event_id = e.event_id
+    """, (team_id, desde, hasta if hasta is not None else 2 ** 31)).fetchall()
+    n = max((fila[0] for fila in filas), default=desde - 1) - desde + 1
+    pedidos = np.zeros((n, len(ROLES)), dtype=np.int64)
+    envios = np.zeros((n, len(ROLES)), dtype=np.int64)
+    decididos = np.zeros((n, len(ROLES)), dtype=bool)
+    indice = {rol: i for i, rol in enumerate(ROLES)}
+    for semana, rol, pedido, envio in filas:
+        pedidos[semana - desde, indice[rol]] = pedido
+        envios[semana - desde, indice[rol]] = envio
+        decididos[semana - desde, indice[rol]] = True
+    incompletas = np.flatnonzero(~decididos.all(axis=1))
+    cerradas = incompletas[0] if len(incompletas) else n
+    return pedidos[:cerradas], envios[:cerradas]
+
+
+def _repetir(parametros, estado, primera, pedidos, envios):
+    """Aplica las decisiones (W, 4) desde la semana `primera`.
+
+    Devuelve la Trayectoria (1, W, 4) y el estado al inicio de la semana siguiente.
+    """
+    forma = (1, len(pedidos), len(ROLES))
+    historia = Trayectoria(*(np.zeros(forma, dtype=np.int64) for _ in Trayectoria._fields))
+    for i in range(len(pedidos)):
+        semana = primera + i
+        historia.stock[:, i] = estado.stock
+        historia.backorder[:, i] = estado.backorder
+        historia.incoming_order[:, i] = estado.pedido_recibido
+        historia.incoming_shipment[:, i] = estado.envio_recibido
+        historia.placed_order[:, i] = pedidos[i]
+        historia.sent_shipment[:, i] = envios[i]
+        estado = avanzar_semana(
+            estado.stock, estado.backorder, pedidos[i][None], envios[i][None],
+            parametros.demanda_semana(semana), parametros.produccion,
+            estado.pipeline, estado.pipeline_pedidos, semana=semana
+        )
+    return historia, estado
+
+
+@medir
+def reproducir_equipo(team_id, conn=None):
+    """Reproduce todas las semanas cerradas desde los eventos (sin snapshots).
+
+    Devuelve (Trayectoria de 1 equipo, estado al inicio de la semana en curso).
+    """
+    if conn is None:
+        with conectar_db(team_id=team_id) as conn:
+            return reproducir_equipo(team_id, conn)
+    parametros = obtener_parametros(team_id, conn)
+    pedidos, envios = _decisiones(conn, team_id, 1)
+    return _repetir(parametros, estado_inicial(parametros), 1, pedidos, envios)
+
+
+@medir
+def estado_en_semana(team_id, semana, conn=None):
+    """Estado al inicio de `semana`: el snapshot anterior más unas pocas semanas de eventos."""
+    if conn is None:
+        with conectar_db(team_id=team_id) as conn:
+            return estado_en_semana(team_id, semana, conn)
+    parametros = obtener_parametros(team_id, conn)
+    desde, estado = _leer_snapshot(conn, team_id, semana, parametros)
+    pedidos, envios = _decisiones(conn, team_id, desde, semana)
+    return _repetir(parametros, estado, desde, pedidos, envios)[1]
+
+
+@medir
+def reproducir_semana(team_id, semana, conn=None):
+    """Trayectoria de una semana cerrada (arreglos (1, 4)): estado al inicio y decisiones.
+
+    Igual que estado_en_semana, parte del snapshot anterior. None si la semana no está cerrada.
+    """
+    if conn is None:
+        with conectar_db(team_id=team_id) as conn:
+            return reproducir_semana(team_id, semana, conn)
+    parametros = obtener_parametros(team_id, conn)
+    desde, estado = _leer_snapshot(conn, team_id, semana, parametros)
+    pedidos, envios = _decisiones(conn, team_id, desde, semana + 1)
+    if len(pedidos) <= semana - desde:
+        return None
+    historia, _ = _repetir(parametros, estado, desde, pedidos, envios)
+    return Trayectoria(*(campo[:, semana - desde] for campo in historia))
+
+
+# ========================
+# RECONSTRUCCIÓN DE LAS PROYECCIONES
+# ========================
+COLUMNAS_ESTADO = ["stock", "backorder", "incoming_order", "incoming_shipment", "placed_order", "sent_shipment"]
+
+
+def reconstruir_equipo(conn, team_id):
+    """Reescribe rounds, snapshots y team_progress del equipo desde sus eventos.
+
+    Devuelve cuántas filas de rounds cambiaron. Se usa tras corregir la lógica
+    del juego: basta reproducir, sin editar filas a mano.
+    """
+    parametros = obtener_parametros(team_id, conn)
+    pedidos, envios = _decisiones(conn, team_id, 1)
+
+    # Reproducción por tramos de SNAPSHOT_CADA semanas, guardando un snapshot al final de cada uno
+    conn.execute("DELETE FROM snapshots WHERE team_id = ?", (team_id,))
+    estado = estado_inicial(parametros)
+    tramos = [_repetir(parametros, estado, 1, pedidos[:0], envios[:0])[0]]
+    for inicio in range(0, len(pedidos), SNAPSHOT_CADA):
+        fin = min(inicio + SNAPSHOT_CADA, len(pedidos))
+        tramo, estado = _repetir(parametros, estado, inicio + 1, pedidos[inicio:fin], envios[inicio:fin])
+        tramos.append(tramo)
+        if toca_snapshot(fin + 1):
+            guardar_snapshot(conn, team_id, fin + 1, estado)
+    historia = Trayectoria(*(np.concatenate(columnas, axis=1) for columnas in zip(*tramos)))
+    semanas = len(pedidos)
+
+    filas = []
+    for semana in range(1, semanas + 1):
+        for i, rol in enumerate(ROLES):
+            valores = [int(getattr(historia, campo)[0, semana - 1, i]) for campo in Trayectoria._fields]
+            costo = valores[0] * parametros.holding_cost + valores[1] * parametros.backorder_cost
+            filas.append((team_id, semana, rol, *valores, costo, 1))
+    # La semana en curso conserva las decisiones ya tomadas
+    abiertas = [
+        (team_id, semanas + 1, rol,
+         int(estado.stock[0, i]), int(estado.backorder[0, i]),
+         int(estado.pedido_recibido[0, i]), int(estado.envio_recibido[0, i]))
+        for i, rol in enumerate(ROLES)
+    ]
+
+    antes = {fila[:3]: fila[3:] for fila in conn.execute(f"""
+        SELECT team_id, week, role, {", ".join(COLUMNAS_ESTADO)}, decided
+        FROM rounds WHERE team_id = ?
+    """, (team_id,))}
+
+    conn.execute("DELETE FROM rounds WHERE team_id = ? AND week > ?", (team_id, semanas + 1))
+    conn.executemany(f"""
+        INSERT INTO rounds (team_id, week, role, {", ".join(COLUMNAS_ESTADO)}, total_cost, decided)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (team_id, week, role) DO UPDATE SET
+            {", ".join(f"{c} = excluded.{c}" for c in COLUMNAS_ESTADO)},
+            total_cost = excluded.total_cost,
+            decided = 1
+    """, filas)
+    conn.executemany("""
+        INSERT INTO rounds (team_id, week, role, stock, backorder, incoming_order, incoming_shipment,
+                            placed_order, sent_shipment, total_cost)
+        VALUES (?, ?, ?, ?, ?, ?, ?, 0, 0, 0)
+        ON CONFLICT (team_id, week, role) DO UPDATE SET
+            stock = excluded.stock,
+            backorder = excluded.backorder,
+            incoming_order = excluded.incoming_order,
+            incoming_shipment = excluded.incoming_shipment
+    """, abiertas)
+
+    despues = {fila[:3]: fila[3:] for fila in conn.execute(f"""
+        SELECT team_id, week, role, {", ".join(COLUMNAS_ESTADO)}, decided
+        FROM rounds WHERE team_id = ?
+    """, (team_id,))}
+    cambios = sum(antes.get(clave) != valores for clave, valores in despues.items()) + len(set(antes) - set(despues))
+
+    # Estado derivado de la semana en curso
+    if semanas:
+        conn.execute("""
+            INSERT INTO team_progress (team_id, week) VALUES (?, ?)
+            ON CONFLICT (team_id) DO UPDATE SET week = excluded.week
+        """, (team_id, semanas + 1))
+    return cambios
+
+
+def reconstruir_todo(conn, team_id=None):
+    """Reconstruye los equipos indicados (o todos) y luego team_role_stats."""
+    equipos = [team_id] if team_id else [
+        fila[0] for fila in conn.execute("SELECT DISTINCT team_id FROM decision_events")
+    ]
+    cambios = {equipo: reconstruir_equipo(conn, equipo) for equipo in equipos}
+    reconstruir_estadisticas(conn)
+    return {equipo: n for equipo, n in cambios.items() if n}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconstruye rounds y el estado derivado desde decision_events")
+    parser.add_argument("--equipo", default=None, help="team_id; por defecto, todos")
+    parser.add_argument("--solo-verificar", action="store_true",
+                        help="Informa las diferencias sin guardar cambios")
+    args = parser.parse_args()
+
+    def tarea(conn):
+        cambios = reconstruir_todo(conn, args.equipo)
+        if args.solo_verificar:
+            conn.rollback()
+        return cambios
+
+    # Un equipo se reconstruye en su archivo; sin --equipo, cada archivo completo
+    if args.equipo:
+        cambios = ejecutar_transaccion(tarea, team_id=args.equipo)
+    else:
+        cambios = {}
+        for ruta in rutas_almacen():
+            cambios.update(ejecutar_transaccion(tarea, ruta=ruta))
+    if not cambios:
+        print("✅ rounds coincide con la reproducción de los eventos.")
+    else:
+        print(f"⚠️ {len(cambios)} equipos difieren de la reproducción:")
+        for equipo, n in cambios.items():
+            print(f"  {equipo}: {n} filas")
+    if not args.solo_verificar:
+        print("🔄 rounds y estado derivado reconstruidos.")
+
+
+if __name__ == "__main__":
+    main()
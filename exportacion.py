@@ -0,0 +1,108 @@
+import csv
+import re
+
+from base_datos import conectar_db, leer_en_todos, rutas_almacen
+from metricas import medir
+
+# ========================
+# EXPORTACIÓN DEL HISTORIAL COMPLETO
+# ========================
+# Se lee `rounds` por bloques con un cursor (orden del índice único, sin ordenar
+# en memoria) y se escribe directo a un archivo: la memoria no crece con el
+# tamaño del historial. Los archivos del almacén se recorren uno tras otro
+# (cada equipo está entero en uno). xlsxwriter y pyarrow se importan al exportar.
+COLUMNAS_HISTORIAL = [
+    "week", "role", "stock", "backorder", "incoming_order", "incoming_shipment",
+    "placed_order", "sent_shipment", "total_cost"
+]
+TAM_BLOQUE = 5000
+
+
+def _leer_historial(tam_bloque):
+    for ruta in rutas_almacen():
+        with conectar_db(ruta) as conn:
+            cursor = conn.execute(f"""
+                SELECT team_id, {", ".join(COLUMNAS_HISTORIAL)}
+                FROM rounds
+                ORDER BY team_id, week, role
+            """)
+            while True:
+                filas = cursor.fetchmany(tam_bloque)
+                if not filas:
+                    break
+                yield filas
+
+
+def _nombres_equipos():
+    partes = leer_en_todos(lambda conn: conn.execute("SELECT team_id, team_name FROM teams").fetchall())
+    return {team_id: nombre for filas in partes for team_id, nombre in filas}
+
+
+def _nombre_hoja(nombre, usados):
+    # Excel: máximo 31 caracteres, sin []:*?/\ y sin repetir (sin distinguir mayúsculas)
+    base = re.sub(r"[\[\]:*?/\\]", "_", nombre or "Equipo")[:31] or "Equipo"
+    candidato, n = base, 1
+    while candidato.lower() in usados:
+        n += 1
+        sufijo = f" ({n})"
+        candidato = base[:31 - len(sufijo)] + sufijo
+    usados.add(candidato.lower())
+    return candidato
+
+
+@medir
+def exportar_historial_excel(ruta, resumen, tam_bloque=TAM_BLOQUE):
+    """Escribe `resumen` (DataFrame) en la hoja "Resumen" y una hoja por equipo."""
+    import xlsxwriter
+
+    libro = xlsxwriter.Workbook(ruta, {"constant_memory": True, "nan_inf_to_errors": True})
+    try:
+        negrita = libro.add_format({"bold": True})
+        usados = {"resumen"}
+
+        hoja = libro.add_worksheet("Resumen")
+        hoja.write_row(0, 0, list(resumen.columns), negrita)
+        for i, fila in enumerate(resumen.itertuples(index=False), start=1):
+            hoja.write_row(i, 0, fila)
+
+        nombres = _nombres_equipos()
+        equipo_actual = None
+        for filas in _leer_historial(tam_bloque):
+            for team_id, *valores in filas:
+                if team_id != equipo_actual:
+                    equipo_actual = team_id
+                    hoja = libro.add_worksheet(_nombre_hoja(nombres.get(team_id, team_id), usados))
+                    hoja.write_row(0, 0, COLUMNAS_HISTORIAL, negrita)
+                    fila_hoja = 1
+                hoja.write_row(fila_hoja, 0, valores)
+                fila_hoja += 1
+    finally:
+        libro.close()
+
+
+@medir
+def exportar_historial_csv(ruta, tam_bloque=TAM_BLOQUE):
+    nombres = _nombres_equipos()
+    with open(ruta, "w", newline="", encoding="utf-8") as archivo:
+        escritor = csv.writer(archivo)
+        escritor.writerow(["team_name", "team_id"] + COLUMNAS_HISTORIAL)
+        for filas in _leer_historial(tam_bloque):
+            escritor.writerows((nombres.get(fila[0]), *fila) for fila in filas)
+
+
+@medir
+def exportar_historial_parquet(ruta, tam_bloque=TAM_BLOQUE):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    esquema = pa.schema(
+        [("team_name", pa.string()), ("team_id", pa.string()), ("week", pa.int32()), ("role", pa.string())]
+        + [(c, pa.int32()) for c in COLUMNAS_HISTORIAL[2:-1]]
+        + [("total_cost", pa.float64())]
+    )
+    nombres = _nombres_equipos()
+    with pq.ParquetWriter(ruta, esquema, compression="zstd") as writer:
+        for filas in _leer_historial(tam_bloque):
+            columnas = list(zip(*filas))
+            datos = [[nombres.get(t) for t in columnas[0]]] + columnas
+            writer.write_table(pa.table(datos, schema=esquema))
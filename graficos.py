@@ -0,0 +1,61 @@
+from io import BytesIO
+
+from matplotlib.figure import Figure
+
+from metricas import medir
+
+# ========================
+# RENDERIZADO DE GRÁFICOS
+# ========================
+# Las figuras se crean con matplotlib.figure.Figure (sin pyplot), así no quedan
+# registradas en el estado global y se liberan al salir de la función. Cada
+# gráfico devuelve los bytes PNG, que las páginas guardan en caché por versión
+# de datos.
+DPI = 100
+
+
+def _a_png(fig):
+    buffer = BytesIO()
+    try:
+        fig.savefig(buffer, format="png", dpi=DPI, bbox_inches="tight")
+        return buffer.getvalue()
+    finally:
+        fig.clear()
+
+
+@medir
+def grafico_stock_backorder(semanas, stock, backorder, rol):
+    fig = Figure()
+    ax = fig.subplots()
+    ax.plot(semanas, stock, marker='o', label="Stock")
+    ax.plot(semanas, backorder, marker='x', label="Backorder")
+    ax.set_title(f"{rol} - Evolución Stock / Backorder")
+    ax.set_xlabel("Semana")
+    ax.set_ylabel("Unidades")
+    ax.legend()
+    return _a_png(fig)
+
+
+@medir
+def grafico_std_por_rol(roles, stds):
+    fig = Figure()
+    ax = fig.subplots()
+    ax.plot(roles, stds, marker='o')
+    ax.set_title("Desviación Estándar de Pedidos por Rol")
+    ax.set_ylabel("STD Pedidos")
+    ax.set_xlabel("Rol")
+    return _a_png(fig)
+
+
+@medir
+def grafico_latigo_global(std_por_rol, nombres):
+    """`std_por_rol`: DataFrame equipos x roles; `nombres`: team_id -> nombre."""
+    fig = Figure(figsize=(8, 4))
+    ax = fig.subplots()
+    for team_id, std_pedidos in std_por_rol.iterrows():
+        ax.plot(std_pedidos.index, std_pedidos.values, marker='o', label=nombres[team_id])
+    ax.set_title("Efecto Látigo Global - Desviación STD de Pedidos")
+    ax.set_xlabel("Rol")
+    ax.set_ylabel("STD de Pedidos")
+    ax.legend(title="Equipos")
+    return _a_png(fig)
@@ -0,0 +1,162 @@
+import argparse
+import time
+import uuid
+from datetime import datetime
+from typing import NamedTuple
+
+import pandas as pd
+
+from base_datos import ejecutar_en_todos, ruta_equipo
+from motor import ROLES
+from partida import invalidar_plantel
+
+# ========================
+# IMPORTACIÓN DE PLANTELES DESDE CSV
+# ========================
+# Una fila por jugador. Se valida todo el archivo contra la base y, si no hay
+# errores, se insertan equipos y jugadores con executemany en una sola
+# transacción: o entra el plantel completo o no entra nada.
+COLUMNAS_CSV = ["equipo", "clave_equipo", "nombre", "correo", "rol"]
+OBLIGATORIAS = ["equipo", "nombre", "rol"]
+
+
+class ResultadoImportacion(NamedTuple):
+    errores: list
+    equipos_nuevos: list      # Nombres de los equipos creados (o a crear)
+    jugadores: pd.DataFrame   # Filas válidas con team_id asignado
+    importado: bool
+
+
+def leer_csv(archivo):
+    df = pd.read_csv(archivo, dtype=str, keep_default_na=False)
+    df.columns = [c.strip().lower() for c in df.columns]
+    return df.apply(lambda columna: columna.str.strip())
+
+
+def _filas(grupo):
+    filas = list(map(str, grupo["fila"]))
+    return f"Fila {filas[0]}" if len(filas) == 1 else f"Filas {', '.join(filas)}"
+
+
+def _validar(conexiones, df, crear_equipos):
+    faltantes = [c for c in COLUMNAS_CSV if c not in df.columns]
+    if faltantes:
+        return [f"Faltan columnas: {', '.join(faltantes)}"], [], df.iloc[0:0]
+
+    errores = []
+    df = df[COLUMNAS_CSV].copy()
+    df["fila"] = range(2, len(df) + 2)  # Línea del archivo (la 1 es el encabezado)
+    roles = {rol.lower(): rol for rol in ROLES}
+    df["rol"] = df["rol"].str.lower().map(roles).fillna(df["rol"])
+
+    for c in OBLIGATORIAS:
+        for fila in df.loc[df[c] == "", "fila"]:
+            errores.append(f"Fila {fila}: '{c}' está vacío")
+    for fila, rol in df.loc[~df["rol"].isin(ROLES) & (df["rol"] != ""), ["fila", "rol"]].itertuples(index=False):
+        errores.append(f"Fila {fila}: rol desconocido '{rol}' (válidos: {', '.join(ROLES)})")
+
+    # Duplicados dentro del archivo
+    duplicados = df[df["rol"].isin(ROLES) & df.duplicated(["equipo", "rol"], keep=False)]
+    for (equipo, rol), grupo in duplicados.groupby(["equipo", "rol"]):
+        errores.append(f"{_filas(grupo)}: el rol {rol} se repite en el equipo '{equipo}'")
+    correos = df[(df["correo"] != "") & df.duplicated("correo", keep=False)]
+    for correo, grupo in correos.groupby("correo"):
+        errores.append(f"{_filas(grupo)}: el correo {correo} se repite")
+    claves = df[df["clave_equipo"] != ""].groupby("equipo")["clave_equipo"].nunique()
+    for equipo in claves[claves > 1].index:
+        errores.append(f"El equipo '{equipo}' tiene claves distintas en el archivo")
+
+    # Contra la base (todos sus archivos): equipos existentes y roles ya ocupados
+    existentes = {}
+    ocupados = set()
+    for conn in conexiones.values():
+        for team_id, nombre, clave in conn.execute("SELECT team_id, team_name, team_password FROM teams"):
+            existentes.setdefault(nombre, (team_id, clave))
+        ocupados.update(conn.execute("""
+            SELECT t.team_name, p.role FROM players p JOIN teams t ON t.team_id = p.team_id
+            UNION
+            SELECT t.team_name, b.role FROM bots b JOIN teams t ON t.team_id = b.team_id
+        """).fetchall())
+
+    equipos_nuevos = []
+    team_ids = {}
+    for equipo, grupo in df[df["equipo"] != ""].groupby("equipo", sort=False):
+        clave = next((c for c in grupo["clave_equipo"] if c), "")
+        if equipo in existentes:
+            team_ids[equipo], clave_actual = existentes[equipo]
+            if clave and clave != clave_actual:
+                errores.append(f"El equipo '{equipo}' ya existe con otra clave")
+        elif not crear_equipos:
+            errores.append(f"{_filas(grupo)}: el equipo '{equipo}' no existe")
+        elif not clave:
+            errores.append(f"El equipo nuevo '{equipo}' necesita una clave_equipo")
+        else:
+            team_ids[equipo] = str(uuid.uuid4())
+            equipos_nuevos.append((team_ids[equipo], equipo, clave))
+        for fila, rol in grupo[["fila", "rol"]].itertuples(index=False):
+            if (equipo, rol) in ocupados:
+                errores.append(f"Fila {fila}: el rol {rol} ya está ocupado en el equipo '{equipo}'")
+
+    df["team_id"] = df["equipo"].map(team_ids)
+    return errores, equipos_nuevos, df
+
+
+def _importar(conexiones, df, crear_equipos, simular):
+    errores, equipos_nuevos, jugadores = _validar(conexiones, df, crear_equipos)
+    if errores or simular:
+        return ResultadoImportacion(errores, [e for _, e, _ in equipos_nuevos], jugadores, False)
+
+    # Cada equipo con sus jugadores va al archivo que le corresponde
+    fecha = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    filas_jugadores = list(jugadores[["team_id", "nombre", "rol", "correo"]].itertuples(index=False))
+    for ruta, conn in conexiones.items():
+        conn.executemany("""
+            INSERT INTO teams (team_id, team_name, creation_date, team_password) VALUES (?, ?, ?, ?)
+        """, [(team_id, equipo, fecha, clave) for team_id, equipo, clave in equipos_nuevos
+              if ruta_equipo(team_id) == ruta])
+        conn.executemany("""
+            INSERT INTO players (player_id, team_id, name, role, email) VALUES (?, ?, ?, ?, ?)
+        """, [(str(uuid.uuid4()), team_id, nombre, rol, correo or None)
+              for team_id, nombre, rol, correo in filas_jugadores if ruta_equipo(team_id) == ruta])
+    return ResultadoImportacion([], [e for _, e, _ in equipos_nuevos], jugadores, True)
+
+
+def importar_roster(df, crear_equipos=True, simular=False):
+    """Valida el plantel y, si no hay errores y no es una simulación, lo inserta.
+
+    La validación y la inserción comparten la transacción BEGIN IMMEDIATE (en
+    todos los archivos del almacén), así nadie ocupa un rol entre ambas.
+    """
+    resultado = ejecutar_en_todos(_importar, df, crear_equipos, simular)
+    if resultado.importado:
+        invalidar_plantel()
+    return resultado
+
+
+# ========================
+# CLI
+# ========================
+def main():
+    parser = argparse.ArgumentParser(description="Importa equipos y jugadores desde un CSV")
+    parser.add_argument("archivo", help=f"CSV con columnas {', '.join(COLUMNAS_CSV)}")
+    parser.add_argument("--simular", action="store_true", help="Solo valida e informa, sin insertar")
+    parser.add_argument("--sin-crear-equipos", action="store_true",
+                        help="Los equipos deben existir; los desconocidos son un error")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    resultado = importar_roster(leer_csv(args.archivo), not args.sin_crear_equipos, args.simular)
+    duracion = time.perf_counter() - inicio
+
+    for error in resultado.errores:
+        print(f"❌ {error}")
+    if resultado.errores:
+        print(f"⚠️ {len(resultado.errores)} errores: no se importó nada.")
+        return
+    accion = "Importados" if resultado.importado else "Se importarían"
+    print(f"✅ {accion} {len(resultado.jugadores)} jugadores y {len(resultado.equipos_nuevos)} equipos nuevos "
+          f"en {duracion * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+from base_datos import conectar_db
+from estadisticas import std_pedidos
+from metricas import medir
+from motor import ROLES
+from optimo import costo_optimo_equipos
+
+# ========================
+# INDICADORES DE RESULTADOS
+# ========================
+# Lecturas y cálculos de las páginas de resultados y del profesor, sin
+# Streamlit: las páginas los cachean y el benchmark los mide directamente.
+# pandas se importa dentro de las funciones, como en estadisticas.py.
+COLUMNAS_HISTORIAL = ["role", "week", "stock", "backorder", "incoming_order", "incoming_shipment",
+                      "placed_order", "sent_shipment"]
+
+@medir
+def obtener_datos_equipo(team_id):
+    import pandas as pd
+
+    query = f"""
+        SELECT {", ".join(COLUMNAS_HISTORIAL)}
+        FROM rounds
+        WHERE team_id = ?
+        ORDER BY role, week
+    """
+    with conectar_db(team_id=team_id) as conn:
+        return pd.read_sql_query(query, conn, params=(team_id,))
+
+@medir
+def obtener_version_equipo(team_id):
+    # Cambia cuando el equipo registra una decisión o avanza de semana
+    with conectar_db(team_id=team_id) as conn:
+        return conn.execute("""
+            SELECT COUNT(*), MAX(week), SUM(decided), SUM(placed_order), SUM(sent_shipment)
+            FROM rounds
+            WHERE team_id = ?
+        """, (team_id,)).fetchone()
+
+def calcular_kpis(resumen_rol):
+    semanas = resumen_rol["semanas"]
+    pedidos = resumen_rol["pedidos"]
+    nivel_servicio = (resumen_rol["atendidos"] / pedidos * 100) if pedidos > 0 else 100
+
+    return {
+        "Costo Total": round(resumen_rol["costo_inventario"] + resumen_rol["costo_faltantes"], 2),
+        "Costo Inventario": round(resumen_rol["costo_inventario"], 2),
+        "Costo Faltantes": round(resumen_rol["costo_faltantes"], 2),
+        "Stock Promedio": round(resumen_rol["stock"] / semanas, 2),
+        "Backorder Promedio": round(resumen_rol["backorder"] / semanas, 2),
+        "Nivel de Servicio (%)": round(nivel_servicio, 2)
+    }
+
+# Calcular KPIs por equipo y STD de pedidos por rol a partir de team_role_stats.
+# El costo de referencia es el menor entre la mejor política de nivel base y
+# pasar el pedido (optimo.resolver), con los mismos parámetros y en las mismas
+# semanas que lleva jugadas el equipo. Es una heurística, no una cota: enviando
+# más de lo que debe un equipo puede costar menos y queda con % negativo.
+def calcular_kpis_equipos(resumen, semestre=None):
+    import pandas as pd
+
+    resumen = resumen.copy()
+    resumen["total_cost"] = resumen["costo_inventario"] + resumen["costo_faltantes"]
+    resumen["std_pedidos"] = std_pedidos(resumen)
+
+    por_equipo = resumen.groupby(["team_id", "team_name"], as_index=False).agg(
+        total_cost=("total_cost", "sum"), pedidos=("pedidos", "sum"),
+        atendidos=("atendidos", "sum"), semanas=("semanas", "max"),
+    )
+    nivel_servicio = (por_equipo["atendidos"] / por_equipo["pedidos"] * 100).where(por_equipo["pedidos"] > 0, 100)
+    costo_referencia = por_equipo["team_id"].map(
+        costo_optimo_equipos(dict(zip(por_equipo["team_id"], por_equipo["semanas"])), semestre)
+    )
+    sobre_referencia = ((por_equipo["total_cost"] / costo_referencia - 1) * 100).where(costo_referencia > 0)
+    kpis = pd.DataFrame({
+        "team_id": por_equipo["team_id"],
+        "Equipo": por_equipo["team_name"],
+        "Costo Total": por_equipo["total_cost"].round(2),
+        "Costo Referencia Nivel Base": costo_referencia.round(2),
+        "% sobre Referencia": sobre_referencia.round(1),
+        "Nivel Servicio (%)": nivel_servicio.round(2)
+    })
+
+    std_por_rol = resumen.pivot(index="team_id", columns="role", values="std_pedidos").reindex(columns=ROLES)
+    return kpis, std_por_rol
@@ -1,211 +1,152 @@
 import streamlit as st
-import sqlite3
-import uuid
+
+from bots import jugar_bots
+from motor import ROLES
+from notificaciones import obtener_vigilante
+from parametros import obtener_parametros
+from partida import (
+    buscar_jugador, obtener_estado_actual, obtener_plantel, obtener_semana_actual, registrar_decision
+)
 
 # ========================
 # CONFIGURACIÓN
 # ========================
+INTERVALO_ESPERA = 3  # segundos entre comprobaciones mientras se espera al equipo
+
 st.set_page_config(page_title="The Beer Game - Jugar", layout="centered")
 st.title("🚚 The Beer Game - Ronda Semanal")
 
 # ========================
-# FUNCIONES
+# SESIÓN DEL JUGADOR
 # ========================
-def conectar_db():
-    return sqlite3.connect("beer_game.db")
-
-def obtener_jugadores_por_equipo():
-    conn = conectar_db()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT t.team_id, t.team_name, p.name, p.role
-        FROM players p
-        JOIN teams t ON p.team_id = t.team_id
-    """)
-    data = cursor.fetchall()
-    conn.close()
-    return data
-
-def obtener_estado_actual(team_id, role):
-    conn = conectar_db()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT week, stock, backorder, incoming_order, incoming_shipment
-        FROM rounds
-        WHERE team_id = ? AND role = ?
-        ORDER BY week DESC LIMIT 1
-    """, (team_id, role))
-    data = cursor.fetchone()
-    conn.close()
-    return data
-
-def obtener_semana_actual(team_id):
-    conn = conectar_db()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT MAX(week) FROM rounds WHERE team_id = ?
-    """, (team_id,))
-    semana = cursor.fetchone()[0]
-    conn.close()
-    return semana if semana else 1
-
-def equipo_esta_completo(team_id):
-    conn = conectar_db()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT COUNT(DISTINCT role) FROM players WHERE team_id = ?
-    """, (team_id,))
-    count = cursor.fetchone()[0]
-    conn.close()
-    return count == 4
-
-def equipo_completo_para_semana(team_id, semana):
-    conn = conectar_db()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT COUNT(DISTINCT role)
-        FROM rounds
-        WHERE team_id = ? AND week = ?
-    """, (team_id, semana))
-    conteo = cursor.fetchone()[0]
-    conn.close()
-    return conteo == 4
-
-def registrar_decision(team_id, role, semana, stock, backorder, pedido_recibido, envio_recibido, pedido_proveedor, envio_cliente):
-    conn = conectar_db()
-    cursor = conn.cursor()
-    round_id = str(uuid.uuid4())
-    total_cost = 0
-    cursor.execute("""
-        INSERT INTO rounds (
-            round_id, team_id, week, role,
-            stock, backorder, incoming_order, incoming_shipment,
-            placed_order, sent_shipment, total_cost
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    """, (
-        round_id, team_id, semana, role,
-        stock, backorder, pedido_recibido, envio_recibido,
-        pedido_proveedor, envio_cliente, total_cost
-    ))
-    conn.commit()
-    conn.close()
-
-def procesar_avance_semana(team_id, semana_actual):
-    conn = conectar_db()
-    cursor = conn.cursor()
-
-    cursor.execute("""
-        SELECT role, placed_order, sent_shipment, stock, backorder
-        FROM rounds
-        WHERE team_id = ? AND week = ?
-    """, (team_id, semana_actual))
-    data = cursor.fetchall()
-
-    decisiones = {row[0]: {
-        "pedido": row[1],
-        "envio": row[2],
-        "stock": row[3],
-        "backorder": row[4]
-    } for row in data}
-
-    roles = ["Retailer", "Distributor", "Wholesaler", "Factory"]
-
-    for i, rol in enumerate(roles):
-        envio_recibido = 0
-        if i < len(roles) - 1:
-            proveedor = roles[i + 1]
-            envio_recibido = decisiones[proveedor]["envio"]
-        else:
-            envio_recibido = 20  # Producción constante de fábrica
-
-        pedido_recibido = 0
-        if i > 0:
-            cliente = roles[i - 1]
-            pedido_recibido = decisiones[cliente]["pedido"]
-        else:
-            pedido_recibido = 15  # Demanda del cliente final
-
-        stock_anterior = decisiones[rol]["stock"]
-        backorder_anterior = decisiones[rol]["backorder"]
-        nuevo_stock = stock_anterior + envio_recibido - decisiones[rol]["envio"]
-        nuevo_backorder = max(0, backorder_anterior + pedido_recibido - (stock_anterior + envio_recibido))
-
-        nueva_semana = semana_actual + 1
-        nuevo_id = str(uuid.uuid4())
-
-        cursor.execute("""
-            INSERT INTO rounds (
-                round_id, team_id, week, role,
-                stock, backorder, incoming_order, incoming_shipment,
-                placed_order, sent_shipment, total_cost
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            nuevo_id, team_id, nueva_semana, rol,
-            max(0, nuevo_stock), nuevo_backorder,
-            pedido_recibido, envio_recibido,
-            0, 0, 0
-        ))
-
-    conn.commit()
-    conn.close()
+# Al validarse, el equipo, el rol, la semana y el estado quedan en
+# st.session_state["jugador"]: las recargas no vuelven a consultar la base y
+# registrar una decisión es una sola escritura. La semana y el estado se leen
+# de nuevo solo cuando el equipo avanza.
+def cargar_semana(jugador):
+    # Los parámetros se releen en la primera semana, antes de quedar fijos
+    semana = obtener_semana_actual(jugador["team_id"])
+    parametros = obtener_parametros(jugador["team_id"], recargar=semana == 1)
+    estado = obtener_estado_actual(jugador["team_id"], jugador["rol"])
+    jugador.update(
+        semana=estado[0],
+        primera=estado[0] == 1,
+        estado=estado,
+        weeks_total=parametros.weeks_total,
+    )
+
+def cerrar_sesion():
+    for clave in ("jugador", "esperando_semana", "semana_lista", "avisos", "error_decision"):
+        st.session_state.pop(clave, None)
 
 # ========================
 # INTERFAZ
 # ========================
-jugadores = obtener_jugadores_por_equipo()
-equipos_unicos = list(set((j[0], j[1]) for j in jugadores))
+jugador = st.session_state.get("jugador")
 
-st.subheader("🎯 Paso 1: Selección de jugador")
-equipo_nombre = st.selectbox("Selecciona tu equipo", [e[1] for e in equipos_unicos])
-nombre_jugador = st.text_input("Tu nombre registrado")
-rol = st.selectbox("Selecciona tu rol", ["Retailer", "Distributor", "Wholesaler", "Factory"])
-boton_validar = st.button("Validar jugador")
+if jugador is None:
+    # La lista de equipos se relee al mostrar el ingreso: pudieron crearse desde otro proceso
+    plantel = obtener_plantel(recargar=True)
 
-if boton_validar:
-    equipo_id = [e[0] for e in equipos_unicos if e[1] == equipo_nombre][0]
-    jugador_valido = any(j[0] == equipo_id and j[2].lower() == nombre_jugador.lower() and j[3] == rol for j in jugadores)
+    st.subheader("🎯 Paso 1: Selección de jugador")
+    with st.form("validar_jugador"):
+        equipo_id = st.selectbox("Selecciona tu equipo", list(plantel.equipos), format_func=plantel.equipos.get)
+        nombre_jugador = st.text_input("Tu nombre registrado")
+        rol = st.selectbox("Selecciona tu rol", ROLES)
+        boton_validar = st.form_submit_button("Validar jugador")
 
-    if not jugador_valido:
+    if not boton_validar:
+        st.stop()
+
+    registrado, completo, con_bots = buscar_jugador(equipo_id, nombre_jugador, rol)
+    if not registrado:
         st.error("❌ No se encontró tu registro. Verifica tu nombre, equipo y rol.")
         st.stop()
 
-    if not equipo_esta_completo(equipo_id):
+    if not completo:
         st.warning("⏳ Aún no se han registrado los 4 jugadores. El juego comenzará cuando el equipo esté completo.")
         st.stop()
 
-    semana_actual = obtener_semana_actual(equipo_id)
-    if semana_actual > 15:
-        st.warning("🏁 El juego ha finalizado. Se completaron las 15 rondas.")
-        st.stop()
+    jugador = {
+        "team_id": equipo_id, "equipo": plantel.equipos[equipo_id],
+        "nombre": nombre_jugador, "rol": rol, "con_bots": con_bots,
+    }
+    cargar_semana(jugador)
+    st.session_state["jugador"] = jugador
+    st.rerun()  # Sin el formulario de validación
+
+for aviso in st.session_state.pop("avisos", []):
+    st.success(aviso)
+if "error_decision" in st.session_state:
+    st.error(st.session_state.pop("error_decision"))
 
-    st.success(f"✅ Bienvenido {nombre_jugador}, rol: {rol}, equipo: {equipo_nombre}")
-    st.header(f"📅 Semana {semana_actual}")
+if "semana_lista" in st.session_state:
+    cargar_semana(jugador)
+    st.success(f"🔔 Tu equipo ya está en la semana {st.session_state.pop('semana_lista')}.")
 
-    estado = obtener_estado_actual(equipo_id, rol)
-    if estado:
-        st.info(f"📦 Stock: {estado[1]} | 🔁 Backorder: {estado[2]} | 📥 Pedido recibido: {estado[3]} | 📦 Envío recibido: {estado[4]}")
-    else:
-        st.warning("Esta es tu primera semana. No hay historial previo.")
-        # Simulación inicial (stock base)
-        estado = (semana_actual, 10, 0, 0, 0)
+st.success(f"✅ Bienvenido {jugador['nombre']}, rol: {jugador['rol']}, equipo: {jugador['equipo']}")
+st.button("Cambiar de jugador", on_click=cerrar_sesion)
 
+semana_actual = jugador["semana"]
+if semana_actual > jugador["weeks_total"]:
+    st.warning(f"🏁 El juego ha finalizado. Se completaron las {jugador['weeks_total']} rondas.")
+    st.stop()
+
+st.header(f"📅 Semana {semana_actual}")
+
+estado = jugador["estado"]
+if jugador["primera"]:
+    st.warning("Esta es tu primera semana. No hay historial previo.")
+else:
+    st.info(f"📦 Stock: {estado[1]} | 🔁 Backorder: {estado[2]} | 📥 Pedido recibido: {estado[3]} | 📦 Envío recibido: {estado[4]}")
+
+if "esperando_semana" not in st.session_state:
     st.subheader("✍️ Ingresar decisiones de esta semana")
-    pedido_proveedor = st.number_input("📤 Pedido al proveedor", min_value=0, step=1)
-    envio_cliente = st.number_input("📦 Envío al siguiente jugador", min_value=0, step=1)
-    confirmar = st.button("Registrar decisiones")
+    with st.form("decisiones", clear_on_submit=True):
+        pedido_proveedor = st.number_input("📤 Pedido al proveedor", min_value=0, step=1)
+        envio_cliente = st.number_input("📦 Envío al siguiente jugador", min_value=0, step=1)
+        confirmar = st.form_submit_button("Registrar decisiones")
 
     if confirmar:
-        registrar_decision(
-            equipo_id, rol, semana_actual,
+        semana_cerrada = registrar_decision(
+            jugador["team_id"], jugador["rol"], semana_actual,
             estado[1], estado[2], estado[3], estado[4],
             pedido_proveedor, envio_cliente
         )
-
-        st.success("✅ Decisiones registradas para esta semana.")
-
-        if equipo_completo_para_semana(equipo_id, semana_actual):
-            st.success(f"✅ Todos los jugadores han registrado decisiones para la semana {semana_actual}.")
-            procesar_avance_semana(equipo_id, semana_actual)
-            st.info("🔄 El sistema ha procesado la lógica para la próxima semana.")
+        if semana_cerrada is None:
+            # La semana se cerró antes de este envío (p. ej., desde otra pestaña): no se guardó nada
+            st.session_state["error_decision"] = (f"❌ La semana {semana_actual} ya estaba cerrada y tu decisión "
+                                                  "no se registró. Revisa el estado actual y vuelve a decidir.")
+            st.session_state["semana_lista"] = obtener_semana_actual(jugador["team_id"])
+            st.rerun()
+
+        # Los bots del equipo deciden en cuanto les toca; si cierran la semana, se avisa aquí mismo
+        if jugador["con_bots"] and jugar_bots(jugador["team_id"]) and not semana_cerrada:
+            semana_cerrada = obtener_semana_actual(jugador["team_id"]) > semana_actual
+
+        avisos = ["✅ Decisiones registradas para esta semana."]
+        if semana_cerrada:
+            avisos += [f"✅ Todos los jugadores han registrado decisiones para la semana {semana_actual}.",
+                       "🔄 El sistema ha procesado la lógica para la próxima semana."]
+            st.session_state["semana_lista"] = semana_actual + 1
         else:
-            st.info("⏳ Esperando a que los demás jugadores registren sus decisiones.")
+            st.session_state["esperando_semana"] = (jugador["team_id"], semana_actual)
+        st.session_state["avisos"] = avisos
+        st.rerun()
+
+# ========================
+# ESPERA DEL AVANCE DE SEMANA
+# ========================
+# El fragmento se reejecuta solo cada pocos segundos y consulta al vigilante en
+# memoria; la página completa se recarga únicamente cuando el equipo avanza.
+@st.fragment(run_every=INTERVALO_ESPERA)
+def esperar_avance_semana(team_id, semana):
+    semana_equipo = obtener_vigilante(team_id=team_id).semana(team_id)
+    if semana_equipo > semana:
+        del st.session_state["esperando_semana"]
+        st.session_state["semana_lista"] = semana_equipo
+        st.rerun(scope="app")
+    st.info("⏳ Esperando a que los demás jugadores registren sus decisiones.")
+
+if "esperando_semana" in st.session_state:
+    esperar_avance_semana(*st.session_state["esperando_semana"])
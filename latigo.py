@@ -0,0 +1,203 @@
+import argparse
+import time
+from typing import NamedTuple
+
+import numpy as np
+
+from base_datos import leer_en_todos
+from metricas import medir
+from motor import ROLES
+
+# ========================
+# ANÁLISIS DEL EFECTO LÁTIGO
+# ========================
+# Todas las métricas salen de un solo arreglo alineado (equipos x semanas x
+# series), con el mismo orden de ejes que motor.Trayectoria: la serie 0 es la
+# demanda del cliente y las 1..4 los pedidos de cada rol. Los equipos con
+# menos semanas se rellenan con NaN y cada cálculo ignora esas celdas, así un
+# semestre completo se procesa en una pasada sin recorrer equipo por equipo.
+REZAGO_MAX = 4  # Semanas de retraso probadas en la correlación cruzada
+ETAPAS = [f"{rol}/{anterior}" for anterior, rol in zip(["Demanda"] + ROLES[:-1], ROLES)]
+
+
+class AnalisisLatigo(NamedTuple):
+    amplificacion: np.ndarray        # (N, 4) Var(pedidos del rol) / Var(pedidos que recibe)
+    amplificacion_total: np.ndarray  # (N,) Var(pedidos de fábrica) / Var(demanda)
+    rezago: np.ndarray               # (N, 4) semanas con la mayor correlación entre etapas
+    correlacion: np.ndarray          # (N, 4) correlación en ese rezago
+    pico: np.ndarray                 # (N, 4) pedido máximo de cada rol
+    semana_pico: np.ndarray          # (N, 4) semana (desde 1) del pedido máximo
+    periodo: np.ndarray              # (N, 4) semanas por ciclo (cruces por la media)
+
+
+def _dividir(a, b):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(b > 0, a / np.where(b > 0, b, 1), np.nan)
+
+
+def _varianza(x, validos):
+    n = validos.sum(axis=1)
+    media = _dividir(np.where(validos, x, 0).sum(axis=1), n)
+    desvios = np.where(validos, x - np.expand_dims(media, 1), 0)
+    return _dividir((desvios ** 2).sum(axis=1), n - 1), media, n
+
+
+def _correlacion(x, y):
+    """Pearson sobre el eje de semanas, solo donde ambas series tienen dato."""
+    validos = ~(np.isnan(x) | np.isnan(y))
+    n = validos.sum(axis=1)
+    dx = np.where(validos, x - np.expand_dims(_dividir(np.where(validos, x, 0).sum(axis=1), n), 1), 0)
+    dy = np.where(validos, y - np.expand_dims(_dividir(np.where(validos, y, 0).sum(axis=1), n), 1), 0)
+    return _dividir((dx * dy).sum(axis=1), np.sqrt((dx ** 2).sum(axis=1) * (dy ** 2).sum(axis=1)))
+
+
+def analizar_latigo(demanda, pedidos, rezago_max=REZAGO_MAX):
+    """`demanda` (N, T) y `pedidos` (N, T, 4), con NaN en las semanas sin dato."""
+    series = np.concatenate([np.asarray(demanda, dtype=float)[:, :, None],
+                             np.asarray(pedidos, dtype=float)], axis=2)
+    validos = ~np.isnan(series)
+    varianza, media, n = _varianza(series, validos)
+
+    # Correlación entre cada etapa y la siguiente aguas arriba, con rezagos 0..rezago_max
+    semanas = series.shape[1]
+    correlaciones = np.stack([
+        _correlacion(series[:, :semanas - r, :-1], series[:, r:, 1:])
+        for r in range(min(rezago_max, max(semanas - 2, 0)) + 1)
+    ], axis=1)
+    sin_dato = np.isnan(correlaciones).all(axis=1)
+    mejor = np.where(np.isnan(correlaciones), -np.inf, correlaciones).argmax(axis=1)
+    correlacion = np.take_along_axis(correlaciones, mejor[:, None, :], axis=1)[:, 0, :]
+
+    pedidos = series[:, :, 1:]
+    validos_pedidos = validos[:, :, 1:]
+    con_dato = validos_pedidos.any(axis=1)
+    semana_pico = np.where(validos_pedidos, pedidos, -np.inf).argmax(axis=1) + 1
+
+    # Periodo de oscilación: dos cruces por la media por ciclo
+    arriba = pedidos > np.expand_dims(media[:, 1:], 1)
+    cruces = ((arriba[:, 1:] != arriba[:, :-1]) & validos_pedidos[:, 1:] & validos_pedidos[:, :-1]).sum(axis=1)
+
+    return AnalisisLatigo(
+        amplificacion=_dividir(varianza[:, 1:], varianza[:, :-1]),
+        amplificacion_total=_dividir(varianza[:, -1], varianza[:, 0]),
+        rezago=np.where(sin_dato, np.nan, mejor),
+        correlacion=np.where(sin_dato, np.nan, correlacion),
+        pico=np.where(con_dato, np.where(validos_pedidos, pedidos, -np.inf).max(axis=1), np.nan),
+        semana_pico=np.where(con_dato, semana_pico, np.nan),
+        periodo=_dividir(2 * (n[:, 1:] - 1), cruces),
+    )
+
+
+# ========================
+# DATOS: BASE VIVA O ARCHIVO
+# ========================
+COLUMNAS = ["team_id", "role", "week", "incoming_order", "placed_order"]
+
+
+def armar_cubo(df):
+    """Filas de rounds -> (team_ids, demanda (N, T), pedidos (N, T, 4)) de las semanas cerradas.
+
+    La última semana de cada equipo es la que está en curso. Al cerrar la
+    semana w el motor deja la demanda del cliente como pedido recibido por el
+    minorista en la fila w + 1, así que la demanda sale de esa fila.
+    """
+    import pandas as pd
+
+    codigos, equipos = pd.factorize(df["team_id"], sort=True)
+    rol = df["role"].map({r: i for i, r in enumerate(ROLES)}).to_numpy()
+    semana = df["week"].to_numpy(dtype=np.int64) - 1
+    cerrada = semana < df.groupby("team_id")["week"].transform("max").to_numpy() - 1
+    semanas = int(semana.max()) if len(df) else 0
+
+    pedidos = np.full((len(equipos), semanas, len(ROLES)), np.nan)
+    pedidos[codigos[cerrada], semana[cerrada], rol[cerrada]] = df["placed_order"].to_numpy(dtype=float)[cerrada]
+    demanda = np.full((len(equipos), semanas), np.nan)
+    minorista = (rol == 0) & (semana > 0)
+    demanda[codigos[minorista], semana[minorista] - 1] = df["incoming_order"].to_numpy(dtype=float)[minorista]
+    return list(equipos), demanda, pedidos
+
+
+def _leer_rounds(conn):
+    import pandas as pd
+
+    return pd.read_sql_query("""
+        SELECT r.team_id, t.team_name, r.role, r.week, r.incoming_order, r.placed_order
+        FROM rounds r
+        JOIN teams t ON t.team_id = r.team_id
+    """, conn)
+
+
+def _version(conn):
+    return conn.execute("SELECT COUNT(*), COALESCE(SUM(week), 0) FROM team_progress").fetchone()
+
+
+def version_datos():
+    """Cambia cuando algún equipo cierra una semana (clave de caché del análisis)."""
+    return tuple(leer_en_todos(_version))
+
+
+def leer_rounds(semestre=None):
+    """Rounds de la base viva (todos sus archivos) o de un semestre archivado."""
+    import pandas as pd
+
+    if semestre is None:
+        partes = leer_en_todos(_leer_rounds)
+        return partes[0] if len(partes) == 1 else pd.concat(partes, ignore_index=True)
+
+    from archivo import leer_archivo
+
+    df = leer_archivo("rounds", semestre, columnas=COLUMNAS)
+    nombres = leer_archivo("teams", semestre, columnas=["team_id", "team_name"])
+    return df.merge(nombres, on="team_id", how="left")
+
+
+@medir
+def tabla_latigo(semestre=None):
+    """Una fila por equipo con las métricas del efecto látigo, lista para mostrar."""
+    import pandas as pd
+
+    df = leer_rounds(semestre)
+    equipos, demanda, pedidos = armar_cubo(df)
+    # Los equipos que no cerraron ninguna semana no tienen nada que medir
+    jugados = ~np.isnan(pedidos).all(axis=(1, 2))
+    equipos = [equipo for equipo, jugado in zip(equipos, jugados) if jugado]
+    if not equipos:
+        return pd.DataFrame(columns=["team_id", "Equipo"])
+    analisis = analizar_latigo(demanda[jugados], pedidos[jugados])
+    nombres = df.drop_duplicates("team_id").set_index("team_id")["team_name"]
+
+    tabla = pd.DataFrame({"team_id": equipos, "Equipo": nombres.reindex(equipos).to_numpy()})
+    tabla["Amplificación total"] = analisis.amplificacion_total
+    for i, etapa in enumerate(ETAPAS):
+        tabla[f"Amplificación {etapa}"] = analisis.amplificacion[:, i]
+    for i, etapa in enumerate(ETAPAS):
+        tabla[f"Rezago {etapa}"] = analisis.rezago[:, i]
+        tabla[f"Correlación {etapa}"] = analisis.correlacion[:, i]
+    for i, rol in enumerate(ROLES):
+        tabla[f"Pico {rol}"] = analisis.pico[:, i]
+        tabla[f"Semana pico {rol}"] = analisis.semana_pico[:, i]
+        tabla[f"Periodo {rol}"] = analisis.periodo[:, i]
+    return tabla
+
+
+# ========================
+# CLI
+# ========================
+def main():
+    parser = argparse.ArgumentParser(description="Métricas del efecto látigo de todos los equipos")
+    parser.add_argument("--semestre", default=None, help="Semestre archivado; por defecto, la base viva")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    tabla = tabla_latigo(args.semestre)
+    duracion = time.perf_counter() - inicio
+    if tabla.empty:
+        print("⚠️ No hay semanas cerradas para analizar.")
+        return
+    columnas = ["Equipo", "Amplificación total"] + [f"Amplificación {etapa}" for etapa in ETAPAS]
+    print(tabla[columnas].round(2).to_string(index=False))
+    print(f"✅ {len(tabla)} equipos analizados en {duracion * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+import atexit
+import bisect
+import functools
+import json
+import os
+import socket
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+
+# ========================
+# CONFIGURACIÓN
+# ========================
+# Instrumentación opcional: BEER_GAME_METRICAS=1 la activa al iniciar el
+# proceso. Desactivada, `medir` devuelve la función sin envolver y `cronometro`
+# un contexto vacío, así el costo es prácticamente nulo.
+ACTIVAS = os.environ.get("BEER_GAME_METRICAS", "") not in ("", "0")
+RUTA_PROMETHEUS = os.environ.get("BEER_GAME_METRICAS_PROM")  # Archivo de texto opcional
+INTERVALO_VOLCADO = 30  # segundos
+LIMITES_MS = [1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+PROCESO = f"{socket.gethostname()}:{os.getpid()}"
+# Fila de `metrics` que marca el último borrado: cada proceso que empezó a
+# medir antes de esa fecha reinicia sus acumulados en su próximo volcado (se
+# pierde también lo medido entre el borrado y ese volcado, a lo sumo
+# INTERVALO_VOLCADO segundos)
+MARCA_REINICIO = "reinicio"
+FORMATO_FECHA = "%Y-%m-%d %H:%M:%S.%f"
+
+
+# ========================
+# REGISTRO EN MEMORIA
+# ========================
+class Histograma:
+    """Latencias de una operación: cubetas fijas (LIMITES_MS más +Inf), suma y errores."""
+
+    def __init__(self):
+        self.cubetas = [0] * (len(LIMITES_MS) + 1)
+        self.conteo = 0
+        self.suma_ms = 0.0
+        self.errores = 0
+
+    def observar(self, ms, error=False):
+        self.cubetas[bisect.bisect_left(LIMITES_MS, ms)] += 1
+        self.conteo += 1
+        self.suma_ms += ms
+        self.errores += error
+
+
+_histogramas = {}
+_lock = threading.Lock()
+_volcador = None
+_desde = datetime.now().strftime(FORMATO_FECHA)  # Inicio de los acumulados de este proceso
+_reintentos_previos = 0                           # Reintentos por bloqueo anteriores a _desde
+
+
+def observar(operacion, ms, error=False):
+    with _lock:
+        histograma = _histogramas.get(operacion)
+        if histograma is None:
+            histograma = _histogramas[operacion] = Histograma()
+            _iniciar_volcador()
+        histograma.observar(ms, error)
+
+
+def medir(funcion):
+    """Decorador: mide cada llamada con el nombre de la función (solo si ACTIVAS)."""
+    if not ACTIVAS:
+        return funcion
+
+    @functools.wraps(funcion)
+    def medida(*args, **kwargs):
+        inicio = time.perf_counter()
+        error = True
+        try:
+            resultado = funcion(*args, **kwargs)
+            error = False
+            return resultado
+        finally:
+            observar(funcion.__name__, (time.perf_counter() - inicio) * 1000, error)
+
+    return medida
+
+
+@contextmanager
+def _cronometro(operacion):
+    inicio = time.perf_counter()
+    error = True
+    try:
+        yield
+        error = False
+    finally:
+        observar(operacion, (time.perf_counter() - inicio) * 1000, error)
+
+
+def cronometro(operacion):
+    """Contexto para medir un bloque de código que no es una función propia."""
+    return _cronometro(operacion) if ACTIVAS else nullcontext()
+
+
+def leer_memoria():
+    """Copia de los histogramas del proceso: {operación: (cubetas, conteo, suma_ms, errores)}."""
+    with _lock:
+        return {op: (list(h.cubetas), h.conteo, h.suma_ms, h.errores) for op, h in _histogramas.items()}
+
+
+def percentil(cubetas, q):
+    """Estimación por arriba: límite de la cubeta donde el acumulado alcanza q."""
+    total = sum(cubetas)
+    if total == 0:
+        return None
+    acumulado = 0
+    for limite, n in zip(LIMITES_MS + [float("inf")], cubetas):
+        acumulado += n
+        if acumulado >= q * total:
+            return limite
+    return float("inf")
+
+
+# ========================
+# VOLCADO A SQLITE Y PROMETHEUS
+# ========================
+def volcar():
+    """Guarda los acumulados de este proceso en `metrics` (una fila por operación)."""
+    from base_datos import conectar_db, reintentos_por_bloqueo
+
+    fecha = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    with conectar_db() as conn:
+        marca = conn.execute("""
+            SELECT recorded_at FROM metrics WHERE process = ? AND operation = ?
+        """, (MARCA_REINICIO, MARCA_REINICIO)).fetchone()
+        if marca and marca[0] > _desde:
+            reiniciar(marca[0])  # Otro proceso borró las métricas
+        datos = leer_memoria()
+        datos["reintentos_bloqueo"] = ([0] * (len(LIMITES_MS) + 1),
+                                       reintentos_por_bloqueo() - _reintentos_previos, 0.0, 0)
+        conn.executemany("""
+            INSERT INTO metrics (process, operation, recorded_at, count, errors, sum_ms, buckets)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (process, operation) DO UPDATE SET
+                recorded_at = excluded.recorded_at,
+                count = excluded.count,
+                errors = excluded.errors,
+                sum_ms = excluded.sum_ms,
+                buckets = excluded.buckets
+        """, [(PROCESO, op, fecha, conteo, errores, suma_ms, json.dumps(cubetas))
+              for op, (cubetas, conteo, suma_ms, errores) in datos.items()])
+    if RUTA_PROMETHEUS:
+        escribir_prometheus(RUTA_PROMETHEUS, datos)
+
+
+def escribir_prometheus(ruta, datos):
+    """Formato de texto de Prometheus; se reemplaza el archivo de forma atómica."""
+    lineas = ["# TYPE beer_game_operacion_ms histogram"]
+    for op, (cubetas, conteo, suma_ms, errores) in sorted(datos.items()):
+        if op == "reintentos_bloqueo":
+            continue
+        acumulado = 0
+        for limite, n in zip([str(l) for l in LIMITES_MS] + ["+Inf"], cubetas):
+            acumulado += n
+            lineas.append(f'beer_game_operacion_ms_bucket{{operacion="{op}",le="{limite}"}} {acumulado}')
+        lineas.append(f'beer_game_operacion_ms_sum{{operacion="{op}"}} {suma_ms:.3f}')
+        lineas.append(f'beer_game_operacion_ms_count{{operacion="{op}"}} {conteo}')
+    lineas.append("# TYPE beer_game_errores_total counter")
+    lineas += [f'beer_game_errores_total{{operacion="{op}"}} {d[3]}' for op, d in sorted(datos.items())
+               if op != "reintentos_bloqueo"]
+    lineas.append("# TYPE beer_game_reintentos_bloqueo_total counter")
+    lineas.append(f"beer_game_reintentos_bloqueo_total {datos['reintentos_bloqueo'][1]}")
+    temporal = f"{ruta}.tmp"
+    with open(temporal, "w") as archivo:
+        archivo.write("\n".join(lineas) + "\n")
+    os.replace(temporal, ruta)
+
+
+def reiniciar(desde=None):
+    """Vacía los acumulados de este proceso; los reintentos por bloqueo se cuentan desde aquí."""
+    global _desde, _reintentos_previos
+    from base_datos import reintentos_por_bloqueo
+
+    with _lock:
+        _histogramas.clear()
+        _desde = desde or datetime.now().strftime(FORMATO_FECHA)
+        _reintentos_previos = reintentos_por_bloqueo()
+
+
+def borrar_todas():
+    """Borra `metrics` de todos los procesos y deja la marca para que ninguno reescriba lo anterior."""
+    from base_datos import conectar_db
+
+    fecha = datetime.now().strftime(FORMATO_FECHA)
+    with conectar_db() as conn:
+        conn.execute("DELETE FROM metrics")
+        conn.execute("""
+            INSERT INTO metrics (process, operation, recorded_at, count, errors, sum_ms, buckets)
+            VALUES (?, ?, ?, 0, 0, 0, '[]')
+        """, (MARCA_REINICIO, MARCA_REINICIO, fecha))
+    reiniciar(fecha)
+
+
+def _iniciar_volcador():
+    # Se llama con _lock tomado, la primera vez que se registra una operación
+    global _volcador
+    if _volcador is not None:
+        return
+
+    def volcar_periodicamente():
+        while True:
+            time.sleep(INTERVALO_VOLCADO)
+            try:
+                volcar()
+            except Exception:
+                pass  # Las métricas nunca interrumpen el juego
+
+    _volcador = threading.Thread(target=volcar_periodicamente, name="volcador-metricas", daemon=True)
+    _volcador.start()
+    atexit.register(volcar)
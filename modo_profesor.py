@@ -1,9 +1,21 @@
 import streamlit as st
-import sqlite3
+import os
+import tempfile
 import pandas as pd
-import matplotlib.pyplot as plt
 from io import BytesIO
 
+from archivo import archivar, leer_archivo, semestre_actual, semestres_archivados
+from base_datos import leer_en_todos
+from bots import asignar_bots, jugar_bots
+from estadisticas import leer_resumen
+from exportacion import exportar_historial_excel, exportar_historial_csv, exportar_historial_parquet
+from graficos import grafico_latigo_global
+from indicadores import calcular_kpis_equipos
+from latigo import ETAPAS, tabla_latigo, version_datos
+from motor import ROLES, STOCK_INICIAL, DEMANDA_CLIENTE, COSTO_INVENTARIO, COSTO_FALTANTE, SEMANAS_JUEGO
+from parametros import guardar_parametros
+from politicas import POLITICAS
+
 st.set_page_config(page_title="Modo Profesor - Beer Game", layout="wide")
 st.title("👨‍🏫 Modo Profesor - Resultados Globales")
 
@@ -15,59 +27,76 @@ if clave_ingresada != clave_correcta:
     st.warning("⚠️ Acceso restringido. Por favor ingrese la clave correcta.")
     st.stop()
 
-# Conexión a base de datos
-def conectar_db():
-    return sqlite3.connect("beer_game.db")
-
-# Reiniciar juego
-def reiniciar_juego():
-    conn = conectar_db()
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM rounds")
-    cursor.execute("DELETE FROM players")
-    conn.commit()
-    conn.close()
-
-# Botón de reinicio
-if st.sidebar.button("🔄 Reiniciar Juego"):
-    reiniciar_juego()
-    st.sidebar.success("✅ Juego reiniciado correctamente.")
-
-# Cargar todos los equipos
+# Archivar el semestre en lugar de borrar: los juegos pasan al archivo Parquet
+# y la base viva queda con los equipos que siguen jugando
+with st.sidebar.expander("📦 Archivar semestre"):
+    semestre_archivo = st.text_input("Semestre", value=semestre_actual())
+    incluir_todos = st.checkbox("Incluir juegos sin terminar (cierre de semestre)")
+    if st.button("Archivar"):
+        try:
+            equipos_archivo, filas_archivo = archivar(semestre_archivo, incluir_todos)
+            if equipos_archivo:
+                st.success(f"✅ {equipos_archivo} equipos ({filas_archivo:,} filas) archivados en {semestre_archivo}.")
+            else:
+                st.info("No hay juegos terminados para archivar.")
+        except ValueError as error:
+            st.error(f"❌ {error}")
+
+# Completar con bots los roles que ningún alumno eligió
 def cargar_equipos():
-    conn = conectar_db()
-    query = "SELECT team_id, team_name FROM teams"
-    df = pd.read_sql_query(query, conn)
-    conn.close()
-    return df
-
-# Obtener datos por equipo
-def obtener_datos_equipo(team_id):
-    conn = conectar_db()
-    query = """
-        SELECT week, role, stock, backorder, incoming_order, placed_order
-        FROM rounds
-        WHERE team_id = ?
-    """
-    df = pd.read_sql_query(query, conn, params=(team_id,))
-    conn.close()
-    return df
-
-# Calcular KPIs por equipo
-def calcular_kpis_equipo(df):
-    holding_cost, backorder_cost = 1, 2
-    df["inventory_cost"] = df["stock"] * holding_cost
-    df["backorder_cost"] = df["backorder"] * backorder_cost
-    df["total_cost"] = df["inventory_cost"] + df["backorder_cost"]
-
-    pedidos = df["incoming_order"].sum()
-    atendidos = (df["incoming_order"] - df["backorder"]).clip(lower=0).sum()
-    nivel_servicio = (atendidos / pedidos * 100) if pedidos > 0 else 100
-
-    return {
-        "Costo Total": df["total_cost"].sum(),
-        "Nivel Servicio (%)": nivel_servicio
-    }
+    partes = leer_en_todos(lambda conn: conn.execute("SELECT team_id, team_name FROM teams").fetchall())
+    return sorted((equipo for parte in partes for equipo in parte), key=lambda e: e[1] or "")
+
+equipos_sidebar = dict(cargar_equipos())
+
+with st.sidebar.expander("🤖 Bots para roles vacíos"):
+    equipos_bots = equipos_sidebar
+    if equipos_bots:
+        equipo_bots = st.selectbox("Equipo", list(equipos_bots), format_func=equipos_bots.get, key="equipo_bots")
+        politica_bots = st.selectbox("Política", list(POLITICAS))
+        if st.button("Completar con bots"):
+            roles_bots = asignar_bots(equipo_bots, politica_bots)
+            jugar_bots(equipo_bots)
+            if roles_bots:
+                st.success(f"✅ Bots asignados: {', '.join(roles_bots)}")
+            else:
+                st.info("El equipo ya tiene los 4 roles cubiertos.")
+
+# Parámetros de un equipo antes de que empiece (game_parameters y demands)
+with st.sidebar.expander("⚙️ Parámetros del juego"):
+    equipos_parametros = equipos_sidebar
+    if equipos_parametros:
+        equipo_parametros = st.selectbox("Equipo", list(equipos_parametros),
+                                         format_func=equipos_parametros.get, key="equipo_parametros")
+        stock_inicial = st.number_input("Stock inicial", min_value=0, value=STOCK_INICIAL)
+        lead_time = st.number_input("Semanas de tránsito de envíos", min_value=0, value=2)
+        delay_time = st.number_input("Semanas de tránsito de pedidos", min_value=0, value=2)
+        costo_inventario = st.number_input("Costo de inventario", min_value=0.0, value=float(COSTO_INVENTARIO))
+        costo_faltante = st.number_input("Costo de faltante", min_value=0.0, value=float(COSTO_FALTANTE))
+        semanas_total = st.number_input("Semanas de juego", min_value=1, value=SEMANAS_JUEGO)
+        demanda_base = st.number_input("Demanda inicial", min_value=0, value=DEMANDA_CLIENTE)
+        demanda_escalon = st.number_input("Demanda después del escalón", min_value=0, value=DEMANDA_CLIENTE)
+        semana_escalon = st.number_input("Semana del escalón", min_value=1, value=5)
+        if st.button("Guardar parámetros"):
+            demandas = [demanda_base if semana < semana_escalon else demanda_escalon
+                        for semana in range(1, semanas_total + 1)]
+            try:
+                guardar_parametros(equipo_parametros, stock_inicial, lead_time, delay_time,
+                                   costo_inventario, costo_faltante, semanas_total, demandas)
+                st.success("✅ Parámetros guardados.")
+            except ValueError as error:
+                st.error(f"❌ {error}")
+
+# Gráfico global renderizado una vez por cada estado de los datos (la clave es el propio resumen)
+@st.cache_data(max_entries=8, show_spinner=False)
+def grafico_latigo_global_png(std_por_rol, nombres):
+    return grafico_latigo_global(std_por_rol, nombres)
+
+# Análisis del efecto látigo: se recalcula solo cuando cambia la versión de los datos
+# (un equipo cierra una semana); lo archivado no cambia y se cachea por semestre
+@st.cache_data(max_entries=8, show_spinner=False)
+def cargar_latigo(version, semestre):
+    return tabla_latigo(semestre)
 
 # Exportar datos a Excel
 def exportar_excel(df):
@@ -78,25 +107,25 @@ def exportar_excel(df):
     return processed_data
 
 # Interfaz
+SEMESTRE_EN_CURSO = "En curso"
+semestre = st.selectbox("Semestre", [SEMESTRE_EN_CURSO] + semestres_archivados())
+en_curso = semestre == SEMESTRE_EN_CURSO
+
 st.subheader("📋 Tabla comparativa entre equipos")
-equipos = cargar_equipos()
-tabla_resumen = []
-
-for _, row in equipos.iterrows():
-    df_equipo = obtener_datos_equipo(row["team_id"])
-    if not df_equipo.empty:
-        kpis = calcular_kpis_equipo(df_equipo)
-        tabla_resumen.append({
-            "Equipo": row["team_name"],
-            "Costo Total": round(kpis["Costo Total"], 2),
-            "Nivel Servicio (%)": round(kpis["Nivel Servicio (%)"], 2)
-        })
-
-if tabla_resumen:
-    df_resumen = pd.DataFrame(tabla_resumen)
-    df_resumen = df_resumen.sort_values(by="Costo Total")
+resumen = leer_resumen() if en_curso else leer_archivo("resumen", semestre)
+
+if not resumen.empty:
+    # Cada configuración de juego se resuelve una vez por proceso (optimo.solucion_optima)
+    with st.spinner("Calculando el costo de referencia de cada configuración..."):
+        kpis_equipos, std_por_rol = calcular_kpis_equipos(resumen, None if en_curso else semestre)
+    df_resumen = kpis_equipos.drop(columns="team_id").sort_values(by="Costo Total")
     df_resumen["Ranking"] = range(1, len(df_resumen) + 1)
     st.dataframe(df_resumen.set_index("Ranking"))
+    st.caption("Costo Referencia Nivel Base: el menor costo entre la mejor política de nivel base "
+               "(un nivel por rol) y pasar el pedido, enviando siempre lo debido, con los mismos "
+               "parámetros y las mismas semanas jugadas. Con los retrasos por defecto suele ser pasar "
+               "el pedido. No es el mínimo posible: un equipo que envía más de lo que debe puede "
+               "quedar por debajo, con un % sobre Referencia negativo.")
 
     # Exportar Excel
     excel_data = exportar_excel(df_resumen)
@@ -107,20 +136,65 @@ if tabla_resumen:
         mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
     )
 
+    # Historial completo (solo la base viva; lo archivado ya está en Parquet):
+    # se genera a pedido en un archivo temporal
+    if en_curso:
+        formatos_historial = {
+            "Excel (una hoja por equipo)": (
+                ".xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                lambda ruta: exportar_historial_excel(ruta, df_resumen)
+            ),
+            "CSV": (".csv", "text/csv", exportar_historial_csv),
+            "Parquet": (".parquet", "application/octet-stream", exportar_historial_parquet),
+        }
+        formato = st.selectbox("Formato del historial completo", list(formatos_historial))
+        extension, mime, exportar = formatos_historial[formato]
+        if st.button("📦 Generar historial completo"):
+            ruta_anterior = st.session_state.pop("ruta_historial", None)
+            if ruta_anterior and os.path.exists(ruta_anterior):
+                os.remove(ruta_anterior)
+            descriptor, ruta = tempfile.mkstemp(suffix=extension)
+            os.close(descriptor)
+            exportar(ruta)
+            st.session_state["ruta_historial"] = ruta
+
+        ruta_historial = st.session_state.get("ruta_historial")
+        if ruta_historial and ruta_historial.endswith(extension) and os.path.exists(ruta_historial):
+            with open(ruta_historial, "rb") as archivo:
+                st.download_button(
+                    label="📥 Descargar historial completo",
+                    data=archivo,
+                    file_name=f"historial_beer_game{extension}",
+                    mime=mime
+                )
+
     # Gráfico del efecto látigo global
     st.subheader("📈 Gráfico del Efecto Látigo Global")
-    fig, ax = plt.subplots(figsize=(8,4))
-
-    for _, row in equipos.iterrows():
-        df_equipo = obtener_datos_equipo(row["team_id"])
-        if not df_equipo.empty:
-            std_pedidos = df_equipo.groupby("role")["placed_order"].std().reindex(["Retailer", "Distributor", "Wholesaler", "Factory"])
-            ax.plot(std_pedidos.index, std_pedidos.values, marker='o', label=row["team_name"])
-
-    ax.set_title("Efecto Látigo Global - Desviación STD de Pedidos")
-    ax.set_xlabel("Rol")
-    ax.set_ylabel("STD de Pedidos")
-    ax.legend(title="Equipos")
-    st.pyplot(fig)
+    nombres = kpis_equipos.set_index("team_id")["Equipo"].to_dict()
+    st.image(grafico_latigo_global_png(std_por_rol, nombres))
+
+    st.subheader("🌊 Análisis del efecto látigo")
+    latigo = cargar_latigo(version_datos() if en_curso else ("archivo", semestre), None if en_curso else semestre)
+    if latigo.empty:
+        st.info("Todavía no hay semanas cerradas para analizar.")
+    else:
+        st.caption("Amplificación: varianza de los pedidos de cada rol sobre la de los pedidos que recibe. "
+                   "Rezago: semanas (0 a 4) con la mayor correlación entre etapas. "
+                   "Periodo: semanas por ciclo de oscilación de los pedidos.")
+        columnas = ["Equipo", "Amplificación total"] + [f"Amplificación {etapa}" for etapa in ETAPAS]
+        st.dataframe(latigo[columnas].sort_values("Amplificación total", ascending=False).round(2),
+                     hide_index=True)
+
+        equipo_latigo = st.selectbox("Detalle por equipo", latigo.index, format_func=latigo["Equipo"].get)
+        fila = latigo.loc[equipo_latigo]
+        st.dataframe(pd.DataFrame({
+            "Etapa": ETAPAS,
+            "Amplificación": [fila[f"Amplificación {etapa}"] for etapa in ETAPAS],
+            "Rezago (semanas)": [fila[f"Rezago {etapa}"] for etapa in ETAPAS],
+            "Correlación": [fila[f"Correlación {etapa}"] for etapa in ETAPAS],
+            "Pedido pico": [fila[f"Pico {rol}"] for rol in ROLES],
+            "Semana pico": [fila[f"Semana pico {rol}"] for rol in ROLES],
+            "Periodo (semanas)": [fila[f"Periodo {rol}"] for rol in ROLES],
+        }).round(2), hide_index=True)
 else:
     st.warning("No hay suficientes datos para mostrar.")
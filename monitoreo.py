@@ -0,0 +1,93 @@
+import streamlit as st
+import json
+import pandas as pd
+
+from base_datos import conectar_db
+from metricas import ACTIVAS, INTERVALO_VOLCADO, LIMITES_MS, MARCA_REINICIO, borrar_todas, percentil, volcar
+
+st.set_page_config(page_title="Métricas - Beer Game", layout="wide")
+st.title("⏱️ Métricas de rendimiento")
+
+# Contraseña para acceder
+clave_correcta = "F@brizzio01"
+clave_ingresada = st.sidebar.text_input("🔐 Ingrese clave de profesor", type="password")
+
+if clave_ingresada != clave_correcta:
+    st.warning("⚠️ Acceso restringido. Por favor ingrese la clave correcta.")
+    st.stop()
+
+if not ACTIVAS:
+    st.info("La instrumentación está desactivada. Inicie el servidor con BEER_GAME_METRICAS=1 para medir; "
+            "abajo se muestran las métricas guardadas anteriormente.")
+
+# ========================
+# LECTURA Y AGREGACIÓN
+# ========================
+# Cada proceso guarda sus acumulados cada INTERVALO_VOLCADO segundos; este
+# proceso se vuelca al abrir la página para mostrar lo más reciente.
+def cargar_metricas():
+    with conectar_db() as conn:
+        filas = conn.execute("""
+            SELECT operation, process, recorded_at, count, errors, sum_ms, buckets FROM metrics
+            WHERE process != ?
+        """, (MARCA_REINICIO,)).fetchall()
+    agregadas = {}
+    for operacion, proceso, fecha, conteo, errores, suma_ms, cubetas in filas:
+        actual = agregadas.setdefault(operacion, {
+            "procesos": 0, "ultima": fecha, "conteo": 0, "errores": 0, "suma_ms": 0.0,
+            "cubetas": [0] * (len(LIMITES_MS) + 1),
+        })
+        actual["procesos"] += 1
+        actual["ultima"] = max(actual["ultima"], fecha)
+        actual["conteo"] += conteo
+        actual["errores"] += errores
+        actual["suma_ms"] += suma_ms
+        actual["cubetas"] = [a + b for a, b in zip(actual["cubetas"], json.loads(cubetas))]
+    return agregadas
+
+if ACTIVAS:
+    volcar()
+metricas = cargar_metricas()
+
+col_actualizar, col_borrar = st.columns(2)
+if col_actualizar.button("🔄 Actualizar"):
+    st.rerun()
+if col_borrar.button("🗑️ Borrar métricas"):
+    # Los demás procesos se reinician en su próximo volcado (metricas.MARCA_REINICIO)
+    borrar_todas()
+    st.success("✅ Métricas borradas en todos los procesos.")
+    st.stop()
+
+# ========================
+# RESUMEN POR OPERACIÓN
+# ========================
+reintentos = metricas.pop("reintentos_bloqueo", None)
+if reintentos:
+    st.metric("Reintentos por base bloqueada", reintentos["conteo"])
+
+if not metricas:
+    st.info("Todavía no hay métricas registradas.")
+    st.stop()
+
+st.caption(f"Percentiles estimados por cubetas (límite superior, ms). Volcado cada {INTERVALO_VOLCADO} s.")
+resumen = pd.DataFrame([{
+    "Operación": operacion,
+    "Llamadas": m["conteo"],
+    "Errores": m["errores"],
+    "Promedio (ms)": round(m["suma_ms"] / m["conteo"], 2) if m["conteo"] else None,
+    "p50 (ms)": percentil(m["cubetas"], 0.50),
+    "p95 (ms)": percentil(m["cubetas"], 0.95),
+    "p99 (ms)": percentil(m["cubetas"], 0.99),
+    "Total (s)": round(m["suma_ms"] / 1000, 2),
+    "Procesos": m["procesos"],
+    "Último volcado": m["ultima"],
+} for operacion, m in metricas.items()]).sort_values("Total (s)", ascending=False)
+st.dataframe(resumen, hide_index=True)
+
+# ========================
+# HISTOGRAMA
+# ========================
+operacion = st.selectbox("Histograma de latencias", resumen["Operación"])
+etiquetas = [f"≤{limite}" for limite in LIMITES_MS] + [f">{LIMITES_MS[-1]}"]
+st.bar_chart(pd.DataFrame({"Cubeta (ms)": etiquetas, "Llamadas": metricas[operacion]["cubetas"]}),
+             x="Cubeta (ms)", y="Llamadas")
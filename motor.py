@@ -0,0 +1,173 @@
+import numpy as np
+from typing import NamedTuple
+
+# ========================
+# CONSTANTES DEL MODELO
+# ========================
+ROLES = ["Retailer", "Distributor", "Wholesaler", "Factory"]
+STOCK_INICIAL = 10
+DEMANDA_CLIENTE = 15      # Demanda del cliente final
+PRODUCCION_FABRICA = 20   # Producción constante de fábrica
+COSTO_INVENTARIO = 1
+COSTO_FALTANTE = 2
+SEMANAS_JUEGO = 15
+
+
+# ========================
+# ESTRUCTURAS
+# ========================
+class ResultadoSemana(NamedTuple):
+    """Estado de N equipos x 4 roles al inicio de la semana siguiente."""
+    stock: np.ndarray
+    backorder: np.ndarray
+    pedido_recibido: np.ndarray
+    envio_recibido: np.ndarray
+    pipeline: np.ndarray
+    pipeline_pedidos: np.ndarray = None
+
+
+class Trayectoria(NamedTuple):
+    """Historial (N equipos, W semanas, 4 roles) con las columnas de `rounds`."""
+    stock: np.ndarray
+    backorder: np.ndarray
+    incoming_order: np.ndarray
+    incoming_shipment: np.ndarray
+    placed_order: np.ndarray
+    sent_shipment: np.ndarray
+
+
+# ========================
+# MOTOR VECTORIZADO
+# ========================
+def pipeline_vacio(n_equipos, retraso=0):
+    # Envíos en camino hacia cada uno de los 4 roles
+    return np.zeros((n_equipos, len(ROLES), retraso), dtype=np.int64)
+
+
+def pipeline_pedidos_vacio(n_equipos, retraso=0):
+    # Pedidos en camino hacia Distributor, Wholesaler y Factory
+    return np.zeros((n_equipos, len(ROLES) - 1, retraso), dtype=np.int64)
+
+
+def _pasar_por_pipeline(pipeline, entrada, semana):
+    """Anillo (N, R, L): devuelve lo que llega esta semana y guarda `entrada` en su ranura.
+
+    Lo que entra en la semana t sale en la t + L. Con L = 0 llega en la misma semana.
+    """
+    if pipeline is None or pipeline.shape[2] == 0:
+        return entrada
+    ranura = semana % pipeline.shape[2]
+    salida = pipeline[:, :, ranura].copy()
+    pipeline[:, :, ranura] = entrada
+    return salida
+
+
+def avanzar_semana(stock, backorder, pedidos, envios,
+                   demanda=DEMANDA_CLIENTE, produccion=PRODUCCION_FABRICA, pipeline=None,
+                   pipeline_pedidos=None, semana=0):
+    """Avanza una semana para N equipos a la vez.
+
+    `stock`, `backorder`, `pedidos` y `envios` son arreglos (N, 4) en el orden de
+    ROLES; `demanda` y `produccion` pueden ser escalares o arreglos (N,). Con
+    `produccion=None` la fábrica produce lo que ella misma pidió.
+    `pipeline` (N, 4, L) guarda los envíos en tránsito hacia cada rol y
+    `pipeline_pedidos` (N, 3, D) los pedidos en camino al proveedor. Son anillos
+    que se actualizan en el lugar (la ranura es `semana` módulo su largo), así
+    el costo por semana no depende del retraso: con L = 0 y D = 0 todo llega en
+    la misma semana, como en el juego en vivo.
+    """
+    stock = np.asarray(stock, dtype=np.int64)
+    backorder = np.asarray(backorder, dtype=np.int64)
+    pedidos = np.asarray(pedidos, dtype=np.int64)
+    envios = np.asarray(envios, dtype=np.int64)
+    if pipeline is None:
+        pipeline = pipeline_vacio(stock.shape[0])
+
+    # Cada rol recibe el pedido de su cliente y el envío de su proveedor
+    pedido_recibido = np.empty_like(pedidos)
+    pedido_recibido[:, 0] = demanda
+    pedido_recibido[:, 1:] = _pasar_por_pipeline(pipeline_pedidos, pedidos[:, :-1], semana)
+
+    envio_despachado = np.empty_like(envios)
+    envio_despachado[:, :-1] = envios[:, 1:]
+    envio_despachado[:, -1] = pedidos[:, -1] if produccion is None else produccion
+    envio_recibido = _pasar_por_pipeline(pipeline, envio_despachado, semana)
+
+    disponible = stock + envio_recibido
+    nuevo_stock = np.maximum(0, disponible - envios)
+    nuevo_backorder = np.maximum(0, backorder + pedido_recibido - disponible)
+
+    return ResultadoSemana(nuevo_stock, nuevo_backorder, pedido_recibido, envio_recibido,
+                           pipeline, pipeline_pedidos)
+
+
+def decisiones_fijas(pedidos, envios):
+    """Convierte arreglos (N, W, 4) de decisiones en una función para `simular`."""
+    pedidos = np.asarray(pedidos, dtype=np.int64)
+    envios = np.asarray(envios, dtype=np.int64)
+
+    def decidir(semana, estado):
+        return pedidos[:, semana], envios[:, semana]
+
+    return decidir
+
+
+def simular(n_equipos, semanas, decidir, stock_inicial=STOCK_INICIAL,
+            demanda=DEMANDA_CLIENTE, produccion=PRODUCCION_FABRICA, retraso=0, retraso_pedidos=0):
+    """Juega W semanas completas para N equipos.
+
+    `decidir(semana, estado)` recibe el índice de semana (desde 0) y el
+    ResultadoSemana vigente, y devuelve los arreglos (N, 4) de pedidos y envíos.
+    `demanda` puede ser un escalar, un arreglo (W,) o un arreglo (N, W).
+    `retraso` y `retraso_pedidos` son las semanas en tránsito de envíos y pedidos.
+    """
+    forma = (n_equipos, semanas, len(ROLES))
+    historia = Trayectoria(*(np.zeros(forma, dtype=np.int64) for _ in Trayectoria._fields))
+
+    demanda = np.broadcast_to(np.asarray(demanda, dtype=np.int64), (n_equipos, semanas))
+    estado = ResultadoSemana(
+        np.full((n_equipos, len(ROLES)), stock_inicial, dtype=np.int64),
+        np.zeros((n_equipos, len(ROLES)), dtype=np.int64),
+        np.zeros((n_equipos, len(ROLES)), dtype=np.int64),
+        np.zeros((n_equipos, len(ROLES)), dtype=np.int64),
+        pipeline_vacio(n_equipos, retraso),
+        pipeline_pedidos_vacio(n_equipos, retraso_pedidos),
+    )
+
+    for t in range(semanas):
+        pedidos, envios = decidir(t, estado)
+        historia.stock[:, t] = estado.stock
+        historia.backorder[:, t] = estado.backorder
+        historia.incoming_order[:, t] = estado.pedido_recibido
+        historia.incoming_shipment[:, t] = estado.envio_recibido
+        historia.placed_order[:, t] = pedidos
+        historia.sent_shipment[:, t] = envios
+        estado = avanzar_semana(estado.stock, estado.backorder, pedidos, envios,
+                                demanda[:, t], produccion, estado.pipeline,
+                                estado.pipeline_pedidos, semana=t)
+
+    return historia
+
+
+# ========================
+# KPIs
+# ========================
+def kpis_trayectoria(historia, holding_cost=COSTO_INVENTARIO, backorder_cost=COSTO_FALTANTE):
+    """Mismas reglas de costo y servicio que `indicadores.calcular_kpis`.
+
+    Devuelve arreglos (N, 4) por equipo y rol.
+    """
+    costo_inventario = (historia.stock * holding_cost).sum(axis=1)
+    costo_faltantes = (historia.backorder * backorder_cost).sum(axis=1)
+
+    pedidos = historia.incoming_order.sum(axis=1)
+    atendidos = np.clip(historia.incoming_order - historia.backorder, 0, None).sum(axis=1)
+    nivel_servicio = np.where(pedidos > 0, atendidos / np.maximum(pedidos, 1) * 100, 100.0)
+
+    return {
+        "costo_total": costo_inventario + costo_faltantes,
+        "costo_inventario": costo_inventario,
+        "costo_faltantes": costo_faltantes,
+        "nivel_servicio": nivel_servicio,
+        "std_pedidos": historia.placed_order.std(axis=1, ddof=1),
+    }
@@ -0,0 +1,76 @@
+import threading
+from functools import lru_cache
+
+from base_datos import abrir_conexion, obtener_pool, rutas_almacen, ruta_equipo
+
+# ========================
+# VIGILANTE DE SEMANAS
+# ========================
+# Un solo hilo por proceso consulta PRAGMA data_version (no lee tablas) y solo
+# cuando otra conexión confirmó cambios relee team_progress, que tiene una
+# fila por equipo. Las sesiones preguntan al vigilante en memoria, sin tocar la
+# base de datos.
+INTERVALO_SONDEO = 1.0
+
+
+class VigilanteSemanas:
+    def __init__(self, ruta, intervalo=INTERVALO_SONDEO):
+        self.ruta = ruta
+        self.intervalo = intervalo
+        self._semanas = {}
+        self._condicion = threading.Condition()
+        self._detener = threading.Event()
+        self._hilo = threading.Thread(target=self._vigilar, name="vigilante-semanas", daemon=True)
+
+    def iniciar(self):
+        obtener_pool(self.ruta)  # aplica migraciones pendientes (team_progress)
+        self._conn = abrir_conexion(self.ruta)
+        self._data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        self._releer()
+        self._hilo.start()
+        return self
+
+    def detener(self):
+        self._detener.set()
+        self._hilo.join()
+
+    def semana(self, team_id):
+        """Semana en curso del equipo según la última lectura (1 si aún no avanzó)."""
+        with self._condicion:
+            return self._semanas.get(team_id, 1)
+
+    def esperar_cambio(self, team_id, semana, timeout=None):
+        """Bloquea hasta que el equipo pase de `semana` o venza `timeout`."""
+        with self._condicion:
+            self._condicion.wait_for(lambda: self._semanas.get(team_id, 1) != semana, timeout)
+            return self._semanas.get(team_id, 1)
+
+    def _releer(self):
+        semanas = dict(self._conn.execute("SELECT team_id, week FROM team_progress").fetchall())
+        with self._condicion:
+            cambio = semanas != self._semanas
+            self._semanas = semanas
+            if cambio:
+                self._condicion.notify_all()
+
+    def _vigilar(self):
+        try:
+            while not self._detener.wait(self.intervalo):
+                data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+                if data_version != self._data_version:
+                    self._data_version = data_version
+                    self._releer()
+        finally:
+            self._conn.close()
+
+
+@lru_cache(maxsize=None)
+def _vigilante(ruta):
+    return VigilanteSemanas(ruta).iniciar()
+
+
+def obtener_vigilante(ruta=None, team_id=None):
+    """Vigilante del archivo indicado, del archivo del equipo o del principal."""
+    if ruta is None:
+        ruta = ruta_equipo(team_id) if team_id else rutas_almacen()[0]
+    return _vigilante(ruta)
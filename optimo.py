@@ -0,0 +1,225 @@
+import argparse
+import hashlib
+import itertools
+import threading
+import time
+from typing import NamedTuple
+
+import numpy as np
+
+from metricas import medir
+from motor import ROLES, simular
+from politicas import crear_decisor
+
+# ========================
+# NIVEL BASE ÓPTIMO
+# ========================
+# Referencia para calificar: el menor costo que logra una política de nivel
+# base (un nivel por rol) con la misma demanda, retrasos y costos que el
+# equipo. Cada paso de la búsqueda evalúa todos sus candidatos a la vez como
+# juegos paralelos de motor.simular. Con retrasos largos pasar el pedido puede
+# costar menos que cualquier nivel base; en ese caso la referencia es esa.
+# Todas las políticas envían lo debido (politicas._enviar_lo_debido): enviar
+# más mueve stock aguas abajo y puede costar menos, así que la referencia es
+# una heurística y no el mínimo alcanzable.
+PUNTOS_GRILLA = 8   # Niveles por rol en la grilla gruesa inicial
+ARRANQUES = 8       # Mejores puntos de la grilla desde los que se refina
+RADIO = 2           # Vecindario final: ±RADIO en los cuatro roles a la vez
+RONDAS_MAX = 50
+_DESPLAZAMIENTOS = np.array(list(itertools.product(range(-RADIO, RADIO + 1), repeat=4)), dtype=np.int64)
+
+
+class SolucionOptima(NamedTuple):
+    politica: str              # "nivel_base" o "pasar_pedido"
+    niveles: np.ndarray        # (4,) nivel base de cada rol (None si se pasa el pedido)
+    costo_total: float
+    costo_por_rol: np.ndarray  # (4,)
+
+
+def _escenario(parametros, semanas=None):
+    """Argumentos de simular con la misma mecánica que el juego en vivo.
+
+    `semanas` son las filas de rounds que suma el costo del equipo
+    (estadisticas.leer_resumen incluye la semana en curso); por defecto, el
+    juego completo más la fila siguiente a la última semana.
+    """
+    semanas = parametros.weeks_total + 1 if semanas is None else semanas
+    demanda = np.array([parametros.demanda_semana(s) for s in range(1, semanas + 1)], dtype=np.int64)
+    return semanas, demanda, dict(
+        stock_inicial=parametros.initial_stock, demanda=demanda, produccion=parametros.produccion,
+        retraso=parametros.lead_time, retraso_pedidos=parametros.delay_time,
+    )
+
+
+def _costos(parametros, semanas, niveles=None):
+    """Simula un juego por fila de `niveles` (K, 4); devuelve el costo (K, W, 4) por semana.
+
+    Sin `niveles` simula un solo juego pasando el pedido.
+    """
+    semanas, _, argumentos = _escenario(parametros, semanas)
+    if niveles is None:
+        decidir = crear_decisor("pasar_pedido", 1)
+    else:
+        decidir = crear_decisor("nivel_base", len(niveles), nivel_base=niveles)
+    historia = simular(1 if niveles is None else len(niveles), semanas, decidir, **argumentos)
+    return historia.stock * parametros.holding_cost + historia.backorder * parametros.backorder_cost
+
+
+def _refinar(parametros, semanas, inicio, costo, tope):
+    """Mejora `inicio` rol por rol y en el vecindario conjunto hasta que nada baje el costo."""
+    candidatos = np.arange(tope + 1, dtype=np.int64)
+    mejor = inicio
+    for _ in range(RONDAS_MAX):
+        anterior = costo
+        for i in range(len(ROLES)):
+            niveles = np.repeat(mejor[None, :], len(candidatos), axis=0)
+            niveles[:, i] = candidatos
+            costos = _costos(parametros, semanas, niveles).sum(axis=(1, 2))
+            if costos.min() < costo:
+                mejor, costo = niveles[costos.argmin()], costos.min()
+        # Los óptimos por coordenada no siempre lo son moviendo varios roles juntos
+        niveles = np.unique(np.clip(mejor + _DESPLAZAMIENTOS, 0, tope), axis=0)
+        costos = _costos(parametros, semanas, niveles).sum(axis=(1, 2))
+        if costos.min() < costo:
+            mejor, costo = niveles[costos.argmin()], costos.min()
+        if costo == anterior:
+            break
+    return mejor, costo
+
+
+def resolver(parametros, semanas=None):
+    """Niveles base (uno por rol) que minimizan el costo del equipo en `semanas`.
+
+    Refina los mejores puntos de una grilla gruesa de los cuatro roles y el
+    mejor nivel común; el costo de cada refinamiento nunca sube. Si pasar el
+    pedido cuesta menos, la solución es esa.
+    """
+    _, demanda, _ = _escenario(parametros, semanas)
+    # Tope holgado: dos veces la demanda máxima durante el retraso total
+    tope = int(demanda.max()) * 2 * (parametros.lead_time + parametros.delay_time + 1) + parametros.initial_stock
+    eje = np.unique(np.linspace(0, tope, PUNTOS_GRILLA).round().astype(np.int64))
+    grilla = np.array(list(itertools.product(eje, repeat=len(ROLES))), dtype=np.int64)
+    costos = _costos(parametros, semanas, grilla).sum(axis=(1, 2))
+    arranques = [(grilla[i], costos[i]) for i in np.argsort(costos)[:ARRANQUES]]
+    # Además, el mejor nivel común a los cuatro roles
+    comunes = np.repeat(np.arange(tope + 1, dtype=np.int64)[:, None], len(ROLES), axis=1)
+    costos = _costos(parametros, semanas, comunes).sum(axis=(1, 2))
+    arranques.append((comunes[costos.argmin()], costos.min()))
+
+    resultados = [_refinar(parametros, semanas, inicio, costo, tope) for inicio, costo in arranques]
+    mejor, costo = min(resultados, key=lambda resultado: resultado[1])
+    costos = _costos(parametros, semanas)[0]
+    if costos.sum() < costo:
+        return SolucionOptima("pasar_pedido", None, float(costos.sum()), costos.sum(axis=0))
+    costos = _costos(parametros, semanas, mejor[None, :])[0]
+    return SolucionOptima("nivel_base", mejor, float(costos.sum()), costos.sum(axis=0))
+
+
+# ========================
+# CACHÉ POR CONFIGURACIÓN
+# ========================
+# Los equipos con la misma configuración comparten una sola solución
+_soluciones = {}
+_soluciones_lock = threading.Lock()
+
+
+def clave_parametros(parametros):
+    """Hash de todo lo que afecta al costo: retrasos, costos, semanas, producción y demanda."""
+    _, demanda, _ = _escenario(parametros)
+    texto = repr((parametros.initial_stock, parametros.lead_time, parametros.delay_time,
+                  float(parametros.holding_cost), float(parametros.backorder_cost),
+                  parametros.weeks_total, parametros.produccion))
+    return hashlib.sha1(texto.encode() + demanda.tobytes()).hexdigest()
+
+
+@medir
+def solucion_optima(parametros, semanas=None):
+    """Como resolver(), memorizado por configuración y cantidad de semanas."""
+    clave = clave_parametros(parametros), semanas
+    with _soluciones_lock:
+        if clave in _soluciones:
+            return _soluciones[clave]
+    # Se resuelve fuera del lock: dos hilos pueden repetir un cálculo, no bloquearse
+    solucion = resolver(parametros, semanas)
+    with _soluciones_lock:
+        return _soluciones.setdefault(clave, solucion)
+
+
+def _parametros_archivados(semestre):
+    from archivo import leer_archivo
+    from parametros import parametros_desde_filas
+
+    filas = leer_archivo("game_parameters", semestre, columnas=[
+        "team_id", "initial_stock", "lead_time", "delay_time", "holding_cost", "backorder_cost", "weeks_total",
+    ])
+    demandas = {}
+    for equipo, semana, valor in leer_archivo("demands", semestre, columnas=["team_id", "week", "demand"]).itertuples(
+            index=False, name=None):
+        demandas.setdefault(equipo, {})[semana] = valor
+    # Parquet devuelve NaN (y enteros como float) donde la base tenía NULL
+    enteros = ["initial_stock", "lead_time", "delay_time", "weeks_total"]
+    filas[enteros] = filas[enteros].astype("Int64")
+    filas = filas.astype(object).where(filas.notna(), None)
+    filas = {fila[0]: fila[1:] for fila in filas.itertuples(index=False, name=None)}
+    return lambda team_id: parametros_desde_filas(filas.get(team_id), demandas.get(team_id, {}))
+
+
+def costo_optimo_equipos(semanas_por_equipo, semestre=None):
+    """{team_id: semanas jugadas} -> {team_id: costo óptimo en esas mismas semanas}.
+
+    Un juego a medias se compara con el óptimo de un juego de ese largo: el
+    óptimo del juego completo puede guardar stock para semanas que el equipo
+    todavía no jugó. Con `semestre` usa los parámetros archivados.
+    """
+    if semestre is None:
+        from parametros import obtener_parametros
+    else:
+        obtener_parametros = _parametros_archivados(semestre)
+
+    costos = {}
+    for team_id, semanas in semanas_por_equipo.items():
+        parametros = obtener_parametros(team_id)
+        if semanas <= 0:
+            costos[team_id] = float("nan")
+            continue
+        # Los juegos terminados comparten la solución del juego completo
+        semanas = None if semanas >= parametros.weeks_total + 1 else int(semanas)
+        costos[team_id] = solucion_optima(parametros, semanas).costo_total
+    return costos
+
+
+# ========================
+# CLI
+# ========================
+def _equipos(conn):
+    return conn.execute("SELECT team_id FROM teams").fetchall()
+
+
+def main():
+    from base_datos import leer_en_todos
+    from parametros import obtener_parametros
+
+    parser = argparse.ArgumentParser(description="Niveles base óptimos de cada configuración de juego")
+    parser.parse_args()
+
+    equipos = [fila[0] for parte in leer_en_todos(_equipos) for fila in parte]
+    if not equipos:
+        print("⚠️ No hay equipos.")
+        return
+    inicio = time.perf_counter()
+    soluciones = {}
+    for team_id in equipos:
+        parametros = obtener_parametros(team_id)
+        soluciones[clave_parametros(parametros)] = solucion_optima(parametros)
+    duracion = time.perf_counter() - inicio
+    for clave, solucion in soluciones.items():
+        if solucion.niveles is None:
+            politica = "pasar el pedido"
+        else:
+            politica = "nivel base " + ", ".join(f"{rol} {nivel}" for rol, nivel in zip(ROLES, solucion.niveles))
+        print(f"{clave[:8]}: {politica} -> costo {solucion.costo_total:,.1f}")
+    print(f"✅ {len(soluciones)} configuraciones para {len(equipos)} equipos resueltas en {duracion:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
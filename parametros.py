@@ -0,0 +1,148 @@
+import threading
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+from base_datos import conectar_db, leer_en_todos, rutas_almacen
+from motor import (
+    STOCK_INICIAL, DEMANDA_CLIENTE, PRODUCCION_FABRICA,
+    COSTO_INVENTARIO, COSTO_FALTANTE, SEMANAS_JUEGO
+)
+
+# ========================
+# PARÁMETROS POR EQUIPO
+# ========================
+# game_parameters y demands se leen una sola vez por proceso (todos los equipos
+# en dos consultas) y quedan en memoria: avanzar de semana no vuelve a leerlos.
+# Un equipo sin fila en game_parameters juega con las reglas clásicas del
+# juego en vivo: envíos instantáneos y producción de fábrica constante.
+class ParametrosJuego(NamedTuple):
+    initial_stock: int
+    lead_time: int                # Semanas en tránsito de los envíos
+    delay_time: int               # Semanas que tarda un pedido en llegar al proveedor
+    holding_cost: float
+    backorder_cost: float
+    weeks_total: int
+    demanda: np.ndarray           # Demanda del cliente por semana (índice = semana)
+    produccion: Optional[int]     # None: la fábrica produce lo que pide
+
+    def demanda_semana(self, semana):
+        return int(self.demanda[semana]) if semana < len(self.demanda) else DEMANDA_CLIENTE
+
+
+_cache = {}
+_cache_lock = threading.Lock()
+_precargado = False
+
+
+def parametros_desde_filas(fila, demandas):
+    """ParametrosJuego desde una fila de game_parameters (sin team_id, o None) y {semana: demanda}.
+
+    La usan también los semestres archivados (optimo.py).
+    """
+    weeks_total = fila[5] if fila and fila[5] else SEMANAS_JUEGO
+    demanda = np.full(max([weeks_total, *demandas]) + 1, DEMANDA_CLIENTE, dtype=np.int64)
+    for semana, valor in demandas.items():
+        demanda[semana] = valor
+    if fila is None:
+        return ParametrosJuego(STOCK_INICIAL, 0, 0, COSTO_INVENTARIO, COSTO_FALTANTE,
+                               weeks_total, demanda, PRODUCCION_FABRICA)
+    initial_stock, lead_time, delay_time, holding_cost, backorder_cost, _ = fila
+    return ParametrosJuego(
+        STOCK_INICIAL if initial_stock is None else initial_stock,
+        lead_time or 0,
+        delay_time or 0,
+        COSTO_INVENTARIO if holding_cost is None else holding_cost,
+        COSTO_FALTANTE if backorder_cost is None else backorder_cost,
+        weeks_total, demanda, None,
+    )
+
+
+def _leer(conn, team_id=None):
+    filtro = "WHERE team_id = ?" if team_id else ""
+    params = (team_id,) if team_id else ()
+    filas = {fila[0]: fila[1:] for fila in conn.execute(f"""
+        SELECT team_id, initial_stock, lead_time, delay_time, holding_cost, backorder_cost, weeks_total
+        FROM game_parameters {filtro}
+    """, params)}
+    demandas = {}
+    for equipo, semana, valor in conn.execute(f"SELECT team_id, week, demand FROM demands {filtro}", params):
+        demandas.setdefault(equipo, {})[semana] = valor
+    equipos = set(filas) | set(demandas) | ({team_id} if team_id else set())
+    return {equipo: parametros_desde_filas(filas.get(equipo), demandas.get(equipo, {})) for equipo in equipos}
+
+
+def obtener_parametros(team_id, conn=None, recargar=False):
+    """Parámetros del equipo desde la caché del proceso.
+
+    La primera llamada precarga todos los equipos; un equipo nuevo se lee solo
+    la primera vez que se pide. Con `conn` se usa esa conexión (por ejemplo,
+    dentro de la transacción que avanza la semana). `recargar` relee el equipo
+    aunque esté en caché: se usa en la primera semana, antes de que los
+    parámetros queden fijos.
+    """
+    global _precargado
+    with _cache_lock:
+        if recargar:
+            _cache.pop(team_id, None)
+        elif team_id in _cache:
+            return _cache[team_id]
+    if conn is None:
+        with conectar_db(team_id=team_id) as conn:
+            return obtener_parametros(team_id, conn)
+
+    nuevos = {}
+    if not _precargado:
+        # Con varios archivos la precarga recorre todos, no solo el del equipo
+        partes = [_leer(conn)] if len(rutas_almacen()) == 1 else leer_en_todos(_leer)
+        nuevos = {equipo: valor for parte in partes for equipo, valor in parte.items()}
+    if team_id not in nuevos:
+        nuevos.update(_leer(conn, team_id))
+    with _cache_lock:
+        _cache.update(nuevos)
+        _precargado = True
+        return _cache[team_id]
+
+
+def precargar_parametros():
+    """Carga todos los equipos en la caché, como la primera llamada a obtener_parametros."""
+    global _precargado
+    partes = leer_en_todos(_leer)
+    with _cache_lock:
+        for parte in partes:
+            _cache.update(parte)
+        _precargado = True
+
+
+def invalidar_parametros(team_id=None):
+    global _precargado
+    with _cache_lock:
+        if team_id is None:
+            _cache.clear()
+            _precargado = False
+        else:
+            _cache.pop(team_id, None)
+
+
+def guardar_parametros(team_id, initial_stock, lead_time, delay_time, holding_cost,
+                       backorder_cost, weeks_total, demandas=None):
+    """Configura un equipo antes de que empiece a jugar.
+
+    `demandas` es la lista de demandas desde la semana 1. Solo se permite antes
+    de la primera decisión: desde entonces los parámetros quedan fijos y cada
+    proceso usa su copia en caché.
+    """
+    with conectar_db(team_id=team_id) as conn:
+        if conn.execute("SELECT 1 FROM rounds WHERE team_id = ? LIMIT 1", (team_id,)).fetchone():
+            raise ValueError("El equipo ya empezó a jugar: los parámetros no se pueden cambiar.")
+        conn.execute("""
+            INSERT OR REPLACE INTO game_parameters (
+                team_id, initial_stock, lead_time, delay_time, holding_cost, backorder_cost, weeks_total
+            ) VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (team_id, initial_stock, lead_time, delay_time, holding_cost, backorder_cost, weeks_total))
+        if demandas is not None:
+            conn.execute("DELETE FROM demands WHERE team_id = ?", (team_id,))
+            conn.executemany("""
+                INSERT INTO demands (team_id, week, demand) VALUES (?, ?, ?)
+            """, [(team_id, semana, int(valor)) for semana, valor in enumerate(demandas, 1)])
+    invalidar_parametros(team_id)
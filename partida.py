@@ -0,0 +1,235 @@
+import threading
+from typing import NamedTuple
+
+import numpy as np
+
+from base_datos import conectar_db, ejecutar_transaccion, leer_en_todos
+from estadisticas import actualizar_estadisticas
+from eventos import estado_en_semana, registrar_evento, toca_snapshot, guardar_snapshot
+from metricas import medir
+from motor import ROLES, avanzar_semana
+from parametros import obtener_parametros
+
+# ========================
+# PLANTEL (CACHÉ DEL PROCESO)
+# ========================
+# Índice de jugadores y bots de todos los equipos, compartido por todas las
+# sesiones del proceso: validar a un jugador no consulta la base. Se vuelve a
+# leer cuando cambia algún plantel (invalidar_plantel() desde donde se
+# agregan o borran jugadores y bots), al mostrar la pantalla de ingreso de
+# juego.py y, una vez, cuando un jugador no aparece o su equipo figura
+# incompleto: el cambio pudo hacerse desde otro proceso.
+class Plantel(NamedTuple):
+    equipos: dict          # team_id -> team_name de los equipos con alumnos
+    jugadores: frozenset   # (team_id, nombre en minúsculas, rol)
+    roles: dict            # team_id -> roles cubiertos por alumnos o bots
+    con_bots: frozenset    # team_id de los equipos con algún bot
+
+_plantel = None
+_plantel_lock = threading.Lock()
+
+def _leer_plantel(conn):
+    jugadores = conn.execute("""
+        SELECT t.team_id, t.team_name, p.name, p.role
+        FROM players p
+        JOIN teams t ON p.team_id = t.team_id
+    """).fetchall()
+    return jugadores, conn.execute("SELECT team_id, role FROM bots").fetchall()
+
+@medir
+def obtener_plantel(recargar=False):
+    global _plantel
+    with _plantel_lock:
+        if _plantel is not None and not recargar:
+            return _plantel
+    equipos, jugadores, roles, con_bots = {}, set(), {}, set()
+    for filas_jugadores, filas_bots in leer_en_todos(_leer_plantel):
+        for team_id, team_name, nombre, rol in filas_jugadores:
+            equipos[team_id] = team_name
+            jugadores.add((team_id, nombre.lower(), rol))
+            roles.setdefault(team_id, set()).add(rol)
+        for team_id, rol in filas_bots:
+            roles.setdefault(team_id, set()).add(rol)
+            con_bots.add(team_id)
+    with _plantel_lock:
+        _plantel = Plantel(equipos, frozenset(jugadores), roles, frozenset(con_bots))
+        return _plantel
+
+def invalidar_plantel():
+    global _plantel
+    with _plantel_lock:
+        _plantel = None
+
+def buscar_jugador(team_id, nombre, rol):
+    """(registrado, equipo completo, equipo con bots) según el índice del proceso."""
+    for recargar in (False, True):
+        plantel = obtener_plantel(recargar)
+        registrado = (team_id, nombre.lower(), rol) in plantel.jugadores
+        completo = len(plantel.roles.get(team_id, ())) == len(ROLES)
+        if registrado and completo:
+            break
+    return registrado, completo, team_id in plantel.con_bots
+
+# ========================
+# CONSULTAS
+# ========================
+
+@medir
+def obtener_estado_actual(team_id, role):
+    """(semana, stock, backorder, pedido recibido, envío recibido) del rol en la semana en curso.
+
+    Se lee el último snapshot y se reproducen las semanas cerradas desde entonces.
+    """
+    with conectar_db(team_id=team_id) as conn:
+        semana = semana_actual(conn, team_id)
+        estado = estado_en_semana(team_id, semana, conn)
+    i = ROLES.index(role)
+    return (semana, int(estado.stock[0, i]), int(estado.backorder[0, i]),
+            int(estado.pedido_recibido[0, i]), int(estado.envio_recibido[0, i]))
+
+# Las variantes con `conn` corren dentro de la transacción de quien llama
+# (bots, api, benchmark); las demás abren su propia conexión
+def semana_actual(conn, team_id):
+    semana = conn.execute("""
+        SELECT MAX(week) FROM rounds WHERE team_id = ?
+    """, (team_id,)).fetchone()[0]
+    return semana if semana else 1
+
+@medir
+def obtener_semana_actual(team_id):
+    with conectar_db(team_id=team_id) as conn:
+        return semana_actual(conn, team_id)
+
+@medir
+def equipo_esta_completo(team_id):
+    with conectar_db(team_id=team_id) as conn:
+        return equipo_completo(conn, team_id)
+
+def equipo_completo(conn, team_id):
+    # Los bots cubren los roles sin alumno
+    count = conn.execute("""
+        SELECT COUNT(DISTINCT role) FROM (
+            SELECT role FROM players WHERE team_id = ?
+            UNION
+            SELECT role FROM bots WHERE team_id = ?
+        )
+    """, (team_id, team_id)).fetchone()[0]
+    return count == 4
+
+@medir
+def equipo_completo_para_semana(team_id, semana):
+    with conectar_db(team_id=team_id) as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT COUNT(DISTINCT role)
+            FROM rounds
+            WHERE team_id = ? AND week = ? AND decided = 1
+        """, (team_id, semana))
+        conteo = cursor.fetchone()[0]
+    return conteo == 4
+
+# ========================
+# ESCRITURAS
+# ========================
+# Registrar y avanzar van en una sola transacción BEGIN IMMEDIATE: si los cuatro
+# jugadores envían a la vez, solo uno ve la semana completa y crea la siguiente.
+# Ambas operaciones son idempotentes y se pueden reintentar sin duplicar filas.
+# Cada decisión aceptada se agrega también a decision_events (ver eventos.py),
+# desde donde rounds se puede reconstruir.
+@medir
+def registrar_decision(team_id, role, semana, stock, backorder, pedido_recibido, envio_recibido, pedido_proveedor, envio_cliente):
+    """Guarda la decisión del rol y, si era la última de la semana, avanza.
+
+    Devuelve True si esta llamada cerró la semana, False si la registró sin
+    cerrarla y None si la semana ya estaba cerrada y no se registró nada.
+    """
+    return ejecutar_transaccion(
+        registrar_en_transaccion, team_id, role, semana,
+        stock, backorder, pedido_recibido, envio_recibido,
+        pedido_proveedor, envio_cliente, team_id=team_id
+    )
+
+@medir
+def procesar_avance_semana(team_id, semana_actual):
+    return ejecutar_transaccion(_avanzar, team_id, semana_actual, team_id=team_id)
+
+def registrar_en_transaccion(conn, team_id, role, semana, stock, backorder, pedido_recibido, envio_recibido, pedido_proveedor, envio_cliente):
+    # Un reenvío tardío de una semana ya cerrada no modifica la historia
+    if semana != semana_actual(conn, team_id):
+        return None
+
+    total_cost = 0
+    conn.execute("""
+        INSERT INTO rounds (
+            team_id, week, role,
+            stock, backorder, incoming_order, incoming_shipment,
+            placed_order, sent_shipment, total_cost, decided
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 1)
+        ON CONFLICT (team_id, week, role) DO UPDATE SET
+            placed_order = excluded.placed_order,
+            sent_shipment = excluded.sent_shipment,
+            decided = 1
+    """, (
+        team_id, semana, role,
+        stock, backorder, pedido_recibido, envio_recibido,
+        pedido_proveedor, envio_cliente, total_cost
+    ))
+    registrar_evento(conn, team_id, semana, role, pedido_proveedor, envio_cliente)
+    return _avanzar(conn, team_id, semana)
+
+def _avanzar(conn, team_id, semana_actual):
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT role, placed_order, sent_shipment
+        FROM rounds
+        WHERE team_id = ? AND week = ? AND decided = 1
+    """, (team_id, semana_actual))
+    decisiones = {row[0]: row[1:] for row in cursor.fetchall()}
+    if len(decisiones) < len(ROLES):
+        return False
+
+    # Los parámetros quedan fijos al cerrar la primera semana
+    parametros = obtener_parametros(team_id, conn, recargar=semana_actual == 1)
+    # Estado al inicio de la semana (stock, backorder y anillos en tránsito):
+    # último snapshot más las semanas cerradas desde entonces
+    estado = estado_en_semana(team_id, semana_actual, conn)
+
+    # Arreglos (1 equipo x 4 roles) en el orden de motor.ROLES; la demanda de la
+    # semana es la que el minorista atiende al cerrarla
+    pedidos, envios = np.array([decisiones[rol] for rol in ROLES]).T[:, None, :]
+    resultado = avanzar_semana(
+        estado.stock, estado.backorder, pedidos, envios,
+        parametros.demanda_semana(semana_actual), parametros.produccion,
+        estado.pipeline, estado.pipeline_pedidos, semana=semana_actual
+    )
+
+    nueva_semana = semana_actual + 1
+    cursor.executemany("""
+        INSERT OR IGNORE INTO rounds (
+            team_id, week, role,
+            stock, backorder, incoming_order, incoming_shipment,
+            placed_order, sent_shipment, total_cost
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, [
+        (team_id, nueva_semana, rol,
+         int(resultado.stock[0, i]), int(resultado.backorder[0, i]),
+         int(resultado.pedido_recibido[0, i]), int(resultado.envio_recibido[0, i]),
+         0, 0, 0)
+        for i, rol in enumerate(ROLES)
+    ])
+    if cursor.rowcount == 0:
+        return False
+    if toca_snapshot(nueva_semana):
+        guardar_snapshot(conn, team_id, nueva_semana, resultado)
+
+    cursor.execute("""
+        INSERT INTO team_progress (team_id, week) VALUES (?, ?)
+        ON CONFLICT (team_id) DO UPDATE SET week = excluded.week
+    """, (team_id, nueva_semana))
+
+    actualizar_estadisticas(conn, team_id, semana_actual, [
+        (rol, int(estado.stock[0, i]), int(estado.backorder[0, i]),
+         int(estado.pedido_recibido[0, i]), decisiones[rol][0])
+        for i, rol in enumerate(ROLES)
+    ], parametros.holding_cost, parametros.backorder_cost)
+    return True
@@ -0,0 +1,80 @@
+import numpy as np
+from typing import NamedTuple
+
+from motor import ROLES, DEMANDA_CLIENTE
+
+# ========================
+# POLÍTICAS DE PEDIDO
+# ========================
+# Cada política decide elemento a elemento: sirve igual para arreglos (N, 4)
+# en motor.simular que para un solo rol (escalares) en los bots en vivo.
+# `semana` empieza en 0 y `estado` tiene stock, backorder, pedido_recibido y
+# envio_recibido (como motor.ResultadoSemana). Todas envían lo que deben
+# mientras haya stock.
+class Memoria(NamedTuple):
+    """Lo que una política recuerda entre semanas."""
+    pronostico: np.ndarray   # Pedido esperado (suavizado exponencial)
+    pendiente: np.ndarray    # Línea de suministro: pedido y aún no recibido
+
+
+def memoria_inicial(forma=()):
+    return Memoria(np.full(forma, float(DEMANDA_CLIENTE)), np.zeros(forma, dtype=np.int64))
+
+
+def _enviar_lo_debido(estado):
+    return np.minimum(estado.stock, estado.backorder + estado.pedido_recibido)
+
+
+def _recibir(estado, memoria):
+    return np.maximum(0, memoria.pendiente - estado.envio_recibido)
+
+
+def pasar_pedido(semana, estado, memoria):
+    pedidos = estado.pedido_recibido if semana else np.full_like(estado.stock, DEMANDA_CLIENTE)
+    pendiente = _recibir(estado, memoria) + pedidos
+    return pedidos, _enviar_lo_debido(estado), Memoria(memoria.pronostico, pendiente)
+
+
+def nivel_base(semana, estado, memoria, nivel_base):
+    pendiente = _recibir(estado, memoria)
+    posicion = estado.stock - estado.backorder - estado.pedido_recibido + pendiente
+    pedidos = np.maximum(0, nivel_base - posicion)
+    return pedidos, _enviar_lo_debido(estado), Memoria(memoria.pronostico, pendiente + pedidos)
+
+
+def anclaje_ajuste(semana, estado, memoria, nivel_base, alfa, beta, theta):
+    # Heurística de Sterman (1989): pronóstico suavizado + ajuste de stock y línea de suministro
+    pendiente = _recibir(estado, memoria)
+    pronostico = memoria.pronostico
+    if semana:
+        pronostico = theta * estado.pedido_recibido + (1 - theta) * pronostico
+    ajuste = alfa * (nivel_base - (estado.stock - estado.backorder) - beta * pendiente)
+    pedidos = np.maximum(0, np.rint(pronostico + ajuste)).astype(np.int64)
+    return pedidos, _enviar_lo_debido(estado), Memoria(pronostico, pendiente + pedidos)
+
+
+POLITICAS = {
+    "pasar_pedido": pasar_pedido,
+    "nivel_base": nivel_base,
+    "anclaje_ajuste": anclaje_ajuste,
+}
+
+# Parámetros por defecto de cada política
+PARAMETROS_POR_DEFECTO = {
+    "pasar_pedido": {},
+    "nivel_base": {"nivel_base": 40},
+    "anclaje_ajuste": {"nivel_base": 40, "alfa": 0.3, "beta": 0.5, "theta": 0.3},
+}
+
+
+def crear_decisor(politica, n_juegos, **parametros):
+    """Función `decidir(semana, estado)` para motor.simular con N juegos."""
+    funcion = POLITICAS[politica]
+    memoria = memoria_inicial((n_juegos, len(ROLES)))
+
+    def decidir(semana, estado):
+        nonlocal memoria
+        pedidos, envios, memoria = funcion(semana, estado, memoria, **parametros)
+        return pedidos, envios
+
+    return decidir
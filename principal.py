@@ -0,0 +1,17 @@
+import streamlit as st
+
+# ========================
+# APLICACIÓN MULTIPÁGINA
+# ========================
+# Un solo servidor para todas las páginas: `streamlit run principal.py`.
+# Cada página importa solo lo que usa: pandas y matplotlib se cargan la primera
+# vez que alguien abre una página de análisis, no al jugar.
+PAGINAS = [
+    st.Page("app.py", title="Equipos y jugadores", icon="🎲", default=True),
+    st.Page("juego.py", title="Jugar", icon="🚚"),
+    st.Page("resultados.py", title="Resultados por equipo", icon="📊"),
+    st.Page("modo_profesor.py", title="Modo profesor", icon="👨‍🏫"),
+    st.Page("monitoreo.py", title="Métricas", icon="⏱️"),
+]
+
+st.navigation(PAGINAS).run()
@@ -0,0 +1,222 @@
+import argparse
+import multiprocessing
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+
+import base_datos
+from base_datos import conectar_db
+from motor import ROLES
+from partida import obtener_estado_actual, obtener_semana_actual, registrar_decision
+
+# ========================
+# PRUEBA DE CARGA
+# ========================
+# K equipos virtuales x 4 jugadores (un hilo por jugador) sobre una copia de la
+# base. Cada jugador sigue los mismos pasos que juego.py: lee su semana y su
+# estado, registra la decisión y espera a que el equipo avance.
+
+
+def copiar_base(origen, destino):
+    """Copia consistente (API de backup de SQLite, válida también en modo WAL)."""
+    with sqlite3.connect(origen) as fuente, sqlite3.connect(destino) as copia:
+        fuente.backup(copia)
+
+
+def usar_almacen(ruta, fragmentos):
+    """Apunta este proceso a la copia de trabajo (un archivo o `fragmentos` archivos)."""
+    base_datos.RUTA_DB = ruta
+    base_datos.ALMACEN = "fragmentado" if fragmentos else "archivo"
+    base_datos.FRAGMENTOS = fragmentos or base_datos.FRAGMENTOS
+
+
+def crear_equipos(n_equipos, prefijo="Carga"):
+    fecha = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    equipos = [str(uuid.uuid4()) for _ in range(n_equipos)]
+    # Cada equipo en su archivo del almacén
+    for ruta in base_datos.rutas_almacen():
+        propios = [(i, team_id) for i, team_id in enumerate(equipos, 1) if base_datos.ruta_equipo(team_id) == ruta]
+        with conectar_db(ruta) as conn:
+            conn.executemany("""
+                INSERT INTO teams (team_id, team_name, creation_date) VALUES (?, ?, ?)
+            """, [(team_id, f"{prefijo} {i}", fecha) for i, team_id in propios])
+            conn.executemany("""
+                INSERT INTO players (player_id, team_id, name, role) VALUES (?, ?, ?, ?)
+            """, [(str(uuid.uuid4()), team_id, f"{rol} {i}", rol) for i, team_id in propios for rol in ROLES])
+    return equipos
+
+
+def jugar(team_id, rol, semanas, resultados, pensar, doble_clic, sondeo, semilla):
+    azar = random.Random(semilla)
+    try:
+        for semana in range(1, semanas + 1):
+            while obtener_semana_actual(team_id) < semana:
+                time.sleep(sondeo)
+            time.sleep(azar.uniform(0, pensar))
+
+            estado = obtener_estado_actual(team_id, rol)
+            pedido = azar.randint(0, 30)
+            envio = min(estado[1], estado[2] + estado[3])
+            envios = 2 if azar.random() < doble_clic else 1
+            for _ in range(envios):
+                inicio = time.perf_counter()
+                cerro = registrar_decision(team_id, rol, semana, *estado[1:], pedido, envio)
+                resultados["latencias"].append(time.perf_counter() - inicio)
+                resultados["cierres"].append(cerro)
+    except Exception as error:
+        resultados["errores"].append(f"{team_id[:8]} {rol}: {error!r}")
+
+
+def jugar_equipos(ruta, fragmentos, equipos, semanas, pensar, doble_clic, sondeo, busy_timeout_ms, semilla):
+    """Juega las partidas de `equipos` en este proceso. Devuelve sus mediciones."""
+    usar_almacen(ruta, fragmentos)
+    if busy_timeout_ms is not None:
+        base_datos.BUSY_TIMEOUT_MS = busy_timeout_ms
+    resultados = {"latencias": [], "cierres": [], "errores": []}
+    hilos = [
+        threading.Thread(target=jugar, args=(team_id, rol, semanas, resultados, pensar,
+                                            doble_clic, sondeo, f"{semilla}-{team_id}-{rol}"))
+        for team_id in equipos for rol in ROLES
+    ]
+    reintentos = base_datos.reintentos_por_bloqueo()
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    resultados["reintentos"] = base_datos.reintentos_por_bloqueo() - reintentos
+    return resultados
+
+
+# ========================
+# VERIFICACIÓN
+# ========================
+def _contar(conn, equipos):
+    marcadores = ",".join("?" * len(equipos))
+    duplicadas = conn.execute(f"""
+        SELECT COUNT(*) FROM (
+            SELECT 1 FROM rounds
+            WHERE team_id IN ({marcadores})
+            GROUP BY team_id, week, role HAVING COUNT(*) > 1
+        )
+    """, equipos).fetchone()[0]
+    conteos = conn.execute(f"""
+        SELECT team_id, week, SUM(decided), COUNT(*)
+        FROM rounds
+        WHERE team_id IN ({marcadores})
+        GROUP BY team_id, week
+    """, equipos).fetchall()
+    return duplicadas, conteos
+
+
+def verificar(equipos, semanas):
+    """Cuenta filas duplicadas y semanas incompletas o de más en los equipos de la prueba."""
+    partes = base_datos.leer_en_todos(_contar, equipos)
+    duplicadas = sum(d for d, _ in partes)
+    conteos = [fila for _, filas in partes for fila in filas]
+
+    semanas_por_equipo = {team_id: {} for team_id in equipos}
+    for team_id, semana, decididas, filas in conteos:
+        semanas_por_equipo[team_id][semana] = (decididas, filas)
+
+    faltantes = sobrantes = 0
+    for por_semana in semanas_por_equipo.values():
+        # Semanas 1..N decididas por los 4 roles y la N+1 abierta sin decisiones
+        esperado = {semana: (4, 4) for semana in range(1, semanas + 1)}
+        esperado[semanas + 1] = (0, 4)
+        faltantes += sum(por_semana.get(semana) != valor for semana, valor in esperado.items())
+        sobrantes += len(set(por_semana) - set(esperado))
+    return duplicadas, faltantes, sobrantes
+
+
+# ========================
+# CLI
+# ========================
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga con equipos virtuales sobre una copia de la base")
+    parser.add_argument("--origen", default=base_datos.RUTA_DB, help="Base a copiar (no se modifica)")
+    parser.add_argument("--destino", default=None, help="Copia de trabajo; por defecto, un archivo temporal")
+    parser.add_argument("--equipos", type=int, default=20)
+    parser.add_argument("--semanas", type=int, default=15)
+    parser.add_argument("--procesos", type=int, default=1,
+                        help="Procesos servidor simulados; los equipos se reparten entre ellos")
+    parser.add_argument("--pensar", type=float, default=0.0, help="Segundos máximos de reflexión por decisión")
+    parser.add_argument("--doble-clic", type=float, default=0.05,
+                        help="Probabilidad de que un jugador envíe dos veces la misma decisión")
+    parser.add_argument("--sondeo", type=float, default=0.01, help="Segundos entre consultas mientras espera")
+    parser.add_argument("--busy-timeout-ms", type=int, default=None)
+    parser.add_argument("--fragmentos", type=int, default=0,
+                        help="Reparte los equipos en N archivos SQLite (0: un solo archivo)")
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--conservar", action="store_true", help="No borrar la copia de trabajo")
+    args = parser.parse_args()
+    if not os.path.exists(args.origen):
+        parser.error(f"No existe la base de origen: {args.origen}")
+
+    directorio = None
+    destino = args.destino
+    if destino is None:
+        directorio = tempfile.mkdtemp(prefix="beer_game_carga_")
+        destino = os.path.join(directorio, "carga.db")
+    copiar_base(args.origen, destino)
+    usar_almacen(destino, args.fragmentos)
+    if args.fragmentos:
+        base_datos.repartir(destino)
+
+    try:
+        equipos = crear_equipos(args.equipos)
+        grupos = [equipos[i::args.procesos] for i in range(args.procesos)]
+        parametros = (args.semanas, args.pensar, args.doble_clic, args.sondeo,
+                      args.busy_timeout_ms, args.semilla)
+
+        inicio = time.perf_counter()
+        if args.procesos == 1:
+            mediciones = [jugar_equipos(destino, args.fragmentos, equipos, *parametros)]
+        else:
+            contexto = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=args.procesos, mp_context=contexto) as pool:
+                mediciones = list(pool.map(jugar_equipos, [destino] * len(grupos), [args.fragmentos] * len(grupos),
+                                           grupos, *[[valor] * len(grupos) for valor in parametros]))
+        duracion = time.perf_counter() - inicio
+
+        latencias = np.array([x for m in mediciones for x in m["latencias"]]) * 1000
+        cierres = np.array([x for m in mediciones for x in m["cierres"]], dtype=bool)
+        errores = [x for m in mediciones for x in m["errores"]]
+        reintentos = sum(m["reintentos"] for m in mediciones)
+        duplicadas, faltantes, sobrantes = verificar(equipos, args.semanas)
+    finally:
+        if directorio and not args.conservar:
+            shutil.rmtree(directorio, ignore_errors=True)
+
+    almacen = f"{args.fragmentos} fragmentos" if args.fragmentos else "un archivo"
+    print(f"Equipos: {args.equipos} ({args.equipos * len(ROLES)} jugadores, {args.procesos} proceso/s, "
+          f"{almacen}), semanas: {args.semanas}")
+    print(f"Envíos: {len(latencias)} en {duracion:.2f} s -> {len(latencias) / duracion:,.1f} envíos/s, "
+          f"{cierres.sum() / duracion:,.1f} semanas cerradas/s")
+    if len(latencias):
+        p50, p95, p99 = np.percentile(latencias, [50, 95, 99])
+        print(f"Latencia de envío (ms): p50 {p50:.1f} | p95 {p95:.1f} | p99 {p99:.1f} | máx {latencias.max():.1f}")
+        if cierres.any():
+            print(f"Latencia de envíos que cierran la semana (ms): p99 {np.percentile(latencias[cierres], 99):.1f}")
+    print(f"Reintentos por bloqueo: {reintentos} | errores: {len(errores)}")
+    print(f"Filas duplicadas: {duplicadas} | semanas faltantes o incompletas: {faltantes} | semanas de más: {sobrantes}")
+    for error in errores[:10]:
+        print(f"  ❌ {error}")
+    if args.conservar and directorio:
+        print(f"Copia de trabajo: {destino}")
+
+    # Código de salida distinto de cero ante errores o inconsistencias (uso en CI)
+    sys.exit(1 if errores or duplicadas or faltantes or sobrantes else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,15 @@
 import streamlit as st
-import sqlite3
 import pandas as pd
-import matplotlib.pyplot as plt
+
+from archivo import equipos_archivados, leer_archivo, semestres_archivados
+from base_datos import leer_en_todos
+from estadisticas import leer_resumen, std_pedidos
+from eventos import reproducir_semana
+from graficos import grafico_stock_backorder, grafico_std_por_rol
+from indicadores import COLUMNAS_HISTORIAL, calcular_kpis, obtener_datos_equipo, obtener_version_equipo
+from motor import ROLES
+from parametros import obtener_parametros
+from partida import obtener_semana_actual
 
 st.set_page_config(page_title="Resultados por Equipo - Beer Game", layout="wide")
 st.title("📊 Resultados por Equipo - The Beer Game")
@@ -9,81 +17,89 @@ st.title("📊 Resultados por Equipo - The Beer Game")
 # ========================
 # FUNCIONES DE BASE DE DATOS
 # ========================
-def conectar_db():
-    return sqlite3.connect("beer_game.db")
-
 def cargar_equipos():
-    conn = conectar_db()
-    cursor = conn.cursor()
-    cursor.execute("SELECT DISTINCT t.team_id, t.team_name FROM teams t")
-    equipos = cursor.fetchall()
-    conn.close()
-    return equipos
-
-def obtener_datos_jugador(team_id, role):
-    conn = conectar_db()
-    query = """
-        SELECT week, stock, backorder, incoming_order, incoming_shipment,
-               placed_order, sent_shipment
-        FROM rounds
-        WHERE team_id = ? AND role = ?
-        ORDER BY week
-    """
-    df = pd.read_sql_query(query, conn, params=(team_id, role))
-    conn.close()
-    return df
-
-def calcular_kpis(df, holding_cost=1, backorder_cost=2):
-    df["inventory_cost"] = df["stock"] * holding_cost
-    df["backorder_cost"] = df["backorder"] * backorder_cost
-    df["total_cost"] = df["inventory_cost"] + df["backorder_cost"]
-
-    pedidos = df["incoming_order"].sum()
-    pedidos_atendidos = (df["incoming_order"] - df["backorder"]).clip(lower=0).sum()
-    nivel_servicio = (pedidos_atendidos / pedidos * 100) if pedidos > 0 else 100
-
-    return {
-        "Costo Total": round(df["total_cost"].sum(), 2),
-        "Costo Inventario": round(df["inventory_cost"].sum(), 2),
-        "Costo Faltantes": round(df["backorder_cost"].sum(), 2),
-        "Stock Promedio": round(df["stock"].mean(), 2),
-        "Backorder Promedio": round(df["backorder"].mean(), 2),
-        "Nivel de Servicio (%)": round(nivel_servicio, 2)
-    }
-
-def graficar_jugador(df, rol):
-    fig, ax = plt.subplots()
-    ax.plot(df["week"], df["stock"], marker='o', label="Stock")
-    ax.plot(df["week"], df["backorder"], marker='x', label="Backorder")
-    ax.set_title(f"{rol} - Evolución Stock / Backorder")
-    ax.set_xlabel("Semana")
-    ax.set_ylabel("Unidades")
-    ax.legend()
-    st.pyplot(fig)
+    partes = leer_en_todos(lambda conn: conn.execute("SELECT DISTINCT t.team_id, t.team_name FROM teams t").fetchall())
+    return [equipo for parte in partes for equipo in parte]
+
+# ========================
+# CACHÉ DE RESULTADOS
+# ========================
+# La clave incluye la versión de datos del equipo: mientras no juegue, los
+# reruns se sirven desde memoria. max_entries acota la caché (LRU) por proceso.
+MAX_EQUIPOS_EN_CACHE = 64
+
+@st.cache_data(max_entries=MAX_EQUIPOS_EN_CACHE, show_spinner=False)
+def cargar_resultados_equipo(team_id, version, semestre=None):
+    # El historial completo solo se usa para los gráficos; los KPIs salen de
+    # team_role_stats (o del resumen archivado del semestre)
+    if semestre:
+        df_equipo = leer_archivo("rounds", semestre, team_id, COLUMNAS_HISTORIAL)
+        resumen = leer_archivo("resumen", semestre, team_id).set_index("role")
+    else:
+        df_equipo = obtener_datos_equipo(team_id)
+        resumen = leer_resumen(team_id).set_index("role")
+    resumen["std_pedidos"] = std_pedidos(resumen)
+    datos = {}
+    kpis = {}
+    for rol in ROLES:
+        datos[rol] = df_equipo[df_equipo["role"] == rol].drop(columns="role").reset_index(drop=True)
+        if rol in resumen.index:
+            kpis[rol] = calcular_kpis(resumen.loc[rol])
+    stds = [resumen["std_pedidos"].get(rol, 0) for rol in ROLES]
+    return datos, kpis, stds
+
+# Gráficos renderizados a PNG una vez por versión de datos del equipo; los
+# argumentos con "_" no forman parte de la clave de la caché.
+MAX_GRAFICOS_EN_CACHE = 256
+
+@st.cache_data(max_entries=MAX_GRAFICOS_EN_CACHE, show_spinner=False)
+def grafico_jugador_png(team_id, version, rol, _df):
+    return grafico_stock_backorder(_df["week"], _df["stock"], _df["backorder"], rol)
+
+@st.cache_data(max_entries=MAX_EQUIPOS_EN_CACHE, show_spinner=False)
+def grafico_latigo_png(team_id, version, _stds):
+    return grafico_std_por_rol(ROLES, _stds)
+
+# Una semana cerrada reproducida desde el snapshot anterior y sus eventos
+# (eventos.reproducir_semana), una vez por semana y versión
+@st.cache_data(max_entries=MAX_GRAFICOS_EN_CACHE, show_spinner=False)
+def cargar_semana_revisada(team_id, version, semana):
+    return reproducir_semana(team_id, semana)
+
+def graficar_jugador(df, rol, team_id, version):
+    st.image(grafico_jugador_png(team_id, version, rol, df))
 
 # ========================
 # INTERFAZ PRINCIPAL
 # ========================
-equipos = cargar_equipos()
+# Los semestres archivados se leen del archivo Parquet; sus datos no cambian
+SEMESTRE_EN_CURSO = "En curso"
+semestre = st.selectbox("Semestre", [SEMESTRE_EN_CURSO] + semestres_archivados())
+archivado = semestre if semestre != SEMESTRE_EN_CURSO else None
+
+equipos = equipos_archivados(archivado) if archivado else cargar_equipos()
+if not equipos:
+    st.warning("No hay equipos registrados.")
+    st.stop()
 equipo_nombre = st.selectbox("Selecciona un equipo", [e[1] for e in equipos])
 equipo_id = [e[0] for e in equipos if e[1] == equipo_nombre][0]
 
-roles = ["Retailer", "Distributor", "Wholesaler", "Factory"]
-datos_equipo = {}
+roles = ROLES
+version = ("archivo", archivado) if archivado else obtener_version_equipo(equipo_id)
+datos_equipo, kpis_por_rol, stds = cargar_resultados_equipo(equipo_id, version, archivado)
 kpis_equipo = []
 
 st.markdown("## 🔍 Análisis por Jugador")
 tabs = st.tabs(roles)
 
 for i, rol in enumerate(roles):
-    df = obtener_datos_jugador(equipo_id, rol)
-    datos_equipo[rol] = df
+    df = datos_equipo[rol]
     with tabs[i]:
         if df.empty:
             st.warning(f"No hay datos para el rol {rol}.")
         else:
-            graficar_jugador(df, rol)
-            kpis = calcular_kpis(df)
+            graficar_jugador(df, rol, equipo_id, version)
+            kpis = dict(kpis_por_rol[rol])
             for k, v in kpis.items():
                 st.metric(label=k, value=v)
             kpis["Rol"] = rol
@@ -103,20 +119,39 @@ if kpis_equipo:
 # GRÁFICO EFECTO BULLWHIP
 # ========================
 st.subheader("📈 Efecto Látigo (Bullwhip Effect)")
-stds = []
-for rol in roles:
-    df = datos_equipo.get(rol, pd.DataFrame())
-    if not df.empty:
-        stds.append(df["placed_order"].std())
+st.image(grafico_latigo_png(equipo_id, version, stds))
+
+# ========================
+# REVISIÓN SEMANA A SEMANA
+# ========================
+st.subheader("⏪ Revisión semana a semana")
+semanas_jugadas = 0 if archivado else obtener_semana_actual(equipo_id) - 1
+if archivado:
+    st.info("La revisión semana a semana se reproduce desde la base viva: solo está disponible para el semestre en curso.")
+elif semanas_jugadas == 0:
+    st.info("El equipo todavía no cerró ninguna semana.")
+else:
+    if semanas_jugadas > 1:
+        semana_revision = st.slider("Semana", 1, semanas_jugadas, semanas_jugadas)
     else:
-        stds.append(0)
-
-fig2, ax2 = plt.subplots()
-ax2.plot(roles, stds, marker='o')
-ax2.set_title("Desviación Estándar de Pedidos por Rol")
-ax2.set_ylabel("STD Pedidos")
-ax2.set_xlabel("Rol")
-st.pyplot(fig2)
+        semana_revision = 1
+    semana = cargar_semana_revisada(equipo_id, version, semana_revision)
+    parametros = obtener_parametros(equipo_id)
+    # El costo acumulado sale de rounds, la proyección de los mismos eventos
+    costo_acumulado = [
+        (datos_equipo[rol].loc[datos_equipo[rol]["week"] <= semana_revision, ["stock", "backorder"]]
+         @ [parametros.holding_cost, parametros.backorder_cost]).sum()
+        for rol in ROLES
+    ]
+    st.dataframe(pd.DataFrame({
+        "Stock": semana.stock[0],
+        "Backorder": semana.backorder[0],
+        "Pedido recibido": semana.incoming_order[0],
+        "Envío recibido": semana.incoming_shipment[0],
+        "Pedido realizado": semana.placed_order[0],
+        "Envío realizado": semana.sent_shipment[0],
+        "Costo acumulado": costo_acumulado,
+    }, index=ROLES))
 
 # ========================
 # TOTALES DEL EQUIPO